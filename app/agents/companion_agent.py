@@ -1,11 +1,17 @@
 import os
 import json
 import re
+import random
+import string
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+import numpy as np
 from utils.timezone_utils import now_central, to_central
-from typing import Dict, Any, List
-from groq import Groq
+from typing import Dict, Any, Generator, Iterator, List, Optional, Set
+from utils.groq_client import get_groq_client
 
 # Load environment variables
 load_dotenv()
@@ -14,46 +20,105 @@ from app.database.crud import (ConversationCRUD, MedicationCRUD,
                                PersonalEventCRUD)
 from utils.sentiment_analysis import analyze_sentiment
 from utils.emergency_detection import detect_emergency
+from utils.keyword_scanner import KeywordScanner
 from app.memory.memory_manager import MemoryManager
+from app.agents.response_cache import ResponseCache
+from app.agents.intent_router import IntentRouter, Intent, EVENT_MENTION_KEYWORDS
 from utils.pii_redaction import PIIRedactor, sanitize_before_storage, generate_safe_response_prompt
 if "GROQ_API_KEY" in st.secrets:
     os.environ["GROQ_API_KEY"] = st.secrets["GROQ_API_KEY"]
     os.environ["TELEGRAM_BOT_TOKEN"] = st.secrets["TELEGRAM_BOT_TOKEN"]
     os.environ["TELEGRAM_CHAT_ID"] = st.secrets["TELEGRAM_CHAT_ID"]
 
-class CompanionAgent:
-
-    def __init__(self):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.model = "llama-3.3-70b-versatile"  # Using Groq model
-        self.memory_manager = MemoryManager()  # Initialize memory system
-
-    def _get_system_prompt(self) -> str:
-        """Generate system prompt with current time context"""
-        # Get current time in Central Time
-        current_time = now_central()
-        hour = current_time.hour
-        
-        # Determine time of day
-        if 5 <= hour < 12:
-            time_of_day = "morning"
-        elif 12 <= hour < 17:
-            time_of_day = "afternoon"
-        elif 17 <= hour < 21:
-            time_of_day = "evening"
-        else:
-            time_of_day = "night"
-        
-        # Format current time
-        time_str = current_time.strftime("%I:%M %p %Z")
-        
-        # System prompt for elderly care companion with time context
-        return f"""You are Carely, a warm, empathetic AI companion for elderly care.
-
-CURRENT TIME CONTEXT:
-- Current time: {time_str}
-- Time of day: {time_of_day}
-- User location: Chicago, IL (Central Time)
+logger = logging.getLogger(__name__)
+
+# Keyword vocabularies for the local (no API call) analyzers. The mood and
+# routing categories share one whole-word scanner; the safety categories get
+# their own substring scanner (below) so inflections such as "chest pains"
+# or "headaches" still match.
+_POSITIVE_WORDS = frozenset({
+    "good", "great", "happy", "wonderful", "excellent", "love", "enjoy",
+    "better", "fine", "well", "nice", "pleasant", "comfortable", "peaceful"})
+_NEGATIVE_WORDS = frozenset({
+    "bad", "terrible", "awful", "hate", "horrible", "pain", "painful", "hurt",
+    "hurts", "hurting", "sad", "worried", "anxious", "confused", "lost", "dizzy",
+    "sick", "tired", "lonely", "scared", "frightened", "depressed", "upset"})
+_CONCERN_WORDS = frozenset({
+    "pain", "painful", "hurt", "hurts", "hurting", "dizzy", "fall", "falling",
+    "emergency", "help", "confused", "memory", "forgot", "lost", "scared",
+    "can't", "unable", "difficult"})
+_DISCOMFORT_WORDS = frozenset({"pain", "painful", "hurt", "hurts", "hurting", "sick"})
+_LONELINESS_WORDS = frozenset({"lonely", "alone", "miss"})
+_CONTENTMENT_WORDS = frozenset({"happy", "good", "great"})
+# Per-keyword contribution of each category to the local sentiment score
+_SENTIMENT_WEIGHTS = (("positive", 1.0), ("negative", -1.0), ("concern", -1.5))
+
+_CRITICAL_WORDS = frozenset({"stroke", "fell", "bleed", "bleeding", "unconscious", "dizzy",
+                             "fainted"})
+_CRITICAL_PHRASES = ("chest pain", "can't breathe", "cannot breathe", "heart attack")
+_HIGH_WORDS = frozenset({"pain", "painful", "hurt", "hurts", "hurting", "emergency",
+                         "fallen", "severe", "blood"})
+_HIGH_PHRASES = ("help me", "can't move", "difficulty breathing")
+_MEDIUM_WORDS = frozenset({"dizzy", "confused", "nausea", "headache", "weak", "tired",
+                           "worried", "scared", "anxious"})
+
+# Keywords that make should_alert_caregiver notify the caregiver
+_ALERT_WORDS = frozenset({"pain", "painful", "hurt", "hurts", "hurting", "dizzy", "fall",
+                          "falling", "fallen", "fell", "emergency", "help", "confused",
+                          "lost", "scared"})
+_ALERT_PHRASES = ("can't breathe", "chest pain")
+
+_MEDICATION_WORDS = frozenset({"medication", "medications", "med", "meds", "pill", "pills",
+                               "medicine", "medicines", "take", "took", "dose", "doses"})
+_BORED_WORDS = frozenset({"bored", "lonely", "entertain", "fun"})
+_BORED_PHRASES = ("nothing to do",)
+_MUSIC_WORDS = frozenset({"music", "song", "songs", "relax", "calming", "peaceful"})
+
+_KEYWORDS = KeywordScanner({
+    "positive": _POSITIVE_WORDS,
+    "negative": _NEGATIVE_WORDS,
+    "concern": _CONCERN_WORDS,
+    "discomfort": _DISCOMFORT_WORDS,
+    "loneliness": _LONELINESS_WORDS,
+    "contentment": _CONTENTMENT_WORDS,
+    "medication": _MEDICATION_WORDS,
+    "bored": _BORED_WORDS | set(_BORED_PHRASES),
+    "music": _MUSIC_WORDS,
+})
+# Emergency and caregiver-alert keywords, matched by substring as with the
+# original `in` checks: missing a symptom costs more than a false alarm
+_SAFETY_KEYWORDS = KeywordScanner({
+    "critical": _CRITICAL_WORDS | set(_CRITICAL_PHRASES),
+    "high": _HIGH_WORDS | set(_HIGH_PHRASES),
+    "medium": _MEDIUM_WORDS,
+    "alert": _ALERT_WORDS | set(_ALERT_PHRASES),
+}, whole_words=False)
+
+
+# Replies to these are built from medication, health or emergency state and
+# are never served from the response cache
+_UNCACHEABLE_INTENTS = frozenset({"log_medication", "ask_medication", "emergency"})
+_UNCACHEABLE_CATEGORIES = frozenset({"medication", "concern", "discomfort",
+                                     "critical", "high", "medium", "alert"})
+
+
+def _scan_keywords(text_lower: str) -> Dict[str, Set[str]]:
+    """Scan a lowercased message for every keyword category of the local analyzers"""
+    hits = _KEYWORDS.scan(text_lower)
+    hits.update(_SAFETY_KEYWORDS.scan(text_lower))
+    return hits
+
+
+# A sentence terminator followed by whitespace
+_SENTENCE_BOUNDARY_RE = re.compile(r'[.!?]\s')
+
+# System prompt for elderly care companion. Nothing per-user or time-dependent
+# goes in here: it stays byte-identical across requests so the provider's
+# prompt cache can reuse it
+_SYSTEM_PROMPT = """You are Carely, a warm, empathetic AI companion for elderly care.
+
+USER LOCATION:
+- Chicago, IL (Central Time)
 
 ADAPTIVE RESPONSE STYLE:
 - Default to concise responses (~4 short sentences) for casual conversation and simple questions.
@@ -63,7 +128,7 @@ ADAPTIVE RESPONSE STYLE:
 CRITICAL RULES:
 1. NO repetition, filler, or rambling. Every word must add value.
 2. If uncertain or missing information, ask EXACTLY 1 clarifying question.
-3. For time questions: use the current time provided above ({time_str}). NEVER guess or make up times.
+3. For time questions: use the current time provided with the user's message. NEVER guess or make up times.
 4. For medications, schedules, and appointments: call tools or check database and quote results EXACTLY as provided.
 5. Warm, caring tone. Think of a caring friend who adapts to your needs.
 6. DO NOT repeat greetings like "Good morning/afternoon/evening" in every message.
@@ -82,6 +147,124 @@ Be gentle, patient, and use simple everyday language. Never use medical jargon.
 Focus on continuing the conversation naturally, as if you're already in the middle of a friendly chat.
 """
 
+# Canned content for the music and fun-corner quick actions
+_MUSIC_OPTIONS = (
+    {"title": "Music", "url": "https://www.youtube.com/watch?v=D1lH55N72U0&list=RDD1lH55N72U0&start_radio=1"},
+    {"title": "Music", "url": "https://www.youtube.com/watch?v=6FOUqQt3Kg0"},
+    {"title": "Music", "url": "https://www.youtube.com/watch?v=8jCFzreP1ng&list=RD8jCFzreP1ng&start_radio=1"},
+    {"title": "Music", "url": "https://www.youtube.com/watch?v=9Qp_SrTgBBs&list=RD9Qp_SrTgBBs&start_radio=1"},
+    {"title": "Music", "url": "https://www.youtube.com/watch?v=Ms4KTpdx1wY&list=RDMs4KTpdx1wY&start_radio=1"},
+    {"title": "Music", "url": "https://www.youtube.com/watch?v=nsCwpwGi9uE&list=RDnsCwpwGi9uE&start_radio=1"},
+    {"title": "Music", "url": "https://www.youtube.com/watch?v=uA4mfu_5TyI&list=RDuA4mfu_5TyI&start_radio=1"},
+)
+_JOKES = (
+    "Why don't scientists trust atoms? Because they make up everything!",
+    "What do you call a fish wearing a bowtie? So-fish-ticated!",
+    "Why did the scarecrow win an award? He was outstanding in his field!",
+    "What do you call a bear with no teeth? A gummy bear!",
+)
+_PUZZLES = (
+    "What has keys but no locks, space but no room, and you can enter but can't go in? (Answer: A keyboard)",
+    "I have cities but no houses, forests but no trees, and water but no fish. What am I? (Answer: A map)",
+    "What gets wet while drying? (Answer: A towel)",
+    "What can you catch but not throw? (Answer: A cold)",
+)
+_GENERAL_MEMORY_CUES = (
+    "What did you have for breakfast this morning?",
+    "Can you tell me what day of the week it is today?",
+    "Do you remember what we talked about earlier today?",
+)
+
+# Scheduled check-in greetings, filled with the user's name
+_CHECKIN_TEMPLATES = {
+    "morning":
+    "Good morning, {name}! I hope you slept well. How are you feeling this morning? Did you take your morning medications?",
+    "afternoon":
+    "Good afternoon, {name}! How has your day been so far? Are you feeling alright?",
+    "evening":
+    "Good evening, {name}! How was your day? Did you remember to take all your medications today?"
+}
+
+# Event-name extraction for partial entity resolution
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+_EVENT_STOPWORDS = frozenset(['with', 'the', 'a', 'an', 'at', 'on', 'in', 'for'])
+
+# Routing for the deterministic (no LLM) handlers in generate_response
+_ROUTER = IntentRouter()
+
+
+class ResponseStream:
+    """Iterates over the text of a reply as it is generated
+
+    The full response dict (as returned by generate_response) is available
+    on `result` once the stream has been consumed.
+    """
+
+    def __init__(self, generator: Generator[str, None, Dict[str, Any]]):
+        self._generator = generator
+        self.result: Dict[str, Any] = None
+
+    def __iter__(self) -> Iterator[str]:
+        streamed = False
+        while True:
+            try:
+                delta = next(self._generator)
+            except StopIteration as stop:
+                self.result = stop.value
+                break
+            if delta:
+                streamed = True
+                yield delta
+
+        # Deterministic handlers produce their reply in one piece
+        if not streamed:
+            yield self.result["response"]
+        elif "error" in self.result:
+            yield "\n\n" + self.result["response"]
+
+
+class CompanionAgent:
+
+    # Shared pool for writes that don't need to block the reply
+    # (vector store updates of saved conversations)
+    _persist_executor = ThreadPoolExecutor(max_workers=4,
+                                           thread_name_prefix="carely-persist")
+
+    # Separate pool for the per-turn reads the reply waits on, so they never
+    # queue behind background writes
+    _context_executor = ThreadPoolExecutor(max_workers=4,
+                                           thread_name_prefix="carely-context")
+
+    def __init__(self):
+        self.client = get_groq_client()  # Shared pooled client
+        self.model = "llama-3.3-70b-versatile"  # Using Groq model
+        self.memory_manager = MemoryManager()  # Initialize memory system
+        # Exact + semantic cache of LLM replies (semantic tier needs an embedding model)
+        self.response_cache = ResponseCache(
+            embed_fn=self.memory_manager.long_term.embed_batch)
+
+    def _get_system_prompt(self) -> str:
+        """Return the system prompt (static, so the provider can cache it as a prefix)"""
+        return _SYSTEM_PROMPT
+
+    def _get_time_context(self) -> str:
+        """Current time context; sent with the latest message, not the system prompt"""
+        # Get current time in Central Time
+        current_time = now_central()
+        hour = current_time.hour
+        
+        # Determine time of day
+        if 5 <= hour < 12:
+            time_of_day = "morning"
+        elif 12 <= hour < 17:
+            time_of_day = "afternoon"
+        elif 17 <= hour < 21:
+            time_of_day = "evening"
+        else:
+            time_of_day = "night"
+        
+        return f"Current time: {current_time.strftime('%I:%M %p %Z')} ({time_of_day})"
+
     def _limit_to_sentences(self, text: str, max_sentences: int = 4) -> str:
         """
         Limit text to at most max_sentences. If exceeds, reduce to fit max_sentences.
@@ -89,17 +272,15 @@ Focus on continuing the conversation naturally, as if you're already in the midd
         if not text:
             return text
         
-        # Split on sentence boundaries (., !, ?)
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-        
-        # Remove empty sentences
-        sentences = [s for s in sentences if s.strip()]
+        # One scan over the sentence boundaries (., !, ? followed by whitespace);
+        # cut right after the terminator of the last sentence kept
+        count = 0
+        for match in _SENTENCE_BOUNDARY_RE.finditer(text):
+            count += 1
+            if count == max_sentences:
+                return text[:match.start() + 1]
         
-        if len(sentences) <= max_sentences:
-            return text
-        
-        # If exceeds max_sentences, return first max_sentences
-        return ' '.join(sentences[:max_sentences])
+        return text
     
     def _decide_verbosity(self, user_text: str) -> str:
         """
@@ -188,29 +369,56 @@ or {{"verbosity":"LONG"}}"""
         if not upcoming_events:
             return "No upcoming events stored."
 
+        # Absolute dates in a fixed order keep this text identical between turns
         context = "Upcoming important events to remember:\n"
-        for event in upcoming_events:
-            days_until = (to_central(event.event_date) - now_central()).days
-            context += f"- {event.title} ({event.event_type}) in {days_until} days"
+        for event in sorted(upcoming_events, key=lambda e: (e.event_date, e.id)):
+            event_day = to_central(event.event_date).strftime('%Y-%m-%d')
+            context += f"- {event.title} ({event.event_type}) on {event_day}"
             if event.description:
                 context += f": {event.description}"
             context += "\n"
 
         return context
 
+    def _get_medications(self, user_id: int, active_only: bool = True,
+                         request_cache: Dict = None) -> List:
+        """Get a user's medications, memoized for the duration of one request
+
+        Across requests the list is cached by MedicationCRUD itself.
+        """
+        request_key = ("medications", user_id, active_only)
+        if request_cache is not None and request_key in request_cache:
+            return request_cache[request_key]
+
+        medications = MedicationCRUD.get_user_medications(user_id, active_only=active_only)
+
+        if request_cache is not None:
+            request_cache[request_key] = medications
+        return medications
+
+    def _get_user(self, user_id: int, request_cache: Dict = None):
+        """Get a user, memoized for the duration of one request"""
+        if request_cache is None:
+            return UserCRUD.get_user(user_id)
+        request_key = ("user", user_id)
+        if request_key not in request_cache:
+            request_cache[request_key] = UserCRUD.get_user(user_id)
+        return request_cache[request_key]
+
     def log_medication_tool(self,
                             user_id: int,
                             medication_name: str = None,
                             notes: str = "",
-                            medication_id: int = None) -> str:
+                            medication_id: int = None,
+                            request_cache: Dict = None) -> str:
         """Tool to log medication intake with duplicate detection"""
         try:
             # Find medication either by ID or name
             if medication_id:
-                medications = MedicationCRUD.get_user_medications(user_id)
+                medications = self._get_medications(user_id, request_cache=request_cache)
                 medication = next((med for med in medications if med.id == medication_id), None)
             elif medication_name:
-                medications = MedicationCRUD.get_user_medications(user_id)
+                medications = self._get_medications(user_id, request_cache=request_cache)
                 medication = next((med for med in medications
                                    if medication_name.lower() in med.name.lower()),
                                   None)
@@ -238,6 +446,7 @@ or {{"verbosity":"LONG"}}"""
                 scheduled_time=now_central(),
                 status="taken",
                 notes=notes)
+            self.response_cache.invalidate_user(user_id)
 
             return f"Got it! I've logged your {medication.name} for today. You're staying on track! 🌟"
 
@@ -253,8 +462,7 @@ or {{"verbosity":"LONG"}}"""
 
             schedule_info = "Here's your medication schedule:\n\n"
             for med in medications:
-                times = json.loads(
-                    med.schedule_times) if med.schedule_times else []
+                times = med.schedule_times_list
                 schedule_info += f"• {med.name} ({med.dosage}) - {med.frequency}\n"
                 if times:
                     schedule_info += f"  Times: {', '.join(times)}\n"
@@ -269,10 +477,11 @@ or {{"verbosity":"LONG"}}"""
                              user_id: int,
                              alert_type: str,
                              description: str,
-                             severity: str = "medium") -> str:
+                             severity: str = "medium",
+                             request_cache: Dict = None) -> str:
         """Tool to alert caregivers about concerning patterns"""
         try:
-            user = UserCRUD.get_user(user_id)
+            user = self._get_user(user_id, request_cache)
             title = f"Alert for {user.name if user else 'Patient'}"
 
             CaregiverAlertCRUD.create_alert(user_id=user_id,
@@ -328,11 +537,12 @@ Return JSON only:
             # If AI fails, default to general chat - don't auto-log anything
             return {"type": "general_chat", "confidence": 0.5, "reasoning": "AI classification failed, defaulting to safe option"}
 
-    def _extract_medication_details(self, user_id: int, user_input: str) -> Dict[str, Any]:
+    def _extract_medication_details(self, user_id: int, user_input: str,
+                                    request_cache: Dict = None) -> Dict[str, Any]:
         """Extract which medication and any notes from natural language"""
         
         # Get user's medications
-        medications = MedicationCRUD.get_user_medications(user_id, active_only=True)
+        medications = self._get_medications(user_id, request_cache=request_cache)
         if not medications:
             return {"medication_id": None, "medication_name": None, "notes": "", "confidence": 0.0}
         
@@ -391,20 +601,19 @@ Return JSON only:
         pending = []
         for med in medications:
             try:
-                schedule_times = json.loads(med.schedule_times) if med.schedule_times else []
-                for time_str in schedule_times:
-                    hour, minute = map(int, time_str.split(':'))
+                for time_str, hour, minute in med.schedule_time_entries:
                     scheduled_time = current_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
                     
                     # Check if time has passed and not logged
                     if scheduled_time <= current_time:
                         # Check if already logged
-                        recent_log = MedicationLogCRUD.check_recent_medication_log(
+                        already_logged = MedicationLogCRUD.has_recent_medication_log(
                             user_id=user_id,
                             medication_id=med.id,
-                            hours=6
+                            hours=6,
+                            now=current_time
                         )
-                        if not recent_log:
+                        if not already_logged:
                             pending.append({
                                 "medication": med,
                                 "scheduled_time": scheduled_time,
@@ -518,30 +727,30 @@ Generate greeting:"""
             else:
                 return f"{greeting}, {user.name}! How are you doing today? I'm here to help with anything you need. 😊"
 
-    def determine_quick_actions(self, user_message: str, user_id: int) -> List[str]:
+    def determine_quick_actions(self, user_message: str, user_id: int,
+                                hits: Dict[str, Set[str]] = None,
+                                request_cache: Dict = None) -> List[str]:
         """Determine 2-3 relevant quick action buttons based on context"""
-        message_lower = user_message.lower()
+        if hits is None:
+            hits = _KEYWORDS.scan(user_message.lower())
         actions = []
         
         # Medication-related keywords
-        med_keywords = ["medication", "med", "pill", "medicine", "take", "took", "dose"]
-        if any(keyword in message_lower for keyword in med_keywords):
+        if "medication" in hits:
             actions.append("log_medication")
         
         # Boredom or entertainment keywords
-        bored_keywords = ["bored", "lonely", "nothing to do", "entertain", "fun"]
-        if any(keyword in message_lower for keyword in bored_keywords):
+        if "bored" in hits:
             actions.extend(["play_music", "fun_corner"])
         
         # Music keywords
-        music_keywords = ["music", "song", "relax", "calming", "peaceful"]
-        if any(keyword in message_lower for keyword in music_keywords):
+        if "music" in hits:
             if "play_music" not in actions:
                 actions.append("play_music")
         
         # Default fallback: add variety if no specific context
         if not actions:
-            medications = MedicationCRUD.get_user_medications(user_id)
+            medications = self._get_medications(user_id, request_cache=request_cache)
             if medications:
                 actions.append("log_medication")
             actions.append("play_music")
@@ -558,18 +767,7 @@ Generate greeting:"""
     
     def handle_play_music(self) -> Dict[str, Any]:
         """Return a relaxing music recommendation"""
-        music_options = [
-            {"title": "Music", "url": "https://www.youtube.com/watch?v=D1lH55N72U0&list=RDD1lH55N72U0&start_radio=1"},
-            {"title": "Music", "url": "https://www.youtube.com/watch?v=6FOUqQt3Kg0"},
-            {"title": "Music", "url": "https://www.youtube.com/watch?v=8jCFzreP1ng&list=RD8jCFzreP1ng&start_radio=1"},
-            {"title": "Music", "url": "https://www.youtube.com/watch?v=9Qp_SrTgBBs&list=RD9Qp_SrTgBBs&start_radio=1"},
-            {"title": "Music", "url": "https://www.youtube.com/watch?v=Ms4KTpdx1wY&list=RDMs4KTpdx1wY&start_radio=1"},
-            {"title": "Music", "url": "https://www.youtube.com/watch?v=nsCwpwGi9uE&list=RDnsCwpwGi9uE&start_radio=1"},
-            {"title": "Music", "url": "https://www.youtube.com/watch?v=uA4mfu_5TyI&list=RDuA4mfu_5TyI&start_radio=1"},
-        ]
-        
-        import random
-        selected = random.choice(music_options)
+        selected = random.choice(_MUSIC_OPTIONS)
         
         return {
             "message": f"Here's your favorite music 🎵\n\n{selected['url']}",
@@ -579,24 +777,10 @@ Generate greeting:"""
     
     def handle_fun_corner(self, corner_type: str = "joke") -> str:
         """Return either a joke or puzzle"""
-        import random
-        
         if corner_type == "joke":
-            jokes = [
-                "Why don't scientists trust atoms? Because they make up everything!",
-                "What do you call a fish wearing a bowtie? So-fish-ticated!",
-                "Why did the scarecrow win an award? He was outstanding in his field!",
-                "What do you call a bear with no teeth? A gummy bear!"
-            ]
-            return random.choice(jokes)
+            return random.choice(_JOKES)
         else:
-            puzzles = [
-                "What has keys but no locks, space but no room, and you can enter but can't go in? (Answer: A keyboard)",
-                "I have cities but no houses, forests but no trees, and water but no fish. What am I? (Answer: A map)",
-                "What gets wet while drying? (Answer: A towel)",
-                "What can you catch but not throw? (Answer: A cold)"
-            ]
-            return random.choice(puzzles)
+            return random.choice(_PUZZLES)
     
     def generate_memory_cue(self, user_id: int) -> str:
         """Generate a gentle memory recall question from personal data"""
@@ -623,39 +807,26 @@ Generate greeting:"""
                     questions.append(f"Can you tell me when {event.title} is?")
         
         # General questions
-        questions.extend([
-            "What did you have for breakfast this morning?",
-            "Can you tell me what day of the week it is today?",
-            "Do you remember what we talked about earlier today?"
-        ])
+        questions.extend(_GENERAL_MEMORY_CUES)
         
-        import random
         return random.choice(questions) if questions else "What's your favorite memory from this week?"
 
-    def _local_sentiment_analysis(self, text: str) -> Dict[str, Any]:
+    def _local_sentiment_analysis(self, text: str,
+                                  hits: Dict[str, Set[str]] = None) -> Dict[str, Any]:
         """Local keyword-based sentiment analysis (no API call)"""
-        text_lower = text.lower()
-        
-        positive_words = ["good", "great", "happy", "wonderful", "excellent", "love", "enjoy",
-                         "better", "fine", "well", "nice", "pleasant", "comfortable", "peaceful"]
-        
-        negative_words = ["bad", "terrible", "awful", "hate", "horrible", "pain", "hurt", "sad",
-                         "worried", "anxious", "confused", "lost", "dizzy", "sick", "tired",
-                         "lonely", "scared", "frightened", "depressed", "upset"]
-        
-        concern_words = ["pain", "hurt", "dizzy", "fall", "emergency", "help", "confused",
-                        "memory", "forgot", "lost", "scared", "can't", "unable", "difficult"]
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        concern_count = sum(1 for word in concern_words if word in text_lower)
+        if hits is None:
+            hits = _KEYWORDS.scan(text.lower())
         
-        total_words = len(text_lower.split())
+        # Whitespace splitting doesn't depend on case, so count the raw text
+        total_words = len(text.split())
         if total_words == 0:
             return {"score": 0, "label": "neutral", "confidence": 0.6, "emotions": []}
         
-        score = (positive_count - negative_count - (concern_count * 1.5)) / total_words
-        score = max(-1, min(1, score))
+        # Only categories that actually matched contribute to the score
+        raw_score = sum(weight * len(hits[category])
+                        for category, weight in _SENTIMENT_WEIGHTS
+                        if category in hits)
+        score = max(-1, min(1, raw_score / total_words))
         
         if score > 0.1:
             label = "positive"
@@ -665,36 +836,26 @@ Generate greeting:"""
             label = "neutral"
         
         emotions = []
-        if concern_count > 0:
+        if "concern" in hits:
             emotions.append("concern")
-        if any(word in text_lower for word in ["pain", "hurt", "sick"]):
+        if "discomfort" in hits:
             emotions.append("discomfort")
-        if any(word in text_lower for word in ["lonely", "alone", "miss"]):
+        if "loneliness" in hits:
             emotions.append("loneliness")
-        if any(word in text_lower for word in ["happy", "good", "great"]):
+        if "contentment" in hits:
             emotions.append("contentment")
         
         return {"score": score, "label": label, "confidence": 0.6, "emotions": emotions}
     
-    def _local_emergency_detection(self, message: str, user_id: int) -> Dict[str, Any]:
+    def _local_emergency_detection(self, message: str, user_id: int,
+                                   hits: Dict[str, Set[str]] = None) -> Dict[str, Any]:
         """Local keyword-based emergency detection (no API call)"""
-        message_lower = message.lower()
+        if hits is None:
+            hits = _SAFETY_KEYWORDS.scan(message.lower())
         
-        # Critical emergency keywords
-        critical_keywords = ["chest pain", "can't breathe", "cannot breathe", "heart attack", 
-                            "stroke", "fell", "bleeding", "unconscious", "dizzy", "fainted"]
-        
-        # High severity keywords
-        high_keywords = ["pain", "hurt", "emergency", "help me", "fallen", "can't move",
-                        "difficulty breathing", "severe", "blood"]
-        
-        # Medium severity keywords
-        medium_keywords = ["dizzy", "confused", "nausea", "headache", "weak", "tired", 
-                          "worried", "scared", "anxious"]
-        
-        is_critical = any(keyword in message_lower for keyword in critical_keywords)
-        is_high = any(keyword in message_lower for keyword in high_keywords)
-        is_medium = any(keyword in message_lower for keyword in medium_keywords)
+        is_critical = "critical" in hits
+        is_high = "high" in hits
+        is_medium = "medium" in hits
         
         if is_critical:
             return {
@@ -726,51 +887,43 @@ Generate greeting:"""
         }
 
     def should_alert_caregiver(self, user_id: int, sentiment_score: float,
-                               message: str) -> bool:
+                               message: str, hits: Dict[str, Set[str]] = None) -> bool:
         """Determine if caregiver should be alerted based on conversation"""
         # Alert for very negative sentiment
         if sentiment_score < -0.7:
             return True
 
         # Check for concerning keywords
-        concerning_keywords = [
-            "pain", "hurt", "dizzy", "fall", "fell", "emergency", "help",
-            "can't breathe", "chest pain", "confused", "lost", "scared"
-        ]
-
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in concerning_keywords)
+        if hits is None:
+            hits = _SAFETY_KEYWORDS.scan(message.lower())
+        return "alert" in hits
 
-    def _get_next_medication_time(self, user_id: int) -> str:
+    def _get_next_medication_time(self, user_id: int, request_cache: Dict = None) -> str:
         """Get the next scheduled medication time for a user"""
-        medications = MedicationCRUD.get_user_medications(user_id, active_only=True)
+        medications = self._get_medications(user_id, request_cache=request_cache)
         if not medications:
             return "You don't have any medications scheduled right now."
         
         current_time = now_central()
+        
+        # Every valid (medication, hour, minute) slot, as seconds since midnight
+        slots = [(med, hour * 3600 + minute * 60)
+                 for med in medications
+                 for _, hour, minute in med.schedule_time_entries
+                 if 0 <= hour < 24 and 0 <= minute < 60]
+        
         next_med = None
         next_time = None
-        
-        for med in medications:
-            try:
-                schedule_times = json.loads(med.schedule_times)
-                for time_str in schedule_times:
-                    # Parse time string (HH:MM format)
-                    hour, minute = map(int, time_str.split(':'))
-                    
-                    # Create datetime for today
-                    scheduled_dt = current_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    
-                    # If time has passed today, check tomorrow
-                    if scheduled_dt <= current_time:
-                        scheduled_dt = scheduled_dt + timedelta(days=1)
-                    
-                    # Track the earliest next medication
-                    if next_time is None or scheduled_dt < next_time:
-                        next_time = scheduled_dt
-                        next_med = med
-            except (json.JSONDecodeError, ValueError):
-                continue
+        if slots:
+            day_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+            now_offset = (current_time - day_start).total_seconds()
+            
+            # Times that have passed today are due tomorrow; earliest slot wins
+            offsets = np.fromiter((offset for _, offset in slots), dtype=np.int64, count=len(slots))
+            offsets = np.where(offsets <= now_offset, offsets + 86400, offsets)
+            best = int(np.argmin(offsets))
+            next_med = slots[best][0]
+            next_time = day_start + timedelta(seconds=int(offsets[best]))
         
         if next_med and next_time:
             time_str = next_time.strftime("%I:%M %p %Z")
@@ -778,24 +931,187 @@ Generate greeting:"""
         
         return "I couldn't find your next medication time."
 
+    def _persist_turn(self, user_id: int, user_message: str, ai_response: str,
+                      stored_message: str = None, stored_response: str = None,
+                      sentiment_score: float = None, sentiment_label: str = None,
+                      conversation_type: str = "general") -> Optional[int]:
+        """Save a conversation turn and index it in the vector store in the background
+
+        The row is written before the reply is returned, so callers get its ID
+        and the next turn's short-term context always includes it. Only the
+        vector store update runs on the background pool.
+
+        Returns:
+            The saved conversation's ID, or None if the write failed
+        """
+        try:
+            conversation = ConversationCRUD.save_conversation(
+                user_id=user_id,
+                message=stored_message if stored_message is not None else user_message,
+                response=stored_response if stored_response is not None else ai_response,
+                sentiment_score=sentiment_score,
+                sentiment_label=sentiment_label,
+                conversation_type=conversation_type)
+        except Exception as e:
+            logger.error(f"Error saving conversation for user {user_id}: {e}")
+            return None
+
+        self._persist_executor.submit(self._index_turn, user_id, conversation.id,
+                                      user_message, ai_response, conversation.timestamp)
+        return conversation.id
+
+    def _index_turn(self, user_id: int, conversation_id: int, user_message: str,
+                    ai_response: str, timestamp: datetime) -> None:
+        """Add a saved conversation turn to the vector store"""
+        try:
+            self.memory_manager.add_conversation(
+                user_id=user_id,
+                conversation_id=conversation_id,
+                user_message=user_message,
+                assistant_response=ai_response,
+                timestamp=timestamp)
+        except Exception as e:
+            logger.error(f"Error indexing conversation for user {user_id}: {e}")
+
+    def _fetch_context(self, user_id: int, user_message: str):
+        """Embed the message once and fetch the memory context sections with it
+
+        Returns (context_sections, query_embedding); the embedding is reused by
+        the response cache so the message goes through the encoder only once.
+        """
+        query_embedding = self.memory_manager.embed(user_message)
+        context_sections = self.memory_manager.get_context_sections(
+            user_id, user_message, query_embedding=query_embedding)
+        return context_sections, query_embedding
+
+    def _stream_llm_reply(self, user_message: str, context_sections: Dict[str, str],
+                          user_name: str, conversation_type: str,
+                          emergency_context: str, pii_privacy_notice: str) -> Iterator[str]:
+        """Stream a conversational reply from the LLM, sized by the verbosity decision"""
+        # Decide verbosity level based on user intent
+        verbosity_level = self._decide_verbosity(user_message)
+        
+        # Set parameters based on verbosity. The sentence cap is what bounds
+        # SHORT and MEDIUM replies (the stream is cancelled at the boundary);
+        # the token budgets leave room so a reply is never cut mid-sentence
+        if verbosity_level == "SHORT":
+            max_tokens = 220
+            sentence_limit = 4
+        elif verbosity_level == "MEDIUM":
+            max_tokens = 600
+            sentence_limit = 8
+        else:  # LONG
+            max_tokens = 1200
+            sentence_limit = None  # No sentence limit for detailed responses
+        
+        # Messages run from most stable to most volatile so the provider can
+        # reuse the longest possible prompt prefix across turns:
+        # persona -> user profile -> recent history -> current turn
+        profile_block = f"""{context_sections.get("profile", "")}
+
+Please respond as Carely, keeping in mind:
+- The user's profile, medications, and preferences from the context provided
+- Recent conversation history and past relevant conversations
+- Daily summaries and patterns
+- Be warm, caring, and supportive
+- If they ask about medications, reference their actual schedule
+- If they ask about past conversations, use the relevant past conversations provided
+- Reference their personal information naturally when relevant
+- If this is an emergency situation, provide immediate reassurance and comfort"""
+
+        messages = [
+            {"role": "system", "content": self._get_system_prompt()},
+            {"role": "system", "content": profile_block},
+        ]
+        if context_sections.get("recent"):
+            messages.append({"role": "user", "content": context_sections["recent"]})
+
+        # Only the final block changes with every message; everything time-
+        # dependent (clock, days until events) lives here
+        current_turn = ""
+        if context_sections.get("relevant"):
+            current_turn += f"{context_sections['relevant']}\n\n"
+        if context_sections.get("timing"):
+            current_turn += f"{context_sections['timing']}\n"
+        current_turn += f"""{self._get_time_context()}
+User's name: {user_name}
+Conversation type: {conversation_type}
+Current message: {user_message}{emergency_context}
+{pii_privacy_notice}
+
+Respond naturally and warmly based on ALL the context provided."""
+        if sentence_limit:
+            # Ask the model to stop on its own at the cap the stream enforces
+            current_turn += f" Answer in at most {sentence_limit} sentences and stop after the last one."
+        messages.append({"role": "user", "content": current_turn})
+
+        # Stream the response with dynamic max_tokens
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.3,
+            max_tokens=max_tokens,
+            stop=["\n\n", "\n\n\n"],
+            stream=True)
+
+        # Apply dynamic sentence limiting (only for SHORT and MEDIUM) while
+        # streaming: stop at the sentence_limit-th boundary and cancel the rest
+        buf = ""
+        sentences = 0
+        try:
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+
+                # Start one char back so a terminator ending the previous delta is seen
+                scan_from = max(len(buf) - 1, 0)
+                emitted = len(buf)
+                buf += delta
+
+                if sentence_limit:
+                    for match in _SENTENCE_BOUNDARY_RE.finditer(buf, scan_from):
+                        sentences += 1
+                        if sentences >= sentence_limit:
+                            yield buf[emitted:match.start() + 1]
+                            return
+                yield delta
+        finally:
+            response.close()
+
     def generate_response(
             self,
             user_id: int,
             user_message: str,
             conversation_type: str = "general") -> Dict[str, Any]:
         """Generate AI response with context and tools using memory system"""
+        stream = self.generate_response_stream(user_id, user_message, conversation_type)
+        for _ in stream:
+            pass
+        return stream.result
+
+    def generate_response_stream(
+            self,
+            user_id: int,
+            user_message: str,
+            conversation_type: str = "general") -> ResponseStream:
+        """Like generate_response, but yields the reply text while it is generated"""
+        return ResponseStream(self._respond(user_id, user_message, conversation_type))
+
+    def _respond(self, user_id: int, user_message: str,
+                 conversation_type: str) -> Generator[str, None, Dict[str, Any]]:
+        """Yield reply text deltas (LLM path only) and return the full response dict"""
+        # Per-request memo so each CRUD lookup runs at most once per turn
+        request_cache = {}
         try:
             message_lower = user_message.lower()
+            route = _ROUTER.classify(message_lower)
             
             # FIRST: Check if this is a medication timing query (handle without LLM)
-            medication_timing_keywords = ['when should i take', 'next medication', 'next dose', 
-                                         'meds due', 'medication due', 'what time are my meds',
-                                         'when is my medication', 'medication schedule',
-                                         'next pill', 'when do i take']
-            is_med_timing_query = any(keyword in message_lower for keyword in medication_timing_keywords)
-            
-            if is_med_timing_query:
-                med_response = self._get_next_medication_time(user_id)
+            if route.intent == Intent.MED_TIMING:
+                med_response = self._get_next_medication_time(user_id, request_cache)
                 
                 # Save this simple interaction
                 ConversationCRUD.save_conversation(
@@ -815,30 +1131,12 @@ Generate greeting:"""
                 }
             
             # SECOND: Check if this is a current time/date query (handle without LLM)
-            # Exclude medication-related queries by checking they're not about meds/pills/dose
-            time_query_keywords = ['time now', 'current time', 'what\'s the time', 
-                                   'tell me the time', 'time is it', 'what is the time',
-                                   'what time is', 'what\'s time']
-            date_query_keywords = ['what is the date', 'what\'s the date', 'what date',
-                                   'what day is it', 'what\'s the day', 'what is the day',
-                                   'date today', 'day today', 'today\'s date']
-            datetime_query_keywords = ['day, time and date', 'date and time', 'time and date',
-                                       'day and time', 'time, date', 'date, time']
-            
-            # Check if asking about date and/or time (not medication-related)
-            is_datetime_query = any(keyword in message_lower for keyword in datetime_query_keywords)
-            is_time_query = (any(keyword in message_lower for keyword in time_query_keywords) and
-                           not any(med_word in message_lower for med_word in ['med', 'pill', 'dose', 'medication']))
-            is_date_query = any(keyword in message_lower for keyword in date_query_keywords)
-            
-            # Also handle "what time" if it's clearly about current time, not meds
-            if 'what time' in message_lower and not is_med_timing_query:
-                # If "what time" is followed by "is it" or similar, it's asking current time
-                if any(phrase in message_lower for phrase in ['what time is it', 'what time it is']):
-                    is_time_query = True
+            # Time queries about meds/pills/doses are excluded by the router
+            is_datetime_query = route.intent == Intent.DATETIME_QUERY
+            is_date_query = route.intent == Intent.DATE_QUERY
             
             # Handle date/time queries deterministically
-            if is_datetime_query or is_time_query or is_date_query:
+            if route.intent in (Intent.DATETIME_QUERY, Intent.DATE_QUERY, Intent.TIME_QUERY):
                 # Get current time using timezone utility
                 current_time = now_central()
                 
@@ -883,7 +1181,7 @@ Generate greeting:"""
             # Handle questions about medications (not logging) with AI + log data
             if intent["type"] == "ask_medication" and intent["confidence"] > 0.6:
                 # Get user's medications and today's logs
-                medications = MedicationCRUD.get_user_medications(user_id, active_only=True)
+                medications = self._get_medications(user_id, request_cache=request_cache)
                 all_logs = MedicationLogCRUD.get_user_logs(user_id, limit=20)
                 
                 # Filter today's logs (handle timezone-aware/naive comparison)
@@ -897,7 +1195,7 @@ Generate greeting:"""
                             today_logs.append(log)
                 
                 # Build context for AI
-                med_list = "\n".join([f"- {med.name} (Schedule: {med.schedule_times})" for med in medications]) if medications else "No medications prescribed"
+                med_list = "\n".join([f"- {med.name} (Schedule: {', '.join(med.schedule_times_list)})" for med in medications]) if medications else "No medications prescribed"
                 
                 if today_logs:
                     log_list = "\n".join([
@@ -965,7 +1263,7 @@ Provide a helpful, conversational response that:
             # Only proceed if AI is confident this is medication logging (not asking)
             if intent["type"] == "log_medication" and intent["confidence"] > 0.75:
                 # Extract medication details using AI
-                med_details = self._extract_medication_details(user_id, user_message)
+                med_details = self._extract_medication_details(user_id, user_message, request_cache)
                 
                 # Require high confidence to auto-log
                 if med_details["medication_id"] and med_details["confidence"] > 0.7:
@@ -973,7 +1271,8 @@ Provide a helpful, conversational response that:
                     log_result = self.log_medication_tool(
                         user_id=user_id,
                         medication_id=med_details["medication_id"],
-                        notes=med_details["notes"]
+                        notes=med_details["notes"],
+                        request_cache=request_cache
                     )
                     
                     # Generate a natural response
@@ -1011,7 +1310,7 @@ Provide a helpful, conversational response that:
                     }
                 else:
                     # Couldn't identify medication, ask which one
-                    medications = MedicationCRUD.get_user_medications(user_id, active_only=True)
+                    medications = self._get_medications(user_id, request_cache=request_cache)
                     if medications:
                         med_list = ", ".join([med.name for med in medications[:3]])
                         response_text = f"I'd be happy to log your medication! Which one did you take? Your medications include: {med_list}."
@@ -1029,15 +1328,7 @@ Provide a helpful, conversational response that:
             
             # FOURTH: Deterministic "yesterday/day before" summary handling
             # Broaden detection to cover common phrasings
-            yesterday_keywords = ['yesterday', 'day before yesterday', 'two days ago']
-            is_yesterday_query = any(keyword in message_lower for keyword in yesterday_keywords)
-            
-            # Expanded talk/summary indicators
-            talk_indicators = ['talk', 'discuss', 'chat', 'conversation', 'tell me about', 
-                             'what did', 'what happened', 'summary', 'recap']
-            is_talk_query = any(indicator in message_lower for indicator in talk_indicators)
-            
-            if is_yesterday_query and is_talk_query:
+            if route.intents & Intent.YESTERDAY_SUMMARY:
                 # Determine offset
                 offset_days = 1 if 'yesterday' in message_lower and 'day before' not in message_lower else 2
                 
@@ -1071,17 +1362,12 @@ Provide a helpful, conversational response that:
             
             # FIFTH: Partial entity resolution (e.g., "meeting with Mary")
             # Check if message mentions partial event names
-            event_mention_keywords = ['meeting', 'appointment', 'doctor', 'event', 'visit']
-            has_event_mention = any(keyword in message_lower for keyword in event_mention_keywords)
-            is_question = any(q in message_lower for q in ['when', 'what time', 'where', 'remind'])
-            
-            if has_event_mention and is_question:
+            if route.intents & Intent.EVENT_LOOKUP:
                 # Extract and sanitize potential event names
-                import string
                 words = user_message.split()
                 potential_names = []
                 
-                for keyword in event_mention_keywords:
+                for keyword in EVENT_MENTION_KEYWORDS:
                     if keyword in message_lower:
                         try:
                             idx = [w.lower() for w in words].index(keyword)
@@ -1089,11 +1375,10 @@ Provide a helpful, conversational response that:
                             phrase = " ".join(words[idx:min(idx+4, len(words))])
                             
                             # Strip punctuation from the phrase
-                            phrase = phrase.translate(str.maketrans('', '', string.punctuation))
+                            phrase = phrase.translate(_PUNCTUATION_TABLE)
                             
                             # Remove common stopwords
-                            stopwords = ['with', 'the', 'a', 'an', 'at', 'on', 'in', 'for']
-                            cleaned_words = [w for w in phrase.split() if w.lower() not in stopwords or w.lower() == keyword]
+                            cleaned_words = [w for w in phrase.split() if w.lower() not in _EVENT_STOPWORDS or w.lower() == keyword]
                             phrase = " ".join(cleaned_words)
                             
                             if phrase:
@@ -1157,31 +1442,13 @@ Provide a helpful, conversational response that:
                                 }
             
             # Check if this is a memory-specific query
-            memory_query_keywords = ['remember', 'talked about', 'medication schedule', 
-                                   'breakfast', 'lunch', 'dinner', 'meal', 
-                                   'yesterday', 'summary', 'discussed']
-            is_memory_query = any(keyword in user_message.lower() for keyword in memory_query_keywords)
-            
             # Use memory manager for memory-specific queries
-            if is_memory_query:
+            if route.intents & Intent.MEMORY_QUERY:
                 memory_response = self.memory_manager.recall_information(user_id, user_message)
                 if memory_response and len(memory_response) > 20:
-                    # Save to database first
-                    conversation = ConversationCRUD.save_conversation(
-                        user_id=user_id,
-                        message=user_message,
-                        response=memory_response,
-                        conversation_type="memory_query"
-                    )
-                    
-                    # Add to vector store incrementally
-                    self.memory_manager.add_conversation(
-                        user_id=user_id,
-                        conversation_id=conversation.id,
-                        user_message=user_message,
-                        assistant_response=memory_response,
-                        timestamp=conversation.timestamp
-                    )
+                    # Save to database; the vector store is updated in the background
+                    self._persist_turn(user_id, user_message, memory_response,
+                                       conversation_type="memory_query")
                     
                     return {
                         "response": memory_response,
@@ -1192,20 +1459,22 @@ Provide a helpful, conversational response that:
                         "is_emergency": False
                     }
             
-            # Get full context from all memory layers
-            memory_context = self.memory_manager.get_full_context(user_id, user_message)
+            # Get full context from all memory layers and the user info in the
+            # background; both are I/O bound and independent of each other
+            context_future = self._context_executor.submit(
+                self._fetch_context, user_id, user_message)
+            user_future = self._context_executor.submit(self._get_user, user_id, request_cache)
 
-            # Get user info
-            user = UserCRUD.get_user(user_id)
-            user_name = user.name if user else "there"
+            # Scan for every keyword category used by the local analyzers
+            keyword_hits = _scan_keywords(message_lower)
 
             # Use local fallback sentiment analysis (no API call)
-            sentiment_result = self._local_sentiment_analysis(user_message)
+            sentiment_result = self._local_sentiment_analysis(user_message, keyword_hits)
             sentiment_score = sentiment_result.get("score", 0)
             sentiment_label = sentiment_result.get("label", "neutral")
             
             # Use local keyword-based emergency detection (no API call)
-            emergency_result = self._local_emergency_detection(user_message, user_id)
+            emergency_result = self._local_emergency_detection(user_message, user_id, keyword_hits)
             is_emergency = emergency_result.get("is_emergency", False)
             emergency_severity = emergency_result.get("severity", "manageable")
             emergency_concerns = emergency_result.get("concerns", [])
@@ -1216,68 +1485,59 @@ Provide a helpful, conversational response that:
             if is_emergency:
                 emergency_context = "\nIMPORTANT: The user is experiencing emergency symptoms. Provide immediate reassurance and comfort."
 
-            # Decide verbosity level based on user intent
-            verbosity_level = self._decide_verbosity(user_message)
-            
-            # Set parameters based on verbosity
-            if verbosity_level == "SHORT":
-                max_tokens = 220
-                sentence_limit = 4
-            elif verbosity_level == "MEDIUM":
-                max_tokens = 600
-                sentence_limit = 8
-            else:  # LONG
-                max_tokens = 1200
-                sentence_limit = None  # No sentence limit for detailed responses
-            
             # Check for PII in user message BEFORE sending to AI
             detected_pii = PIIRedactor.detect_pii(user_message)
             pii_privacy_notice = generate_safe_response_prompt(detected_pii) if detected_pii else ""
-            
-            # Build the prompt with comprehensive memory context
-            prompt = f"""{memory_context}
-
-User's name: {user_name}
-Conversation type: {conversation_type}
-Current message: {user_message}{emergency_context}
-{pii_privacy_notice}
-
-Please respond as Carely, keeping in mind:
-- The user's profile, medications, and preferences from the context above
-- Recent conversation history and past relevant conversations
-- Daily summaries and patterns
-- Be warm, caring, and supportive
-- If they ask about medications, reference their actual schedule
-- If they ask about past conversations, use the relevant past conversations provided
-- Reference their personal information naturally when relevant
-- If this is an emergency situation, provide immediate reassurance and comfort
-
-Respond naturally and warmly based on ALL the context provided."""
 
-            # Generate response with dynamic max_tokens
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{
-                    "role": "system",
-                    "content": self._get_system_prompt()
-                }, {
-                    "role": "user",
-                    "content": prompt
-                }],
-                temperature=0.3,
-                max_tokens=max_tokens,
-                stop=["\n\n", "\n\n\n"])
+            # The local analysis above ran while the context was being fetched
+            context_sections, query_embedding = context_future.result()
+            user = user_future.result()
+            user_name = user.name if user else "there"
 
-            ai_response = response.choices[0].message.content
-            
-            # Apply dynamic sentence limiting (only for SHORT and MEDIUM)
-            if sentence_limit:
-                ai_response = self._limit_to_sentences(ai_response, max_sentences=sentence_limit)
-            
-            # If emergency, prepend reassurance message
+            # Serve repeated questions from the response cache. Emergencies,
+            # messages containing PII and anything about medication or health
+            # always go to the model and are never cached: their answers depend
+            # on data that changes between turns.
+            cacheable = (not is_emergency and not detected_pii
+                         and intent["type"] not in _UNCACHEABLE_INTENTS
+                         and not keyword_hits.keys() & _UNCACHEABLE_CATEGORIES)
+            # The key covers the recent transcript and the medication log
+            # version, so a new turn or a dose logged from any path (chat,
+            # dashboard, API) moves to a fresh key
+            cache_context = "\n".join([
+                conversation_type, user_name,
+                str(MedicationLogCRUD.get_log_version(user_id)),
+                context_sections["profile"], context_sections["timing"],
+                context_sections["recent"]])
+            # Near-duplicate (semantic) matches only answer context-free small talk
+            small_talk = intent["type"] == "general_chat" and not keyword_hits
+            cached_response = (self.response_cache.lookup(user_id, user_message, cache_context,
+                                                          embedding=query_embedding,
+                                                          semantic=small_talk)
+                               if cacheable else None)
+
+            # If emergency, lead with a reassurance message
+            reassurance = ""
             if is_emergency:
                 reassurance = "I'm here with you. I'm notifying your caregiver now so help can reach you quickly. Try to sit comfortably and focus on slow breaths. You're not alone.\n\n"
-                ai_response = reassurance + ai_response
+                yield reassurance
+
+            if cached_response is not None:
+                ai_response = cached_response
+                yield ai_response
+            else:
+                parts = []
+                for delta in self._stream_llm_reply(
+                        user_message, context_sections, user_name, conversation_type,
+                        emergency_context, pii_privacy_notice):
+                    parts.append(delta)
+                    yield delta
+                ai_response = "".join(parts)
+                if cacheable and ai_response:
+                    self.response_cache.insert(user_id, user_message, cache_context, ai_response,
+                                               embedding=query_embedding, semantic=small_talk)
+
+            ai_response = reassurance + ai_response
 
             # PII/PHI Detection and Redaction before storage
             user_msg_redacted, ai_response_redacted, contains_pii, pii_warning = sanitize_before_storage(
@@ -1288,46 +1548,41 @@ Respond naturally and warmly based on ALL the context provided."""
             ai_response_display = ai_response
             if contains_pii:
                 ai_response_display = ai_response + "\n\n" + pii_warning
-
-            # Save conversation to database with REDACTED versions
-            conversation = ConversationCRUD.save_conversation(
-                user_id=user_id,
-                message=user_msg_redacted,  # Store redacted version
-                response=ai_response_redacted,  # Store redacted version
+                yield "\n\n" + pii_warning
+
+            # Save conversation to database (REDACTED versions); adding it to
+            # the vector store happens in the background
+            conversation_id = self._persist_turn(
+                user_id, user_message, ai_response,
+                stored_message=user_msg_redacted,  # Store redacted version
+                stored_response=ai_response_redacted,  # Store redacted version
                 sentiment_score=sentiment_score,
                 sentiment_label=sentiment_label,
                 conversation_type=conversation_type)
-            
-            # Add conversation to vector store incrementally
-            self.memory_manager.add_conversation(
-                user_id=user_id,
-                conversation_id=conversation.id,
-                user_message=user_message,
-                assistant_response=ai_response,
-                timestamp=conversation.timestamp
-            )
 
             # Check if caregiver alert is needed
             alert_sent = False
             if self.should_alert_caregiver(user_id, sentiment_score,
-                                           user_message):
+                                           user_message, keyword_hits):
                 self.alert_caregiver_tool(
                     user_id=user_id,
                     alert_type="mood_concern",
                     description=
                     f"User expressed concerning sentiment: '{user_message}' (sentiment: {sentiment_label})",
-                    severity="medium" if sentiment_score > -0.8 else "high")
+                    severity="medium" if sentiment_score > -0.8 else "high",
+                    request_cache=request_cache)
                 alert_sent = True
 
             # Determine quick action buttons (2-3 relevant buttons)
-            quick_actions = self.determine_quick_actions(user_message, user_id)
+            quick_actions = self.determine_quick_actions(user_message, user_id, keyword_hits,
+                                                         request_cache)
             
             return {
                 "response": ai_response_display,  # Return display version with PII warning
                 "sentiment_score": sentiment_score,
                 "sentiment_label": sentiment_label,
                 "alert_sent": alert_sent,
-                "conversation_id": conversation.id,
+                "conversation_id": conversation_id,
                 "is_emergency": is_emergency,
                 "emergency_severity": emergency_severity,
                 "emergency_concerns": emergency_concerns,
@@ -1340,7 +1595,6 @@ Respond naturally and warmly based on ALL the context provided."""
             # Check if it's a rate limit error
             error_str = str(e)
             print(f"ERROR in generate_response: {error_str}")  # Debug logging
-            import traceback
             traceback.print_exc()  # Print full traceback
             
             if "429" in error_str or "rate" in error_str.lower():
@@ -1370,16 +1624,8 @@ Respond naturally and warmly based on ALL the context provided."""
         user = UserCRUD.get_user(user_id)
         user_name = user.name if user else "there"
 
-        checkin_prompts = {
-            "morning":
-            f"Good morning, {user_name}! I hope you slept well. How are you feeling this morning? Did you take your morning medications?",
-            "afternoon":
-            f"Good afternoon, {user_name}! How has your day been so far? Are you feeling alright?",
-            "evening":
-            f"Good evening, {user_name}! How was your day? Did you remember to take all your medications today?"
-        }
-
-        prompt = checkin_prompts.get(checkin_type, checkin_prompts["morning"])
+        template = _CHECKIN_TEMPLATES.get(checkin_type, _CHECKIN_TEMPLATES["morning"])
+        prompt = template.format(name=user_name)
 
         # For check-ins, we don't wait for user response - we just send the prompt
         # The user can respond through the normal chat interface
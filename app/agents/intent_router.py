@@ -0,0 +1,97 @@
+"""
+Deterministic intent routing for the companion agent
+Classifies a message for the no-LLM handlers in one keyword scan
+"""
+
+from enum import IntFlag
+from typing import NamedTuple
+
+from utils.keyword_scanner import KeywordScanner
+
+
+class Intent(IntFlag):
+    """Deterministic intents, lower bits take priority"""
+    NONE = 0
+    MED_TIMING = 1
+    DATETIME_QUERY = 2
+    DATE_QUERY = 4
+    TIME_QUERY = 8
+    YESTERDAY_SUMMARY = 16
+    EVENT_LOOKUP = 32
+    MEMORY_QUERY = 64
+
+
+class RouteMatch(NamedTuple):
+    """Result of classifying a message"""
+    intent: Intent  # Highest-priority intent (Intent.NONE if nothing matched)
+    intents: Intent  # Every intent that matched
+
+
+# Routing phrases; matching is by substring, as with the original `in` checks
+EVENT_MENTION_KEYWORDS = ('meeting', 'appointment', 'doctor', 'event', 'visit')
+
+_ROUTING_PHRASES = {
+    "med_timing": [
+        'when should i take', 'next medication', 'next dose', 'meds due', 'medication due',
+        'what time are my meds', 'when is my medication', 'medication schedule',
+        'next pill', 'when do i take'],
+    "time": [
+        'time now', 'current time', 'what\'s the time', 'tell me the time', 'time is it',
+        'what is the time', 'what time is', 'what\'s time'],
+    "date": [
+        'what is the date', 'what\'s the date', 'what date', 'what day is it', 'what\'s the day',
+        'what is the day', 'date today', 'day today', 'today\'s date'],
+    "datetime": [
+        'day, time and date', 'date and time', 'time and date', 'day and time',
+        'time, date', 'date, time'],
+    "med_word": ['med', 'pill', 'dose'],  # 'med' also covers 'medication'
+    "what_time_is_it": ['what time is it', 'what time it is'],
+    "yesterday": ['yesterday', 'day before yesterday', 'two days ago'],
+    "talk": [
+        'talk', 'discuss', 'chat', 'conversation', 'tell me about', 'what did',
+        'what happened', 'summary', 'recap'],
+    "event_mention": list(EVENT_MENTION_KEYWORDS),
+    "event_question": ['when', 'what time', 'where', 'remind'],
+    "memory": [
+        'remember', 'talked about', 'medication schedule', 'breakfast', 'lunch', 'dinner',
+        'meal', 'yesterday', 'summary', 'discussed'],
+}
+
+
+class IntentRouter:
+    """Maps a lowercased message to its deterministic routing intents"""
+
+    def __init__(self):
+        self._scanner = KeywordScanner(_ROUTING_PHRASES, whole_words=False)
+
+    def classify(self, message_lower: str) -> RouteMatch:
+        """
+        Classify a message with a single scan over all routing phrases
+
+        Args:
+            message_lower: Lowercased user message
+
+        Returns:
+            RouteMatch with the highest-priority intent and all matched intents
+        """
+        hits = self._scanner.scan(message_lower)
+        intents = Intent.NONE
+
+        if "med_timing" in hits:
+            intents |= Intent.MED_TIMING
+        if "datetime" in hits:
+            intents |= Intent.DATETIME_QUERY
+        if "date" in hits:
+            intents |= Intent.DATE_QUERY
+        # Time questions about meds/pills/doses belong to the medication handlers
+        if ("time" in hits and "med_word" not in hits) or "what_time_is_it" in hits:
+            intents |= Intent.TIME_QUERY
+        if "yesterday" in hits and "talk" in hits:
+            intents |= Intent.YESTERDAY_SUMMARY
+        if "event_mention" in hits and "event_question" in hits:
+            intents |= Intent.EVENT_LOOKUP
+        if "memory" in hits:
+            intents |= Intent.MEMORY_QUERY
+
+        # Lowest set bit is the highest-priority intent
+        return RouteMatch(Intent(intents & -intents), intents)
@@ -0,0 +1,184 @@
+"""
+Two-tier response cache for the companion agent
+Exact-match lookups on a hashed key, backed by an optional semantic
+nearest-neighbour tier over message embeddings
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Caches LLM replies per user, keyed by message and memory context"""
+
+    def __init__(self,
+                 embed_fn: Optional[Callable[[List[str]], List]] = None,
+                 threshold: float = 0.92,
+                 ttl_seconds: int = 600,
+                 max_entries_per_user: int = 64):
+        """
+        Initialize the cache
+
+        Args:
+            embed_fn: Callable mapping a list of texts to embedding vectors;
+                the semantic tier is disabled when None
+            threshold: Minimum cosine similarity for a semantic hit
+            ttl_seconds: How long an entry stays valid
+            max_entries_per_user: Entries kept per user before evicting the oldest
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_user = max_entries_per_user
+        self._entries: Dict[int, "OrderedDict[str, Dict]"] = {}
+        self._versions: Dict[int, int] = {}
+        # Per user and context hash: (entries with an embedding, their unit
+        # vectors stacked into one matrix). A lookup only visits entries that
+        # share its context, like a posting list; a bucket is built on demand
+        # and dropped whenever one of its entries changes
+        self._matrices: Dict[int, Dict[str, Tuple[List[Dict], np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(message: str) -> str:
+        """Lowercase and collapse whitespace"""
+        return " ".join(message.lower().split())
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _embed(self, text: str, embedding: Optional[List[float]] = None) -> Optional[np.ndarray]:
+        """Embed (unless an embedding is given) and L2-normalize a message, or None if unavailable"""
+        if embedding is None and self.embed_fn is None:
+            return None
+        try:
+            if embedding is None:
+                embedding = self.embed_fn([text])[0]
+                if embedding is None:
+                    return None
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else None
+        except Exception as e:
+            logger.warning(f"Response cache embedding failed: {e}")
+            return None
+
+    def lookup(self, user_id: int, message: str, memory_context: str,
+               embedding: Optional[List[float]] = None,
+               semantic: bool = True) -> Optional[str]:
+        """
+        Return a cached response for this message and context, if any
+
+        Args:
+            user_id: User ID
+            message: Raw user message
+            memory_context: Context string the response would be generated from
+            embedding: Precomputed embedding of the message (skips embed_fn)
+            semantic: Also accept a near-duplicate message (semantic tier);
+                when False only an exact message match is returned
+
+        Returns:
+            Cached response text or None on a miss
+        """
+        normalized = self._normalize(message)
+        context_hash = self._digest(memory_context)
+
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+            entries = self._entries.get(user_id)
+            if not entries:
+                return None
+
+            # Drop expired entries (oldest first)
+            cutoff = time.monotonic() - self.ttl_seconds
+            while entries and next(iter(entries.values()))["created"] < cutoff:
+                _, expired = entries.popitem(last=False)
+                self._drop_bucket(user_id, expired["context_hash"])
+
+            key = self._digest(f"{user_id}|{version}|{context_hash}|{normalized}")
+            entry = entries.get(key)
+            if entry:
+                return entry["response"]
+            if not semantic:
+                return None
+
+            buckets = self._matrices.setdefault(user_id, {})
+            stacked = buckets.get(context_hash)
+            if stacked is None:
+                embedded = [e for e in entries.values()
+                            if e["context_hash"] == context_hash
+                            and e["version"] == version
+                            and e["embedding"] is not None]
+                if not embedded:
+                    return None
+                stacked = (embedded, np.stack([e["embedding"] for e in embedded]))
+                buckets[context_hash] = stacked
+
+        candidates, matrix = stacked
+        query_vector = self._embed(normalized, embedding)
+        if query_vector is None:
+            return None
+
+        # Stored vectors are unit length, so cosine similarity is a plain dot product
+        similarities = matrix @ query_vector
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return candidates[best]["response"]
+        return None
+
+    def insert(self, user_id: int, message: str, memory_context: str, response: str,
+               embedding: Optional[List[float]] = None, semantic: bool = True) -> None:
+        """
+        Store a generated response
+
+        Args:
+            user_id: User ID
+            message: Raw user message
+            memory_context: Context string the response was generated from
+            response: Response text to cache
+            embedding: Precomputed embedding of the message (skips embed_fn)
+            semantic: Make the entry available to the semantic tier; when
+                False it only answers the exact same message
+        """
+        normalized = self._normalize(message)
+        context_hash = self._digest(memory_context)
+        embedding = self._embed(normalized, embedding) if semantic else None
+
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+            key = self._digest(f"{user_id}|{version}|{context_hash}|{normalized}")
+            entries = self._entries.setdefault(user_id, OrderedDict())
+            entries.pop(key, None)
+            self._drop_bucket(user_id, context_hash)
+            entries[key] = {
+                "response": response,
+                "context_hash": context_hash,
+                "version": version,
+                "embedding": embedding,
+                "created": time.monotonic()
+            }
+            while len(entries) > self.max_entries_per_user:
+                _, evicted = entries.popitem(last=False)
+                self._drop_bucket(user_id, evicted["context_hash"])
+
+    def _drop_bucket(self, user_id: int, context_hash: str) -> None:
+        """Forget the stacked matrix for one user/context (call with the lock held)"""
+        buckets = self._matrices.get(user_id)
+        if buckets:
+            buckets.pop(context_hash, None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Invalidate all cached responses for a user (e.g. after a data write)"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+            self._matrices.pop(user_id, None)
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException, Depends, Path, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 from typing import List, Optional, Dict, Any
@@ -7,7 +8,7 @@ from zoneinfo import ZoneInfo
 import json
 import logging
 
-from app.database.models import get_session, Session
+from app.database.models import get_session, session_scope, Session
 from app.database.crud import (
     UserCRUD, MedicationCRUD, ConversationCRUD, ReminderCRUD,
     MedicationLogCRUD, CaregiverAlertCRUD, PersonalEventCRUD
@@ -29,6 +30,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class RequestSessionMiddleware:
+    """Share one database session across all CRUD calls made while serving a request"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Plain ASGI middleware, so the scope also covers streamed response bodies
+        with session_scope():
+            await self.app(scope, receive, send)
+
+app.add_middleware(RequestSessionMiddleware)
+
 # Initialize companion agent
 companion_agent = CompanionAgent()
 
@@ -130,6 +147,22 @@ async def chat_with_companion(message: ChatMessage):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/stream")
+def stream_chat_with_companion(message: ChatMessage):
+    """Chat with the AI companion, streaming the reply as server-sent events"""
+    stream = companion_agent.generate_response_stream(
+        user_id=message.user_id,
+        user_message=message.message,
+        conversation_type=message.conversation_type
+    )
+
+    def events():
+        for delta in stream:
+            yield f"data: {json.dumps({'delta': delta})}\n\n"
+        yield f"event: done\ndata: {json.dumps(stream.result, default=str)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.get("/chat/history/{user_id}")
 async def get_chat_history(user_id: int, limit: int = 50):
     """Get chat history for a user"""
@@ -181,7 +214,7 @@ async def get_user_medications(user_id: int):
                     "name": m.name,
                     "dosage": m.dosage,
                     "frequency": m.frequency,
-                    "schedule_times": json.loads(m.schedule_times) if m.schedule_times else [],
+                    "schedule_times": m.schedule_times_list,
                     "instructions": m.instructions,
                     "active": m.active
                 }
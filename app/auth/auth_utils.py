@@ -1,9 +1,13 @@
 import hashlib
+import hmac
 import secrets
 from typing import Optional
 from app.database.models import User, get_session
 from sqlmodel import select
 
+# PBKDF2 work factor (OWASP recommended minimum for PBKDF2-SHA256)
+PBKDF2_ITERATIONS = 100000
+
 def hash_password(password: str) -> str:
     """
     Hash a password using PBKDF2-SHA256 with salt
@@ -11,8 +15,7 @@ def hash_password(password: str) -> str:
     """
     # Generate a random salt
     salt = secrets.token_hex(32)
-    # Use PBKDF2 with 100000 iterations (OWASP recommended minimum)
-    pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
+    pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), PBKDF2_ITERATIONS)
     return f"{salt}${pwd_hash.hex()}"
 
 def verify_password(password: str, password_hash: str) -> bool:
@@ -21,12 +24,12 @@ def verify_password(password: str, password_hash: str) -> bool:
         # Handle legacy SHA-256 hashes (backwards compatibility)
         if '$' not in password_hash:
             # Legacy format - still verify but should be migrated
-            return hashlib.sha256(password.encode()).hexdigest() == password_hash
+            return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), password_hash)
         
         # New format: salt$hash
         salt, stored_hash = password_hash.split('$')
-        pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
-        return pwd_hash.hex() == stored_hash
+        pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), PBKDF2_ITERATIONS)
+        return hmac.compare_digest(pwd_hash.hex(), stored_hash)
     except Exception:
         return False
 
@@ -37,6 +40,13 @@ def authenticate_user(email: str, password: str) -> Optional[User]:
         user = session.exec(query).first()
         
         if user and user.password_hash and verify_password(password, user.password_hash):
+            # Upgrade legacy unsalted SHA-256 hashes now that we have the plaintext
+            if '$' not in user.password_hash:
+                user.password_hash = hash_password(password)
+                session.add(user)
+                session.commit()
+                from app.database.crud import UserCRUD
+                UserCRUD.invalidate_user(user.id)
             return user
         return None
 
@@ -1,24 +1,56 @@
 from sqlmodel import Session, select
+from sqlalchemy import exists, func, update
 from datetime import datetime, timedelta
 from utils.timezone_utils import now_central, start_of_day_central
-from typing import List, Optional, Dict, Any
-import json
+from collections import Counter
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
+import itertools
 import logging
 from app.database.models import (
-    get_session, User, Medication, Conversation, Reminder, 
+    get_session, session_scope, User, Medication, Conversation, Reminder, 
     MedicationLog, CaregiverAlert, CaregiverPatientAssignment, PersonalEvent
 )
+from utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+def _update_by_id(model, row_id: int, values: Dict[str, Any]):
+    """Update one row by primary key with a single UPDATE ... RETURNING; returns the row or None"""
+    with session_scope() as session:
+        stmt = update(model).where(model.id == row_id).values(**values).returning(model)
+        row = session.scalars(stmt).first()
+        session.commit()
+        return row
+
+# Users and medication lists are read on every chat turn but rarely change.
+# Cached for a few minutes; writes through this module invalidate them.
+# Rows for the process-wide caches below are loaded in a short-lived session of
+# their own, not the shared per-request one: closing it leaves them detached,
+# so a rollback in some request's session can't expire instances that other
+# threads are still reading from the cache.
+_user_cache = TTLCache(maxsize=1024, ttl=300)
+# The full user list backs the dashboard sidebar, user management and the
+# scheduler's per-user jobs; kept briefly, and dropped on user writes here
+_all_users_cache = TTLCache(maxsize=1, ttl=30)
+_medication_cache = TTLCache(maxsize=1024, ttl=300)  # key: (user_id, active_only)
+# Upcoming events feed the prompt profile on every turn. Kept briefly, since
+# the window also moves with the clock; event writes here invalidate them by
+# moving the user to a fresh version, so stale keys are never read again.
+_upcoming_event_cache = TTLCache(maxsize=1024, ttl=60)  # key: (user_id, version, days)
+_event_versions: Dict[int, int] = {}
+_event_version_counter = itertools.count(1)
+# Per-user version of the medication log, moved on every log write here so
+# caches built on log data (e.g. the agent's response cache) can key on it
+_medication_log_versions: Dict[int, int] = {}
+_medication_log_version_counter = itertools.count(1)
+
 class UserCRUD:
     @staticmethod
     def create_user(name: str, email: str = None, phone: str = None, 
                    preferences: dict = None, emergency_contact: str = None,
                    user_type: str = "patient", password: str = None) -> User:
         """Create a new user"""
-        with get_session() as session:
-            preferences_json = json.dumps(preferences) if preferences else None
+        with session_scope() as session:
             password_hash = None
             if password:
                 from app.auth.auth_utils import hash_password
@@ -28,68 +60,141 @@ class UserCRUD:
                 name=name,
                 email=email,
                 phone=phone,
-                preferences=preferences_json,
+                preferences=preferences or None,
                 emergency_contact=emergency_contact,
                 user_type=user_type,
                 password_hash=password_hash
             )
             session.add(user)
             session.commit()
-            session.refresh(user)
-            return user
+        _all_users_cache.clear()
+        return user
     
     @staticmethod
     def get_user(user_id: int) -> Optional[User]:
-        """Get user by ID"""
+        """Get user by ID (cached for a few minutes)"""
+        user = _user_cache.get(user_id)
+        if user is not None:
+            return user
         with get_session() as session:
-            return session.get(User, user_id)
+            user = session.get(User, user_id)
+        if user is not None:
+            _user_cache.set(user_id, user)
+        return user
+    
+    @staticmethod
+    def invalidate_user(user_id: int) -> None:
+        """Drop the cached user row (call after writing to it outside this module)"""
+        _user_cache.pop(user_id)
+        _all_users_cache.clear()
     
     @staticmethod
     def get_all_users() -> List[User]:
-        """Get all users"""
-        with get_session() as session:
-            return session.exec(select(User)).all()
+        """Get all users (cached for a few seconds)"""
+        users = _all_users_cache.get("all")
+        if users is None:
+            with get_session() as session:
+                users = session.exec(select(User)).all()
+            _all_users_cache.set("all", users)
+        # Callers get their own list; the cached one is never mutated
+        return list(users)
+    
+    @staticmethod
+    def get_dashboard_stats() -> Dict[int, Dict[str, Any]]:
+        """Get per-user counts for the user-management page in three grouped queries
+        
+        Returns {user_id: {"medication_count", "last_conversation",
+        "unresolved_alerts"}}; users with no medications, conversations or
+        open alerts are omitted.
+        """
+        with session_scope() as session:
+            medication_counts = dict(session.exec(
+                select(Medication.user_id, func.count())
+                .where(Medication.active == True)
+                .group_by(Medication.user_id)).all())
+            last_conversations = dict(session.exec(
+                select(Conversation.user_id, func.max(Conversation.timestamp))
+                .group_by(Conversation.user_id)).all())
+            alert_counts = dict(session.exec(
+                select(CaregiverAlert.user_id, func.count())
+                .where(CaregiverAlert.resolved == False)
+                .group_by(CaregiverAlert.user_id)).all())
+        
+        user_ids = medication_counts.keys() | last_conversations.keys() | alert_counts.keys()
+        return {
+            user_id: {
+                "medication_count": medication_counts.get(user_id, 0),
+                "last_conversation": last_conversations.get(user_id),
+                "unresolved_alerts": alert_counts.get(user_id, 0),
+            }
+            for user_id in user_ids
+        }
 
 class MedicationCRUD:
     @staticmethod
     def create_medication(user_id: int, name: str, dosage: str, frequency: str,
                          schedule_times: List[str], instructions: str = None) -> Medication:
         """Create a new medication"""
-        with get_session() as session:
+        with session_scope() as session:
             medication = Medication(
                 user_id=user_id,
                 name=name,
                 dosage=dosage,
                 frequency=frequency,
-                schedule_times=json.dumps(schedule_times),
+                schedule_times=list(schedule_times),
                 instructions=instructions
             )
             session.add(medication)
             session.commit()
-            session.refresh(medication)
-            return medication
+        MedicationCRUD.invalidate_user_medications(user_id)
+        return medication
     
     @staticmethod
     def get_user_medications(user_id: int, active_only: bool = True) -> List[Medication]:
-        """Get all medications for a user"""
-        with get_session() as session:
-            query = select(Medication).where(Medication.user_id == user_id)
-            if active_only:
-                query = query.where(Medication.active == True)
+        """Get all medications for a user (cached for a few minutes)"""
+        cache_key = (user_id, active_only)
+        medications = _medication_cache.get(cache_key)
+        if medications is None:
+            with get_session() as session:
+                query = select(Medication).where(Medication.user_id == user_id)
+                if active_only:
+                    query = query.where(Medication.active == True)
+                medications = session.exec(query).all()
+            _medication_cache.set(cache_key, medications)
+        # Callers get their own list; the cached one is never mutated
+        return list(medications)
+    
+    @staticmethod
+    def get_medication(medication_id: int) -> Optional[Medication]:
+        """Get medication by ID"""
+        with session_scope() as session:
+            return session.get(Medication, medication_id)
+    
+    @staticmethod
+    def get_active_medications() -> List[Medication]:
+        """Get every user's active medications in one query, ordered by user"""
+        with session_scope() as session:
+            query = select(Medication).where(
+                Medication.active == True
+            ).order_by(Medication.user_id, Medication.id)
             return session.exec(query).all()
     
     @staticmethod
     def update_medication(medication_id: int, **kwargs) -> Optional[Medication]:
         """Update medication"""
-        with get_session() as session:
-            medication = session.get(Medication, medication_id)
-            if medication:
-                for key, value in kwargs.items():
-                    setattr(medication, key, value)
-                session.add(medication)
-                session.commit()
-                session.refresh(medication)
-            return medication
+        if not kwargs:
+            with session_scope() as session:
+                return session.get(Medication, medication_id)
+        medication = _update_by_id(Medication, medication_id, kwargs)
+        if medication:
+            MedicationCRUD.invalidate_user_medications(medication.user_id)
+        return medication
+    
+    @staticmethod
+    def invalidate_user_medications(user_id: int) -> None:
+        """Drop a user's cached medication lists"""
+        for active_only in (True, False):
+            _medication_cache.pop((user_id, active_only))
 
 class ConversationCRUD:
     @staticmethod
@@ -97,7 +202,7 @@ class ConversationCRUD:
                          sentiment_score: float = None, sentiment_label: str = None,
                          conversation_type: str = "general") -> Conversation:
         """Save a conversation"""
-        with get_session() as session:
+        with session_scope() as session:
             conversation = Conversation(
                 user_id=user_id,
                 message=message,
@@ -108,36 +213,144 @@ class ConversationCRUD:
             )
             session.add(conversation)
             session.commit()
-            session.refresh(conversation)
             return conversation
     
     @staticmethod
-    def get_user_conversations(user_id: int, limit: int = 50) -> List[Conversation]:
-        """Get recent conversations for a user"""
-        with get_session() as session:
-            query = select(Conversation).where(
+    def get_user_conversations(user_id: int, limit: int = 50,
+                               since: datetime = None) -> List[Conversation]:
+        """Get recent conversations for a user, optionally only those at or after `since`"""
+        with session_scope() as session:
+            query = select(Conversation).where(Conversation.user_id == user_id)
+            if since is not None:
+                query = query.where(Conversation.timestamp >= since)
+            query = query.order_by(Conversation.timestamp.desc()).limit(limit)
+            return session.exec(query).all()
+    
+    @staticmethod
+    def get_recent_exchanges(user_id: int, limit: int = 10) -> List[Any]:
+        """Get a user's latest (message, response, timestamp) rows, newest first
+        
+        Only the three columns are read; rows support attribute access
+        (row.message) like the full Conversation objects.
+        """
+        with session_scope() as session:
+            query = select(
+                Conversation.message, Conversation.response, Conversation.timestamp
+            ).where(
                 Conversation.user_id == user_id
             ).order_by(Conversation.timestamp.desc()).limit(limit)
             return session.exec(query).all()
     
     @staticmethod
-    def get_recent_sentiment_data(user_id: int, days: int = 7) -> List[Conversation]:
-        """Get recent conversations with sentiment data"""
+    def iter_user_conversations(user_id: int, limit: int = 50, chunk_size: int = 64,
+                                after_id: int = 0) -> Iterator[Conversation]:
+        """Stream a user's recent conversations with id greater than after_id (newest first),
+        fetching chunk_size rows at a time"""
+        # Own session: a suspended generator must not hold the context's shared one
         with get_session() as session:
-            cutoff_date = now_central() - timedelta(days=days)
             query = select(Conversation).where(
+                Conversation.user_id == user_id,
+                Conversation.id > after_id
+            ).order_by(Conversation.timestamp.desc()).limit(limit).execution_options(yield_per=chunk_size)
+            yield from session.exec(query)
+    
+    @staticmethod
+    def get_conversations_after(user_id: int, after_id: int = 0, limit: int = 50) -> List[Conversation]:
+        """Get a user's newest conversations with id greater than after_id (newest first)"""
+        with session_scope() as session:
+            query = select(Conversation).where(
+                Conversation.user_id == user_id,
+                Conversation.id > after_id
+            ).order_by(Conversation.id.desc()).limit(limit)
+            return session.exec(query).all()
+    
+    @staticmethod
+    def count_user_conversations(user_id: int, limit: int = None) -> int:
+        """Count a user's conversations, stopping at `limit` rows if given"""
+        with session_scope() as session:
+            rows = select(Conversation.id).where(Conversation.user_id == user_id)
+            if limit is not None:
+                rows = rows.limit(limit)
+            return session.exec(select(func.count()).select_from(rows.subquery())).one()
+    
+    @staticmethod
+    def get_recent_sentiment_data(user_id: int, days: int = 7,
+                                  limit: Optional[int] = None) -> List[Any]:
+        """Get recent (timestamp, sentiment_score, sentiment_label) rows, newest first
+        (at most `limit`)
+        
+        Only the three columns are read, not the message and response text;
+        rows support attribute access (row.sentiment_score).
+        """
+        with session_scope() as session:
+            cutoff_date = now_central() - timedelta(days=days)
+            query = select(
+                Conversation.timestamp, Conversation.sentiment_score, Conversation.sentiment_label
+            ).where(
                 Conversation.user_id == user_id,
                 Conversation.timestamp >= cutoff_date,
                 Conversation.sentiment_score.isnot(None)
             ).order_by(Conversation.timestamp.desc())
+            if limit is not None:
+                query = query.limit(limit)
             return session.exec(query).all()
+    
+    @staticmethod
+    def get_recent_mood_average(user_id: int, days: int = 7, limit: int = 7) -> Optional[float]:
+        """Average sentiment of the latest `limit` scored conversations in the window
+        
+        Computed in SQL over a LIMIT subquery; None if there are no scores.
+        """
+        cutoff_date = now_central() - timedelta(days=days)
+        with session_scope() as session:
+            latest = select(Conversation.sentiment_score).where(
+                Conversation.user_id == user_id,
+                Conversation.timestamp >= cutoff_date,
+                Conversation.sentiment_score.isnot(None)
+            ).order_by(Conversation.timestamp.desc()).limit(limit).subquery()
+            return session.exec(select(func.avg(latest.c.sentiment_score))).one()
+    
+    @staticmethod
+    def get_daily_mood(user_id: int, days: int = 7) -> List[Tuple[str, float, int]]:
+        """Get (date, average sentiment, scored conversation count) per day, oldest first
+        
+        Aggregated in SQL; timestamps are stored in Central Time, so the
+        date is the Central calendar day ("YYYY-MM-DD").
+        """
+        cutoff_date = now_central() - timedelta(days=days)
+        day = func.date(Conversation.timestamp)
+        with session_scope() as session:
+            query = select(
+                day, func.avg(Conversation.sentiment_score), func.count()
+            ).where(
+                Conversation.user_id == user_id,
+                Conversation.timestamp >= cutoff_date,
+                Conversation.sentiment_score.isnot(None)
+            ).group_by(day).order_by(day)
+            return [tuple(row) for row in session.exec(query).all()]
+    
+    @staticmethod
+    def get_sentiment_stats_all_users(days: int = 7, now: datetime = None) -> Dict[int, tuple]:
+        """Get (average sentiment, scored conversation count) per user in one grouped query
+        
+        Users with no scored conversations in the window are omitted.
+        """
+        cutoff_date = (now or now_central()) - timedelta(days=days)
+        with session_scope() as session:
+            query = select(
+                Conversation.user_id, func.avg(Conversation.sentiment_score), func.count()
+            ).where(
+                Conversation.timestamp >= cutoff_date,
+                Conversation.sentiment_score.isnot(None)
+            ).group_by(Conversation.user_id)
+            return {user_id: (avg, count) for user_id, avg, count in session.exec(query).all()}
 
 class ReminderCRUD:
     @staticmethod
     def create_reminder(user_id: int, reminder_type: str, title: str, message: str,
                        scheduled_time: datetime, medication_id: int = None) -> Reminder:
         """Create a new reminder"""
-        with get_session() as session:
+        with session_scope() as session:
             reminder = Reminder(
                 user_id=user_id,
                 reminder_type=reminder_type,
@@ -148,33 +361,63 @@ class ReminderCRUD:
             )
             session.add(reminder)
             session.commit()
-            session.refresh(reminder)
             return reminder
     
     @staticmethod
-    def get_pending_reminders(user_id: int = None) -> List[Reminder]:
-        """Get pending reminders"""
-        with get_session() as session:
+    def create_reminders(reminders: List[Dict[str, Any]]) -> List[Reminder]:
+        """Create several reminders in one transaction
+        
+        Each entry takes the create_reminder() keyword arguments.
+        """
+        with session_scope() as session:
+            objs = [
+                Reminder(
+                    user_id=entry["user_id"],
+                    reminder_type=entry["reminder_type"],
+                    title=entry["title"],
+                    message=entry["message"],
+                    scheduled_time=entry["scheduled_time"],
+                    medication_id=entry.get("medication_id")
+                )
+                for entry in reminders
+            ]
+            session.add_all(objs)
+            session.commit()
+            return objs
+    
+    @staticmethod
+    def get_pending_reminders(user_id: int = None,
+                              exclude_ids: Optional[Iterable[int]] = None) -> List[Reminder]:
+        """Get pending reminders, skipping any whose id is in exclude_ids"""
+        with session_scope() as session:
             query = select(Reminder).where(
                 Reminder.completed == False,
                 Reminder.scheduled_time <= now_central()
             )
             if user_id:
                 query = query.where(Reminder.user_id == user_id)
+            if exclude_ids:
+                query = query.where(Reminder.id.notin_(list(exclude_ids)))
             return session.exec(query).all()
     
     @staticmethod
     def complete_reminder(reminder_id: int) -> Optional[Reminder]:
         """Mark reminder as completed"""
-        with get_session() as session:
-            reminder = session.get(Reminder, reminder_id)
-            if reminder:
-                reminder.completed = True
-                reminder.completed_at = now_central()
-                session.add(reminder)
-                session.commit()
-                session.refresh(reminder)
-            return reminder
+        return _update_by_id(Reminder, reminder_id,
+                             {"completed": True, "completed_at": now_central()})
+    
+    @staticmethod
+    def complete_reminders(reminder_ids: Iterable[int]) -> int:
+        """Mark several reminders as completed in one UPDATE; returns the number updated"""
+        reminder_ids = list(reminder_ids)
+        if not reminder_ids:
+            return 0
+        with session_scope() as session:
+            stmt = update(Reminder).where(Reminder.id.in_(reminder_ids)).values(
+                completed=True, completed_at=now_central())
+            result = session.execute(stmt)
+            session.commit()
+            return result.rowcount
 
 class MedicationLogCRUD:
     @staticmethod
@@ -182,7 +425,7 @@ class MedicationLogCRUD:
                            taken_time: datetime = None, status: str = "taken",
                            notes: str = None) -> MedicationLog:
         """Log medication intake"""
-        with get_session() as session:
+        with session_scope() as session:
             log = MedicationLog(
                 user_id=user_id,
                 medication_id=medication_id,
@@ -193,50 +436,160 @@ class MedicationLogCRUD:
             )
             session.add(log)
             session.commit()
-            session.refresh(log)
-            return log
+        MedicationLogCRUD.invalidate_logs(user_id)
+        return log
     
     @staticmethod
-    def get_medication_adherence(user_id: int, days: int = 7) -> dict:
-        """Get medication adherence statistics"""
-        with get_session() as session:
-            cutoff_date = now_central() - timedelta(days=days)
+    def log_medications_taken(entries: List[Dict[str, Any]]) -> List[MedicationLog]:
+        """Log several medication intakes in one transaction
+        
+        Each entry takes the log_medication_taken() keyword arguments.
+        """
+        with session_scope() as session:
+            logs = [
+                MedicationLog(
+                    user_id=entry["user_id"],
+                    medication_id=entry["medication_id"],
+                    scheduled_time=entry["scheduled_time"],
+                    taken_time=entry.get("taken_time") or now_central(),
+                    status=entry.get("status", "taken"),
+                    notes=entry.get("notes")
+                )
+                for entry in entries
+            ]
+            session.add_all(logs)
+            session.commit()
+        for user_id in {entry["user_id"] for entry in entries}:
+            MedicationLogCRUD.invalidate_logs(user_id)
+        return logs
+    
+    @staticmethod
+    def get_log_version(user_id: int) -> int:
+        """Version of a user's medication log; changes whenever a log is written"""
+        return _medication_log_versions.get(user_id, 0)
+    
+    @staticmethod
+    def invalidate_logs(user_id: int) -> None:
+        """Move a user's medication log to a fresh version (call after writing logs outside this module)"""
+        _medication_log_versions[user_id] = next(_medication_log_version_counter)
+    
+    @staticmethod
+    def get_medication_adherence(user_id: int, days: int = 7, include_logs: bool = True,
+                                 now: datetime = None,
+                                 logs: Optional[List[MedicationLog]] = None) -> dict:
+        """Get medication adherence statistics
+        
+        Counts are aggregated in SQL; the individual log rows are only
+        loaded when include_logs is True. Pass `now` to reuse one
+        timestamp across many users, or `logs` (get_medication_logs()
+        for the same window) to count already-loaded rows without querying.
+        """
+        if logs is not None:
+            adherence = MedicationLogCRUD._adherence_stats(Counter(log.status for log in logs))
+            adherence["logs"] = logs if include_logs else []
+            return adherence
+        
+        now = now or now_central()
+        cutoff_date = now - timedelta(days=days)
+        with session_scope() as session:
+            query = select(MedicationLog.status, func.count()).where(
+                MedicationLog.user_id == user_id,
+                MedicationLog.scheduled_time >= cutoff_date
+            ).group_by(MedicationLog.status)
+            counts = dict(session.exec(query).all())
+        
+        adherence = MedicationLogCRUD._adherence_stats(counts)
+        adherence["logs"] = MedicationLogCRUD.get_medication_logs(user_id, days, now=now) if include_logs else []
+        return adherence
+    
+    @staticmethod
+    def get_adherence_all_users(days: int = 7, now: datetime = None) -> Dict[int, dict]:
+        """Get medication adherence statistics for every user in one grouped query
+        
+        Returns a dict keyed by user ID with the get_medication_adherence()
+        counts (without logs); users with no logs in the window are omitted.
+        """
+        cutoff_date = (now or now_central()) - timedelta(days=days)
+        with session_scope() as session:
+            query = select(MedicationLog.user_id, MedicationLog.status, func.count()).where(
+                MedicationLog.scheduled_time >= cutoff_date
+            ).group_by(MedicationLog.user_id, MedicationLog.status)
+            rows = session.exec(query).all()
+        
+        counts_by_user: Dict[int, Dict[str, int]] = {}
+        for user_id, status, count in rows:
+            counts_by_user.setdefault(user_id, {})[status] = count
+        return {user_id: MedicationLogCRUD._adherence_stats(counts)
+                for user_id, counts in counts_by_user.items()}
+    
+    @staticmethod
+    def count_recent_missed_all_users(hours: int = 2, now: datetime = None) -> Dict[int, int]:
+        """Count missed doses scheduled within the last N hours, per user, in one query"""
+        cutoff = (now or now_central()) - timedelta(hours=hours)
+        with session_scope() as session:
+            query = select(MedicationLog.user_id, func.count()).where(
+                MedicationLog.status == "missed",
+                MedicationLog.scheduled_time > cutoff
+            ).group_by(MedicationLog.user_id)
+            return dict(session.exec(query).all())
+    
+    @staticmethod
+    def _adherence_stats(counts: Dict[str, int]) -> dict:
+        """Adherence totals and rate from per-status log counts"""
+        total = sum(counts.values())
+        taken = counts.get("taken", 0)
+        return {
+            "total": total,
+            "taken": taken,
+            "missed": counts.get("missed", 0),
+            "adherence_rate": (taken / total * 100) if total > 0 else 0
+        }
+    
+    @staticmethod
+    def get_medication_logs(user_id: int, days: int = 7, now: datetime = None) -> List[MedicationLog]:
+        """Get a user's medication logs scheduled within the last `days` days, oldest first"""
+        cutoff_date = (now or now_central()) - timedelta(days=days)
+        with session_scope() as session:
             query = select(MedicationLog).where(
                 MedicationLog.user_id == user_id,
                 MedicationLog.scheduled_time >= cutoff_date
-            )
-            logs = session.exec(query).all()
-            
-            total = len(logs)
-            taken = len([log for log in logs if log.status == "taken"])
-            missed = len([log for log in logs if log.status == "missed"])
-            
-            return {
-                "total": total,
-                "taken": taken,
-                "missed": missed,
-                "adherence_rate": (taken / total * 100) if total > 0 else 0,
-                "logs": logs
-            }
+            ).order_by(MedicationLog.scheduled_time)
+            return session.exec(query).all()
     
     @staticmethod
-    def check_recent_medication_log(user_id: int, medication_id: int, hours: int = 24) -> Optional[MedicationLog]:
+    def check_recent_medication_log(user_id: int, medication_id: int, hours: int = 24,
+                                    now: datetime = None) -> Optional[MedicationLog]:
         """Check if medication was logged recently (for duplicate detection)"""
-        with get_session() as session:
-            cutoff_time = now_central() - timedelta(hours=hours)
+        with session_scope() as session:
+            cutoff_time = (now or now_central()) - timedelta(hours=hours)
             query = select(MedicationLog).where(
                 MedicationLog.user_id == user_id,
                 MedicationLog.medication_id == medication_id,
                 MedicationLog.taken_time >= cutoff_time,
                 MedicationLog.status == "taken"
-            ).order_by(MedicationLog.taken_time.desc())
+            ).order_by(MedicationLog.taken_time.desc()).limit(1)
             return session.exec(query).first()
     
     @staticmethod
-    def get_today_medication_logs(user_id: int, medication_id: int) -> List[MedicationLog]:
+    def has_recent_medication_log(user_id: int, medication_id: int, hours: int = 24,
+                                  now: datetime = None) -> bool:
+        """Check whether a dose was logged as taken recently (EXISTS, no row is loaded)"""
+        with session_scope() as session:
+            cutoff_time = (now or now_central()) - timedelta(hours=hours)
+            query = select(exists().where(
+                MedicationLog.user_id == user_id,
+                MedicationLog.medication_id == medication_id,
+                MedicationLog.taken_time >= cutoff_time,
+                MedicationLog.status == "taken"
+            ))
+            return bool(session.exec(query).one())
+    
+    @staticmethod
+    def get_today_medication_logs(user_id: int, medication_id: int,
+                                  now: datetime = None) -> List[MedicationLog]:
         """Get all medication logs for today"""
-        with get_session() as session:
-            today_start = start_of_day_central()
+        with session_scope() as session:
+            today_start = start_of_day_central(now)
             query = select(MedicationLog).where(
                 MedicationLog.user_id == user_id,
                 MedicationLog.medication_id == medication_id,
@@ -247,7 +600,7 @@ class MedicationLogCRUD:
     @staticmethod
     def get_user_logs(user_id: int, limit: int = 20) -> List[Dict[str, Any]]:
         """Get recent medication logs for a user (all medications) as dictionaries"""
-        with get_session() as session:
+        with session_scope() as session:
             # Join with Medication table to get medication details
             query = select(MedicationLog).where(
                 MedicationLog.user_id == user_id,
@@ -285,7 +638,7 @@ class CaregiverAlertCRUD:
     def create_alert(user_id: int, alert_type: str, title: str, description: str,
                     severity: str = "medium") -> CaregiverAlert:
         """Create a caregiver alert"""
-        with get_session() as session:
+        with session_scope() as session:
             alert = CaregiverAlert(
                 user_id=user_id,
                 alert_type=alert_type,
@@ -295,13 +648,12 @@ class CaregiverAlertCRUD:
             )
             session.add(alert)
             session.commit()
-            session.refresh(alert)
             return alert
     
     @staticmethod
     def get_unresolved_alerts(user_id: int = None) -> List[CaregiverAlert]:
         """Get unresolved alerts"""
-        with get_session() as session:
+        with session_scope() as session:
             query = select(CaregiverAlert).where(CaregiverAlert.resolved == False)
             if user_id:
                 query = query.where(CaregiverAlert.user_id == user_id)
@@ -311,69 +663,71 @@ class CaregiverAlertCRUD:
     @staticmethod
     def resolve_alert(alert_id: int) -> Optional[CaregiverAlert]:
         """Resolve an alert"""
-        with get_session() as session:
-            alert = session.get(CaregiverAlert, alert_id)
-            if alert:
-                alert.resolved = True
-                alert.resolved_at = now_central()
-                session.add(alert)
-                session.commit()
-                session.refresh(alert)
-            return alert
+        return _update_by_id(CaregiverAlert, alert_id,
+                             {"resolved": True, "resolved_at": now_central()})
 
 class CaregiverPatientCRUD:
     @staticmethod
     def assign_patient(caregiver_id: int, patient_id: int, relationship: str = None, 
                       notification_preferences: dict = None) -> CaregiverPatientAssignment:
         """Assign a patient to a caregiver"""
-        with get_session() as session:
+        with session_scope() as session:
             assignment = CaregiverPatientAssignment(
                 caregiver_id=caregiver_id,
                 patient_id=patient_id,
                 relationship=relationship,
-                notification_preferences=json.dumps(notification_preferences) if notification_preferences else None
+                notification_preferences=notification_preferences or None
             )
             session.add(assignment)
             session.commit()
-            session.refresh(assignment)
             return assignment
     
+    @staticmethod
+    def assign_patients(caregiver_id: int, patient_ids: List[int], relationship: str = None,
+                        notification_preferences: dict = None) -> List[CaregiverPatientAssignment]:
+        """Assign several patients to a caregiver in one transaction"""
+        with session_scope() as session:
+            assignments = [
+                CaregiverPatientAssignment(
+                    caregiver_id=caregiver_id,
+                    patient_id=patient_id,
+                    relationship=relationship,
+                    notification_preferences=notification_preferences or None
+                )
+                for patient_id in patient_ids
+            ]
+            session.add_all(assignments)
+            session.commit()
+            return assignments
+    
     @staticmethod
     def get_caregiver_patients(caregiver_id: int) -> List[User]:
         """Get all patients assigned to a caregiver"""
-        with get_session() as session:
-            query = select(CaregiverPatientAssignment).where(
+        with session_scope() as session:
+            query = select(User).join(
+                CaregiverPatientAssignment,
+                CaregiverPatientAssignment.patient_id == User.id
+            ).where(
                 CaregiverPatientAssignment.caregiver_id == caregiver_id
-            )
-            assignments = session.exec(query).all()
-            
-            patients = []
-            for assignment in assignments:
-                patient = session.get(User, assignment.patient_id)
-                if patient:
-                    patients.append(patient)
-            return patients
+            ).order_by(CaregiverPatientAssignment.id)
+            return session.exec(query).all()
     
     @staticmethod
     def get_patient_caregivers(patient_id: int) -> List[User]:
         """Get all caregivers assigned to a patient"""
-        with get_session() as session:
-            query = select(CaregiverPatientAssignment).where(
+        with session_scope() as session:
+            query = select(User).join(
+                CaregiverPatientAssignment,
+                CaregiverPatientAssignment.caregiver_id == User.id
+            ).where(
                 CaregiverPatientAssignment.patient_id == patient_id
-            )
-            assignments = session.exec(query).all()
-            
-            caregivers = []
-            for assignment in assignments:
-                caregiver = session.get(User, assignment.caregiver_id)
-                if caregiver:
-                    caregivers.append(caregiver)
-            return caregivers
+            ).order_by(CaregiverPatientAssignment.id)
+            return session.exec(query).all()
     
     @staticmethod
     def remove_assignment(caregiver_id: int, patient_id: int) -> bool:
         """Remove patient assignment from caregiver"""
-        with get_session() as session:
+        with session_scope() as session:
             query = select(CaregiverPatientAssignment).where(
                 CaregiverPatientAssignment.caregiver_id == caregiver_id,
                 CaregiverPatientAssignment.patient_id == patient_id
@@ -391,7 +745,7 @@ class PersonalEventCRUD:
                     event_date: datetime = None, recurring: bool = False, 
                     importance: str = "medium") -> PersonalEvent:
         """Create a personal event for memory tracking"""
-        with get_session() as session:
+        with session_scope() as session:
             event = PersonalEvent(
                 user_id=user_id,
                 event_type=event_type,
@@ -403,13 +757,19 @@ class PersonalEventCRUD:
             )
             session.add(event)
             session.commit()
-            session.refresh(event)
-            return event
+        PersonalEventCRUD.invalidate_upcoming_events(user_id)
+        return event
+    
+    @staticmethod
+    def get_event(event_id: int) -> Optional[PersonalEvent]:
+        """Get personal event by ID"""
+        with session_scope() as session:
+            return session.get(PersonalEvent, event_id)
     
     @staticmethod
     def get_user_events(user_id: int, limit: int = 50) -> List[PersonalEvent]:
         """Get personal events for a user"""
-        with get_session() as session:
+        with session_scope() as session:
             query = select(PersonalEvent).where(
                 PersonalEvent.user_id == user_id
             ).order_by(PersonalEvent.created_at.desc()).limit(limit)
@@ -417,25 +777,52 @@ class PersonalEventCRUD:
     
     @staticmethod
     def get_upcoming_events(user_id: int, days: int = 30) -> List[PersonalEvent]:
-        """Get upcoming events in the next N days"""
+        """Get upcoming events in the next N days (cached for a minute)"""
+        cache_key = (user_id, _event_versions.get(user_id, 0), days)
+        cached = _upcoming_event_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
         with get_session() as session:
-            future_date = now_central() + timedelta(days=days)
+            now = now_central()
+            future_date = now + timedelta(days=days)
             query = select(PersonalEvent).where(
                 PersonalEvent.user_id == user_id,
                 PersonalEvent.event_date.isnot(None),
                 PersonalEvent.event_date <= future_date,
-                PersonalEvent.event_date >= now_central()
+                PersonalEvent.event_date >= now
             ).order_by(PersonalEvent.event_date)
+            events = session.exec(query).all()
+        _upcoming_event_cache.set(cache_key, events)
+        return list(events)
+    
+    @staticmethod
+    def get_upcoming_appointments(days: int = 7) -> List[PersonalEvent]:
+        """Get every user's appointments in the next N days in one query"""
+        with session_scope() as session:
+            now = now_central()
+            query = select(PersonalEvent).where(
+                PersonalEvent.event_type == "appointment",
+                PersonalEvent.event_date.isnot(None),
+                PersonalEvent.event_date <= now + timedelta(days=days),
+                PersonalEvent.event_date >= now
+            ).order_by(PersonalEvent.user_id, PersonalEvent.event_date)
             return session.exec(query).all()
     
+    @staticmethod
+    def invalidate_upcoming_events(user_id: int) -> None:
+        """Drop a user's cached upcoming events (call after writing events outside this module)"""
+        _event_versions[user_id] = next(_event_version_counter)
+    
     @staticmethod
     def delete_event(event_id: int) -> bool:
         """Delete a personal event"""
-        with get_session() as session:
+        with session_scope() as session:
             event = session.get(PersonalEvent, event_id)
             if event:
                 session.delete(event)
                 session.commit()
+                PersonalEventCRUD.invalidate_upcoming_events(event.user_id)
                 return True
             return False
     
@@ -451,9 +838,10 @@ class PersonalEventCRUD:
         Returns:
             List of PersonalEvent objects in the window
         """
-        with get_session() as session:
-            past_date = now_central() - timedelta(days=window_days)
-            future_date = now_central() + timedelta(days=window_days)
+        with session_scope() as session:
+            now = now_central()
+            past_date = now - timedelta(days=window_days)
+            future_date = now + timedelta(days=window_days)
             
             query = select(PersonalEvent).where(
                 PersonalEvent.user_id == user_id,
@@ -477,9 +865,10 @@ class PersonalEventCRUD:
         Returns:
             List of matching PersonalEvent objects
         """
-        with get_session() as session:
-            past_date = now_central() - timedelta(days=window_days)
-            future_date = now_central() + timedelta(days=window_days)
+        with session_scope() as session:
+            now = now_central()
+            past_date = now - timedelta(days=window_days)
+            future_date = now + timedelta(days=window_days)
             
             # Get all events in the window
             query = select(PersonalEvent).where(
@@ -530,7 +919,7 @@ class PersonalEventCRUD:
         day_start_utc = day_start.astimezone(ZoneInfo("UTC"))
         day_end_utc = day_end.astimezone(ZoneInfo("UTC"))
         
-        with get_session() as session:
+        with session_scope() as session:
             # Query high-importance events for today
             query = select(PersonalEvent).where(
                 PersonalEvent.user_id == user_id,
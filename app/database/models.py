@@ -1,12 +1,36 @@
 from sqlmodel import SQLModel, Field, create_engine, Session
+from sqlalchemy import JSON, Column, Index, event
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, time
-from typing import Optional, List
+from functools import lru_cache
+from typing import Any, Dict, Optional, List, Tuple
 import sqlite3
 from utils.timezone_utils import now_central
 
 # Database setup
 DATABASE_URL = "sqlite:///carely.db"
-engine = create_engine(DATABASE_URL, echo=False)
+# One pooled engine for the whole process; get_session() only checks out a
+# connection. Connections are handed between the request thread and the
+# background persistence/context pools, hence check_same_thread=False.
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=10,
+    max_overflow=20,
+    pool_recycle=3600,
+    connect_args={"check_same_thread": False}
+)
+
+@event.listens_for(engine, "connect")
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """Per-connection SQLite settings, applied once when the pool opens a connection"""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a background write is committing
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
 
 class User(SQLModel, table=True):
     __table_args__ = {"extend_existing": True}
@@ -15,13 +39,25 @@ class User(SQLModel, table=True):
     name: str
     email: Optional[str] = None
     phone: Optional[str] = None
-    preferences: Optional[str] = None  # JSON string for preferences
+    preferences: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON(none_as_null=True)))
     emergency_contact: Optional[str] = None
     telegram_chat_id: Optional[str] = None  # Telegram chat ID for notifications
     user_type: str = Field(default="patient")  # patient, caregiver, admin
     password_hash: Optional[str] = None
     created_at: datetime = Field(default_factory=now_central)
 
+@lru_cache(maxsize=1024)
+def _parse_schedule_times(times: Tuple[str, ...]) -> Tuple[Tuple[str, int, int], ...]:
+    """Parse "HH:MM" schedule times into (time_str, hour, minute) entries, skipping malformed ones"""
+    entries = []
+    for time_str in times:
+        try:
+            hour, minute = map(int, time_str.split(':'))
+            entries.append((time_str, hour, minute))
+        except (ValueError, AttributeError):
+            continue
+    return tuple(entries)
+
 class Medication(SQLModel, table=True):
     __table_args__ = {"extend_existing": True}
     
@@ -30,13 +66,28 @@ class Medication(SQLModel, table=True):
     name: str
     dosage: str
     frequency: str  # e.g., "daily", "twice_daily", "weekly"
-    schedule_times: str  # JSON string of times like ["09:00", "21:00"]
+    schedule_times: List[str] = Field(sa_column=Column(JSON, nullable=False))  # e.g. ["09:00", "21:00"]
     instructions: Optional[str] = None
     active: bool = Field(default=True)
     created_at: datetime = Field(default_factory=now_central)
+    
+    # Parsed views of schedule_times; the parse is memoized per distinct schedule
+    @property
+    def schedule_times_list(self) -> List[str]:
+        """Scheduled times as a list of "HH:MM" strings ([] if missing)"""
+        return list(self.schedule_times or [])
+    
+    @property
+    def schedule_time_entries(self) -> Tuple[Tuple[str, int, int], ...]:
+        """Scheduled times as (time_str, hour, minute), skipping malformed entries"""
+        return _parse_schedule_times(tuple(self.schedule_times or ()))
 
 class Conversation(SQLModel, table=True):
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Per-user history, newest first
+        Index("ix_conv_user_ts", "user_id", "timestamp"),
+        {"extend_existing": True},
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
@@ -48,7 +99,13 @@ class Conversation(SQLModel, table=True):
     timestamp: datetime = Field(default_factory=now_central)
 
 class Reminder(SQLModel, table=True):
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Due-reminder polling: completed = false AND scheduled_time <= now
+        Index("ix_rem_completed_sched", "completed", "scheduled_time"),
+        # Per-user due reminders polled by the chat page
+        Index("ix_rem_user_completed_sched", "user_id", "completed", "scheduled_time"),
+        {"extend_existing": True},
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
@@ -62,7 +119,12 @@ class Reminder(SQLModel, table=True):
     created_at: datetime = Field(default_factory=now_central)
 
 class MedicationLog(SQLModel, table=True):
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Adherence windows and per-medication "already taken?" checks
+        Index("ix_medlog_user_sched", "user_id", "scheduled_time"),
+        Index("ix_medlog_user_med_taken", "user_id", "medication_id", "taken_time"),
+        {"extend_existing": True},
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
@@ -93,7 +155,7 @@ class CaregiverPatientAssignment(SQLModel, table=True):
     caregiver_id: int = Field(foreign_key="user.id")
     patient_id: int = Field(foreign_key="user.id")
     relationship: Optional[str] = None  # family, professional, friend
-    notification_preferences: Optional[str] = None  # JSON string
+    notification_preferences: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON(none_as_null=True)))
     created_at: datetime = Field(default_factory=now_central)
 
 class PersonalEvent(SQLModel, table=True):
@@ -112,7 +174,45 @@ class PersonalEvent(SQLModel, table=True):
 def create_tables():
     """Create all database tables"""
     SQLModel.metadata.create_all(engine)
+    # create_all skips tables that already exist, so add any indexes
+    # introduced after an existing database was created
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 def get_session():
     """Get database session"""
-    return Session(engine)
+    # Objects stay loaded after commit, so write paths can return them
+    # without a refresh() re-SELECT. There are no server-side defaults or
+    # triggers to pick up; primary keys are set by the INSERT itself.
+    return Session(engine, expire_on_commit=False)
+
+# Session shared by every CRUD call in the current context (one API request);
+# None outside a session_scope() block. Context variables are not inherited
+# by worker-pool threads, so each thread still gets its own session.
+_current_session: ContextVar[Optional[Session]] = ContextVar("carely_db_session", default=None)
+
+@contextmanager
+def session_scope():
+    """
+    Use the session already open in this context, or open one for the block
+    
+    Nested scopes reuse the outer session, so a request handler that makes
+    several CRUD calls checks out one pooled connection instead of one per call
+    """
+    session = _current_session.get()
+    if session is not None:
+        try:
+            yield session
+        except Exception:
+            # Keep the shared session usable for the rest of the request
+            session.rollback()
+            raise
+        return
+    
+    with get_session() as session:
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
@@ -15,18 +15,14 @@ class ConversationMemoryStore:
     
     def get_conversation_summary(self, days: int = 7) -> str:
         """Get a summary of recent conversations for context"""
-        conversations = ConversationCRUD.get_user_conversations(
+        # Date window is applied in the query, so only rows in range are loaded
+        cutoff_date = now_central() - timedelta(days=days)
+        recent_convs = ConversationCRUD.get_user_conversations(
             self.user_id, 
-            limit=50
+            limit=50,
+            since=cutoff_date
         )
         
-        # Filter by date
-        cutoff_date = now_central() - timedelta(days=days)
-        recent_convs = [
-            conv for conv in conversations 
-            if conv.timestamp >= cutoff_date
-        ]
-        
         if not recent_convs:
             return "No recent conversations found."
         
@@ -118,7 +118,6 @@ class EpisodicMemory:
                 existing_summary.medications_logged = medications_count
                 session.add(existing_summary)
                 session.commit()
-                session.refresh(existing_summary)
                 return existing_summary
             else:
                 # Create new
@@ -133,7 +132,6 @@ class EpisodicMemory:
                 )
                 session.add(summary)
                 session.commit()
-                session.refresh(summary)
                 return summary
     
     def get_summary(self, user_id: int, date: datetime = None) -> Optional[DailySummary]:
@@ -4,20 +4,56 @@ Retrieves semantically similar past conversations, summaries, and profile facts
 """
 
 import os
+import re
 import uuid
 import hashlib
+import heapq
 import math
 import logging
-from typing import List, Dict, Optional
+import threading
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 
 import chromadb
 from chromadb.config import Settings
 from utils.timezone_utils import now_central
+from utils.ttl_cache import TTLCache
 from app.database.crud import ConversationCRUD
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundary: whitespace following terminal punctuation
+_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Greetings, acknowledgements and stop words; a query made only of these
+# ("hi", "thanks!", "ok sure") has nothing to match past context against
+_UNINFORMATIVE_WORDS = frozenset("""
+    hi hello hey hiya howdy morning afternoon evening night good bye goodbye
+    thanks thank thx ty ok okay k yes yeah yep no nope sure fine great cool
+    nice alright right hmm um uh oh ah wow lol please welcome
+    a an the and or but so to of in on at for with is it its it's i i'm
+    im me my you your we us our he she they this that there here just
+    very too well then now be am are was were do does did have has had
+""".split())
+
+
+def _is_uninformative(query: str) -> bool:
+    """Whether a query has no words beyond greetings, acknowledgements and stop words"""
+    return all(word in _UNINFORMATIVE_WORDS for word in _WORD.findall(query.lower()))
+
+
+def _first_two_sentences(text: str) -> str:
+    """Return at most the first two sentences of text, ending in punctuation"""
+    # maxsplit stops scanning once the first two sentences are found
+    parts = _SENT_SPLIT.split(text, maxsplit=2)[:2]
+    out = ' '.join(p.strip() for p in parts if p.strip())
+    if not out or out.endswith(('.', '!', '?')):
+        return out
+    return out + '.'
+
 
 class LongTermMemory:
     """Manages long-term semantic memory using ChromaDB embeddings"""
@@ -32,41 +68,177 @@ class LongTermMemory:
         """
         self.storage_path = storage_path
         self.embedding_model = embedding_model
-        os.makedirs(storage_path, exist_ok=True)
-        
-        # Initialize ChromaDB client with persistent storage
-        self.client = chromadb.PersistentClient(
-            path=storage_path,
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
-        )
         
-        # Try to use SentenceTransformer embedding function
-        # Falls back to ChromaDB default if sentence-transformers is unavailable
-        try:
-            from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
-            embedding_function = SentenceTransformerEmbeddingFunction(model_name=embedding_model)
-        except (ImportError, ValueError):
-            # Fallback to default embedding function
-            embedding_function = None
-            logger.info("Using ChromaDB default embedding (sentence-transformers not available)")
-        
-        # Get or create collection with configured embedding function
-        self.collection = self.client.get_or_create_collection(
-            name="carely_memory",
-            metadata={"hnsw:space": "cosine"},
-            embedding_function=embedding_function
-        )
+        # The ChromaDB client, embedding model and collection are opened on
+        # first use (see the properties below), so processes that never touch
+        # long-term memory skip the model load and database open
+        self._client = None
+        self._embedding_function = None
+        self._embedding_loaded = False
+        self._collection = None
+        self._init_lock = threading.RLock()
         
         self.last_update = None
+        # Embeddings are deterministic per text; users often repeat the same
+        # questions, so memoize query embeddings instead of re-running the model
+        self._embed_cached = lru_cache(maxsize=2048)(self._embed_uncached)
+        # Highest conversation ID indexed by build_memory_index, per user
+        self._indexed_through: Dict[str, int] = {}
         self.max_raw_per_user = 200  # Hygiene: cap raw conversations per user
+        
+        # Short-lived cache of similarity results. Keys embed a per-user
+        # version that every write bumps, so stale entries are never hit
+        # and simply age out.
+        self._query_cache = TTLCache(maxsize=2048, ttl=60)
+        self._user_versions: Dict[str, int] = {}
+        # Whether each user has any stored items (missing = not yet checked),
+        # so users with an empty memory skip the vector query entirely
+        self._user_has_items: Dict[str, bool] = {}
+        self._versions_lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """ChromaDB client with persistent storage (opened on first use)"""
+        if self._client is None:
+            with self._init_lock:
+                if self._client is None:  # Double-check after acquiring lock
+                    os.makedirs(self.storage_path, exist_ok=True)
+                    self._client = chromadb.PersistentClient(
+                        path=self.storage_path,
+                        settings=Settings(
+                            anonymized_telemetry=False,
+                            allow_reset=True
+                        )
+                    )
+        return self._client
+    
+    @property
+    def embedding_function(self):
+        """SentenceTransformer embedding function, or None to use ChromaDB's default (loaded on first use)"""
+        if not self._embedding_loaded:
+            with self._init_lock:
+                if not self._embedding_loaded:
+                    # Falls back to ChromaDB default if sentence-transformers is unavailable
+                    try:
+                        from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+                        self._embedding_function = SentenceTransformerEmbeddingFunction(
+                            model_name=self.embedding_model)
+                    except (ImportError, ValueError):
+                        self._embedding_function = None
+                        logger.info("Using ChromaDB default embedding (sentence-transformers not available)")
+                    self._embedding_loaded = True
+        return self._embedding_function
+    
+    @property
+    def collection(self):
+        """Memory collection with the configured embedding function (opened on first use)"""
+        if self._collection is None:
+            with self._init_lock:
+                if self._collection is None:
+                    self._collection = self.client.get_or_create_collection(
+                        name="carely_memory",
+                        metadata={"hnsw:space": "cosine"},
+                        embedding_function=self.embedding_function
+                    )
+        return self._collection
+    
+    def _invalidate_user(self, user_id, has_items: Optional[bool] = None) -> None:
+        """
+        Invalidate cached query results for a user after their memories change
+        
+        Args:
+            user_id: User ID
+            has_items: Whether the user now has stored items, or None if
+                unknown (e.g. after deletes) so it is re-checked on next query
+        """
+        key = str(user_id)
+        with self._versions_lock:
+            self._user_versions[key] = self._user_versions.get(key, 0) + 1
+            if has_items is None:
+                self._user_has_items.pop(key, None)
+            else:
+                self._user_has_items[key] = has_items
+    
+    def _user_has_memories(self, user_key: str) -> bool:
+        """Check whether a user has any stored items (one ID-only lookup, then cached)"""
+        with self._versions_lock:
+            known = self._user_has_items.get(user_key)
+        if known is not None:
+            return known
+        
+        try:
+            results = self.collection.get(where={"user_id": user_key}, limit=1, include=[])
+        except Exception as e:
+            logger.warning(f"Could not check stored memories for user {user_key}: {e}")
+            return True  # Fall through to the normal query
+        
+        has_items = bool(results and results['ids'])
+        with self._versions_lock:
+            # A write that landed meanwhile has already recorded the newer state
+            return self._user_has_items.setdefault(user_key, has_items)
+    
+    def embed(self, text: str) -> Optional[List[float]]:
+        """
+        Embed text with the collection's embedding model
+        
+        Args:
+            text: Text to embed
+        
+        Returns:
+            Embedding vector, or None if no explicit embedding model is
+            configured (ChromaDB then embeds query texts itself)
+        """
+        if self.embedding_function is None:
+            return None
+        try:
+            return list(self._embed_cached(text))
+        except Exception as e:
+            logger.warning(f"Embedding failed: {e}")
+            return None
+    
+    def embed_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed several texts (None entries if no embedding model is configured)"""
+        return [self.embed(text) for text in texts]
+    
+    def _embed_uncached(self, text: str) -> Tuple[float, ...]:
+        """Run the embedding model on one text (raises on failure, so errors are not cached)"""
+        return tuple(float(x) for x in self.embedding_function([text])[0])
     
     def _compute_content_hash(self, text: str) -> str:
         """Compute hash for deduplication"""
         return hashlib.md5(text.encode()).hexdigest()
     
+    @staticmethod
+    def _message_key(text: str) -> str:
+        """Short hash of a normalized (lowercased, stripped) message for echo checks"""
+        return hashlib.blake2s(text.lower().strip().encode("utf-8"), digest_size=8).hexdigest()
+    
+    def _conversation_entry(self, user_id: int, conversation_id: int,
+                            user_message: str, assistant_response: str,
+                            timestamp: datetime, title: str = None,
+                            tags: List[str] = None) -> tuple:
+        """Build the (id, document, metadata) triple stored for a conversation"""
+        # Combine user message and response for richer context
+        combined_text = f"{user_message} {assistant_response}"
+        
+        # Create unique ID for this entry
+        doc_id = f"user_{user_id}_conv_{conversation_id}"
+        
+        # Standardized metadata
+        metadata = {
+            "user_id": str(user_id),  # Store as string for ChromaDB consistency
+            "type": "conversation",
+            "timestamp_utc": timestamp.isoformat(),
+            "title": title or f"Conversation {conversation_id}",
+            "tags": ",".join(tags) if tags else "",
+            "content_hash": self._compute_content_hash(combined_text),  # For deduplication
+            "message_key": self._message_key(user_message),  # For echo filtering
+            "source_id": conversation_id,
+            "user_message": user_message[:200],
+            "assistant_response": assistant_response[:200]
+        }
+        return doc_id, combined_text, metadata
+    
     def add_conversation(self, user_id: int, conversation_id: int, 
                         user_message: str, assistant_response: str, 
                         timestamp: datetime, title: str = None, tags: List[str] = None) -> None:
@@ -82,38 +254,45 @@ class LongTermMemory:
             title: Optional title/summary for the conversation
             tags: Optional tags for categorization
         """
+        self.add_conversations_batch([{
+            "user_id": user_id,
+            "conversation_id": conversation_id,
+            "user_message": user_message,
+            "assistant_response": assistant_response,
+            "timestamp": timestamp,
+            "title": title,
+            "tags": tags
+        }])
+    
+    def add_conversations_batch(self, conversations: List[Dict]) -> None:
+        """
+        Add several conversations with a single upsert, so the embedding model
+        runs once over the whole batch
+        
+        Args:
+            conversations: List of dicts with the add_conversation() arguments
+        """
+        if not conversations:
+            return
+        
         try:
-            # Combine user message and response for richer context
-            combined_text = f"{user_message} {assistant_response}"
-            
-            # Compute content hash for deduplication
-            content_hash = self._compute_content_hash(combined_text)
-            
-            # Create unique ID for this entry
-            doc_id = f"user_{user_id}_conv_{conversation_id}"
-            
-            # Standardized metadata
-            metadata = {
-                "user_id": str(user_id),  # Store as string for ChromaDB consistency
-                "type": "conversation",
-                "timestamp_utc": timestamp.isoformat(),
-                "title": title or f"Conversation {conversation_id}",
-                "tags": ",".join(tags) if tags else "",
-                "content_hash": content_hash,
-                "source_id": conversation_id,
-                "user_message": user_message[:200],
-                "assistant_response": assistant_response[:200]
-            }
+            ids, documents, metadatas = [], [], []
+            for conv in conversations:
+                doc_id, document, metadata = self._conversation_entry(**conv)
+                ids.append(doc_id)
+                documents.append(document)
+                metadatas.append(metadata)
             
-            # Add to collection
             self.collection.upsert(
-                ids=[doc_id],
-                documents=[combined_text],
-                metadatas=[metadata]
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas
             )
+            for user_id in {metadata["user_id"] for metadata in metadatas}:
+                self._invalidate_user(user_id, has_items=True)
             
         except Exception as e:
-            logger.error(f"Error adding conversation to vector store: {e}")
+            logger.error(f"Error adding conversations to vector store: {e}")
     
     def add_summary(self, user_id: int, summary_text: str, date: datetime, 
                    key_topics: List[str] = None) -> None:
@@ -128,8 +307,7 @@ class LongTermMemory:
         """
         try:
             # Keep summaries concise (≤2 sentences for retrieval)
-            sentences = summary_text.split('.')[:2]
-            concise_summary = '. '.join(s.strip() for s in sentences if s.strip()) + '.'
+            concise_summary = _first_two_sentences(summary_text)
             
             doc_id = f"user_{user_id}_summary_{date.strftime('%Y%m%d')}"
             
@@ -149,6 +327,7 @@ class LongTermMemory:
                 documents=[concise_summary],
                 metadatas=[metadata]
             )
+            self._invalidate_user(user_id, has_items=True)
             
         except Exception as e:
             logger.error(f"Error adding summary to vector store: {e}")
@@ -183,6 +362,7 @@ class LongTermMemory:
                 documents=[fact],
                 metadatas=[metadata]
             )
+            self._invalidate_user(user_id, has_items=True)
             
         except Exception as e:
             logger.error(f"Error adding profile fact to vector store: {e}")
@@ -207,7 +387,8 @@ class LongTermMemory:
             return 0.5  # Default mid-range score if parsing fails
     
     def retrieve_similar_conversations(self, query: str, user_id: int, 
-                                      top_k: int = 7, exclude_query: str = None) -> List[Dict]:
+                                      top_k: int = 7, exclude_query: str = None,
+                                      query_embedding: Optional[List[float]] = None) -> List[Dict]:
         """
         Retrieve semantically similar past conversations with recency re-ranking
         Returns mix of 2 summaries + 3-5 raw snippets
@@ -217,14 +398,36 @@ class LongTermMemory:
             user_id: User ID
             top_k: Total number of items to retrieve (default 7 for 2 summaries + 5 snippets)
             exclude_query: Query text to exclude from results
+            query_embedding: Precomputed embedding of the query (see embed());
+                the query text is embedded by ChromaDB when omitted
         
         Returns:
             List of similar items (conversations, summaries, facts) with recency re-ranking
         """
+        # Greetings and acknowledgements get no useful matches; skip the query
+        if _is_uninformative(query):
+            return []
+        
+        user_key = str(user_id)
+        if not self._user_has_memories(user_key):
+            return []
+        
+        with self._versions_lock:
+            version = self._user_versions.get(user_key, 0)
+        query_hash = hashlib.blake2s(query.encode("utf-8"), digest_size=8).digest()
+        cache_key = (user_key, version, query_hash, top_k, exclude_query)
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
         try:
             # Query the collection - get more candidates for filtering
+            if query_embedding is not None:
+                query_input = {"query_embeddings": [query_embedding]}
+            else:
+                query_input = {"query_texts": [query]}
             results = self.collection.query(
-                query_texts=[query],
+                **query_input,
                 n_results=min(top_k * 3, 30),
                 where={"user_id": str(user_id)}  # Ensure string for ChromaDB filtering
             )
@@ -233,19 +436,31 @@ class LongTermMemory:
                 return []
             
             # First pass: collect and score all items
-            candidates = []
+            summary_candidates = []
+            other_candidates = []
+            # Normalize and hash the excluded query once; entries written since
+            # message_key was added compare by hash, older ones by text
             exclude_lower = exclude_query.lower().strip() if exclude_query else ""
+            exclude_key = self._message_key(exclude_query) if exclude_query else ""
             
-            for idx, doc_id in enumerate(results['ids'][0]):
-                metadata = results['metadatas'][0][idx]
-                document = results['documents'][0][idx]
-                distance = results['distances'][0][idx] if 'distances' in results else 0.5
-                
-                # Skip if too similar to current query (avoid echoing)
-                if exclude_query and metadata.get('user_message', '').lower().strip() == exclude_lower:
-                    continue
+            # Results are parallel per-query lists; bind them once and walk them together
+            ids = results['ids'][0]
+            metadatas = results['metadatas'][0]
+            documents = results['documents'][0]
+            distances = results['distances'][0] if results.get('distances') else [0.5] * len(ids)
+            
+            for metadata, document, distance in zip(metadatas, documents, distances):
+                # Cheap numeric rejection first, before any string work
                 if distance < 0.05:  # Very low distance = near duplicate
                     continue
+                # Skip if too similar to current query (avoid echoing)
+                if exclude_query:
+                    message_key = metadata.get('message_key')
+                    if message_key is not None:
+                        if message_key == exclude_key:
+                            continue
+                    elif metadata.get('user_message', '').lower().strip() == exclude_lower:
+                        continue
                 
                 # Get timestamp for recency scoring
                 timestamp_str = metadata.get('timestamp_utc') or metadata.get('timestamp', '')
@@ -259,15 +474,9 @@ class LongTermMemory:
                 
                 item_type = metadata.get('type', 'conversation')
                 
-                # Truncate to ≤2 sentences
-                sentences = document.split('.')[:2]
-                concise_text = '. '.join(s.strip() for s in sentences if s.strip())
-                if concise_text and not concise_text.endswith('.'):
-                    concise_text += '.'
-                
                 candidate = {
                     "type": item_type,
-                    "text": concise_text,
+                    "text": document,  # Truncated once the item is selected
                     "metadata": metadata,
                     "relevance": semantic_score,
                     "recency": recency_score,
@@ -280,35 +489,43 @@ class LongTermMemory:
                     candidate['user_message'] = metadata.get('user_message', '')
                     candidate['assistant_response'] = metadata.get('assistant_response', '')
                 
-                candidates.append(candidate)
-            
-            # Sort by combined score
-            candidates.sort(key=lambda x: x['combined_score'], reverse=True)
+                if item_type == 'summary':
+                    summary_candidates.append(candidate)
+                else:
+                    other_candidates.append(candidate)
             
-            # Second pass: enforce mix ratio (2 summaries + 3-5 snippets)
-            summaries = [c for c in candidates if c['type'] == 'summary'][:2]
-            non_summaries = [c for c in candidates if c['type'] != 'summary'][:5]
+            # Second pass: enforce mix ratio (2 summaries + 3-5 snippets),
+            # selecting each group's best without sorting every candidate
+            score = lambda x: x['combined_score']
+            summaries = heapq.nlargest(2, summary_candidates, key=score)
+            non_summaries = heapq.nlargest(5, other_candidates, key=score)
             
             # Combine and re-sort
             final_items = summaries + non_summaries
-            final_items.sort(key=lambda x: x['combined_score'], reverse=True)
+            final_items.sort(key=score, reverse=True)
+            final_items = final_items[:top_k]
             
-            # Add timestamp objects for compatibility
             for item in final_items:
+                # Truncate to ≤2 sentences
+                item['text'] = _first_two_sentences(item['text'])
+                
+                # Add timestamp objects for compatibility
                 if item['timestamp_str']:
                     try:
                         item['timestamp'] = datetime.fromisoformat(item['timestamp_str'])
                     except:
                         pass
             
-            return final_items[:top_k]
+            self._query_cache.set(cache_key, final_items)
+            return list(final_items)
             
         except Exception as e:
             logger.error(f"Error retrieving similar conversations: {e}")
             return []
     
     def get_formatted_similar_context(self, query: str, user_id: int, 
-                                     top_k: int = 3) -> str:
+                                     top_k: int = 3,
+                                     query_embedding: Optional[List[float]] = None) -> str:
         """
         Get formatted string of similar past context
         
@@ -316,11 +533,13 @@ class LongTermMemory:
             query: Current user query
             user_id: User ID
             top_k: Number of items to retrieve (max 3)
+            query_embedding: Precomputed embedding of the query
         
         Returns:
             Formatted context string
         """
-        similar_items = self.retrieve_similar_conversations(query, user_id, top_k)
+        similar_items = self.retrieve_similar_conversations(
+            query, user_id, top_k, query_embedding=query_embedding)
         
         if not similar_items:
             return ""
@@ -341,34 +560,53 @@ class LongTermMemory:
         
         return "\n".join(context_parts)
     
-    def build_memory_index(self, user_id: int, limit: int = 100):
+    def build_memory_index(self, user_id: int, limit: int = 100, batch_size: int = 32,
+                           full_rebuild: bool = False):
         """
-        Build or rebuild the memory index from conversation history
-        (For initial migration or full rebuild only)
+        Build or update the memory index from conversation history
+        
+        After the first build, only conversations newer than the last indexed
+        one are embedded; unchanged rows are not re-embedded on every update
         
         Args:
             user_id: User ID to build memory for
             limit: Maximum number of conversations to index
+            batch_size: Conversations embedded and upserted per batch
+            full_rebuild: Re-index the latest `limit` conversations even if
+                they were indexed before
         """
+        user_key = str(user_id)
+        after_id = 0 if full_rebuild else self._indexed_through.get(user_key, 0)
         try:
-            # Get recent conversations from database
-            conversations = ConversationCRUD.get_user_conversations(user_id, limit=limit)
-            
-            if not conversations:
+            # Stream rows from the database and upsert them in fixed-size
+            # batches, so only one batch is held in memory at a time
+            indexed = 0
+            max_id = after_id
+            batch = []
+            for conv in ConversationCRUD.iter_user_conversations(user_id, limit=limit,
+                                                                 after_id=after_id):
+                max_id = max(max_id, conv.id)
+                batch.append({
+                    "user_id": user_id,
+                    "conversation_id": conv.id,
+                    "user_message": conv.message,
+                    "assistant_response": conv.response,
+                    "timestamp": conv.timestamp
+                })
+                if len(batch) >= batch_size:
+                    self.add_conversations_batch(batch)
+                    indexed += len(batch)
+                    batch = []
+            if batch:
+                self.add_conversations_batch(batch)
+                indexed += len(batch)
+            
+            if not indexed:
                 return
             
-            # Add each conversation to the vector store
-            for conv in conversations:
-                self.add_conversation(
-                    user_id=user_id,
-                    conversation_id=conv.id,
-                    user_message=conv.message,
-                    assistant_response=conv.response,
-                    timestamp=conv.timestamp
-                )
-            
+            self._indexed_through[user_key] = max_id
             self.last_update = now_central()
-            logger.info(f"Indexed {len(conversations)} conversations for user {user_id}")
+            logger.info(f"Indexed {indexed} conversations for user {user_id}")
             
         except Exception as e:
             logger.error(f"Error building memory index: {e}")
@@ -410,6 +648,7 @@ class LongTermMemory:
             # Delete duplicates
             if duplicates:
                 self.collection.delete(ids=duplicates)
+                self._invalidate_user(user_id)
                 logger.info(f"Removed {len(duplicates)} duplicate entries for user {user_id}")
             
             return len(duplicates)
@@ -465,6 +704,7 @@ class LongTermMemory:
                 old_ids = [c['id'] for c in old_conversations]
                 
                 self.collection.delete(ids=old_ids)
+                self._invalidate_user(user_id)
                 logger.info(f"Removed {len(old_ids)} old conversations for user {user_id}")
                 return len(old_ids)
             
@@ -535,6 +775,12 @@ class LongTermMemory:
         """
         try:
             self.collection.delete(ids=[doc_id])
+            # IDs are "user_<id>_..."; fall back to dropping every cached result
+            user_part = doc_id.split("_")[1] if doc_id.startswith("user_") else ""
+            if user_part:
+                self._invalidate_user(user_part)
+            else:
+                self._query_cache.clear()
             return True
         except Exception as e:
             logger.error(f"Error deleting memory item: {e}")
@@ -548,14 +794,34 @@ class LongTermMemory:
             user_id: User ID
         """
         try:
-            # Query all documents for this user
-            results = self.collection.get(
+            # Delete by filter in one call, without fetching the IDs first
+            self.collection.delete(
                 where={"user_id": str(user_id)}  # Ensure string for ChromaDB filtering
             )
-            
-            if results and results['ids']:
-                self.collection.delete(ids=results['ids'])
-                logger.info(f"Cleared {len(results['ids'])} memory items for user {user_id}")
+            self._invalidate_user(user_id, has_items=False)
+            self._indexed_through.pop(str(user_id), None)
+            logger.info(f"Cleared memory items for user {user_id}")
                 
         except Exception as e:
             logger.error(f"Error clearing user memory: {e}")
+
+
+# Shared instances, one per storage path and model: each opens a ChromaDB
+# client and loads the embedding model, which dominates cold-start time
+_instances: Dict[Tuple[str, str], LongTermMemory] = {}
+_instances_lock = threading.Lock()
+
+def get_long_term_memory(storage_path: str = "data/vectors",
+                         embedding_model: str = "all-MiniLM-L6-v2") -> LongTermMemory:
+    """Get the shared LongTermMemory for a storage path and model (thread-safe)"""
+    key = (os.path.abspath(storage_path), embedding_model)
+    
+    instance = _instances.get(key)
+    if instance is None:
+        with _instances_lock:
+            instance = _instances.get(key)
+            if instance is None:  # Double-check after acquiring lock
+                instance = LongTermMemory(storage_path, embedding_model)
+                _instances[key] = instance
+    
+    return instance
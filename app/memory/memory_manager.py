@@ -6,10 +6,15 @@ Provides a single interface for context-aware, personalized responses
 
 from typing import Dict, List, Optional
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import atexit
 import logging
+import threading
+import time
 
 from app.memory.short_term_memory import ShortTermMemory
-from app.memory.long_term_memory import LongTermMemory
+from app.memory.long_term_memory import get_long_term_memory
 from app.memory.episodic_memory import EpisodicMemory
 from app.memory.structured_memory import StructuredMemory
 
@@ -19,15 +24,31 @@ logger = logging.getLogger(__name__)
 class MemoryManager:
     """Unified interface for all memory layers"""
 
+    # The memory layers are independent and I/O-bound (SQLite, ChromaDB), so
+    # get_context_sections reads them concurrently; shared across instances
+    _layer_executor = ThreadPoolExecutor(max_workers=6,
+                                         thread_name_prefix="carely-memory-layer")
+    layer_timeout = 2.0  # Seconds to wait for each layer before leaving it out
+
     def __init__(self):
         """Initialize all memory layers"""
         self.short_term = ShortTermMemory(
             max_size=10)  # DB-based, fetches last 10
-        self.long_term = LongTermMemory()  # ChromaDB-based embeddings
+        self.long_term = get_long_term_memory()  # ChromaDB-based embeddings, shared per process
         self.episodic = EpisodicMemory()
         self.structured = StructuredMemory()
         self.turn_count = 0  # Track turns since last summary
 
+        # Vector-store writes are queued and flushed in batches by a background
+        # thread: when batch_size items are waiting or the oldest is flush_interval old
+        self.batch_size = 32
+        self.flush_interval = 0.2
+        self._pending = deque()
+        self._pending_cv = threading.Condition()
+        self._hygiene_users = set()
+        self._writer = None
+        atexit.register(self.flush_pending)
+
     def is_vector_worthy(self, user_message: str, assistant_response: str) -> bool:
         """
         Determine if an exchange should be stored in vector database
@@ -72,7 +93,7 @@ class MemoryManager:
                          assistant_response: str,
                          timestamp: datetime = None):
         """
-        Add a conversation to memory system (incremental vector store update)
+        Add a conversation to memory system (queued, batched vector store update)
         Filters out small talk using is_vector_worthy()
         
         Args:
@@ -90,62 +111,153 @@ class MemoryManager:
         try:
             # Only store if vector-worthy
             if self.is_vector_worthy(user_message, assistant_response):
-                self.long_term.add_conversation(
-                    user_id=user_id,
-                    conversation_id=conversation_id,
-                    user_message=user_message,
-                    assistant_response=assistant_response,
-                    timestamp=timestamp)
-                
-                # Increment turn count
-                self.turn_count += 1
-                
-                # Every 10 turns, run hygiene: dedupe + cleanup old conversations
-                if self.turn_count % 10 == 0:
-                    self.long_term.deduplicate_by_hash(user_id)
-                    self.long_term.cleanup_old_conversations(user_id, max_conversations=200)
+                # Increment turn count (one manager can serve many sessions)
+                with self._pending_cv:
+                    self.turn_count += 1
+                    # Every 10 turns, run hygiene (dedupe + cleanup old conversations)
+                    # once the queued writes have landed
+                    run_hygiene = self.turn_count % 10 == 0
+                self._enqueue({
+                    "user_id": user_id,
+                    "conversation_id": conversation_id,
+                    "user_message": user_message,
+                    "assistant_response": assistant_response,
+                    "timestamp": timestamp
+                }, run_hygiene)
         except Exception as e:
             logger.warning(f"Could not add conversation to vector store: {e}")
 
-    def get_full_context(self, user_id: int, current_query: str) -> str:
+    def _enqueue(self, item: Dict, run_hygiene: bool = False):
+        """Queue a conversation for the next batched vector-store write"""
+        with self._pending_cv:
+            self._pending.append((time.monotonic(), item))
+            if run_hygiene:
+                self._hygiene_users.add(item["user_id"])
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop,
+                                                name="carely-memory-writer",
+                                                daemon=True)
+                self._writer.start()
+            self._pending_cv.notify()
+
+    def _writer_loop(self):
+        """Background loop flushing queued writes by size or age"""
+        while True:
+            with self._pending_cv:
+                while not self._pending:
+                    self._pending_cv.wait()
+                deadline = self._pending[0][0] + self.flush_interval
+                while len(self._pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_cv.wait(remaining)
+            self.flush_pending()
+
+    def flush_pending(self):
+        """Write all queued conversations to the vector store in one batch"""
+        with self._pending_cv:
+            items = [item for _, item in self._pending]
+            self._pending.clear()
+            hygiene_users = self._hygiene_users
+            self._hygiene_users = set()
+
+        if not items:
+            return
+
+        try:
+            self.long_term.add_conversations_batch(items)
+            for user_id in hygiene_users:
+                self.long_term.deduplicate_by_hash(user_id)
+                self.long_term.cleanup_old_conversations(user_id, max_conversations=200)
+        except Exception as e:
+            logger.warning(f"Could not flush conversations to vector store: {e}")
+
+    def embed(self, text: str) -> Optional[List[float]]:
         """
-        Get comprehensive context from all memory layers
+        Embed text with the long-term memory's embedding model, so a single
+        forward pass per turn can be shared by retrieval and the response cache
+        
+        Args:
+            text: Text to embed
+        
+        Returns:
+            Embedding vector, or None if unavailable
+        """
+        return self.long_term.embed(text)
+    
+    def get_context_sections(self, user_id: int, current_query: str,
+                             query_embedding: Optional[List[float]] = None) -> Dict[str, str]:
+        """
+        Get context from all memory layers as separate sections, ordered from
+        most stable (profile) to most volatile (query-specific retrieval, event timing)
         
         Args:
             user_id: User ID
             current_query: Current user query
+            query_embedding: Precomputed embedding of current_query (see embed())
         
         Returns:
-            Complete context string for AI prompt
+            Dictionary with "profile", "recent", "relevant" and "timing"
+            sections (empty string when a layer has nothing to contribute)
         """
-        context_parts = []
+        sections = {"profile": "", "recent": "", "relevant": "", "timing": ""}
 
-        # 1. Structured Memory - User Profile and Preferences
-        profile = self.structured.get_formatted_profile(user_id)
+        # The three layers are fetched concurrently, so latency is the
+        # slowest layer rather than the sum
+        profile_future = self._layer_executor.submit(
+            self.structured.get_prompt_profile, user_id)
+        short_term_future = self._layer_executor.submit(
+            self.short_term.get_formatted_context, user_id, num_exchanges=10)
+        long_term_future = self._layer_executor.submit(
+            self.long_term.get_formatted_similar_context,
+            current_query, user_id, top_k=3, query_embedding=query_embedding)
+
+        # 1. Structured Memory - User Profile and Preferences. The stable part
+        # leads the prompt; relative event timing goes with the current turn
+        profile, timing = self._layer_result(profile_future, "Structured", ("", ""))
         if profile:
-            context_parts.append("=== USER PROFILE ===")
-            context_parts.append(profile)
+            sections["profile"] = f"=== USER PROFILE ===\n{profile}"
+        if timing:
+            sections["timing"] = f"=== UPCOMING EVENT TIMING ===\n{timing}"
 
         # 2. Short-Term Memory - Recent conversation (DB-based, last 10 messages)
-        short_term_context = self.short_term.get_formatted_context(
-            user_id, num_exchanges=10)
+        short_term_context = self._layer_result(short_term_future, "Short-term", "")
         if short_term_context and "No recent" not in short_term_context:
-            context_parts.append("\n=== RECENT CONVERSATION ===")
-            context_parts.append(short_term_context)
+            sections["recent"] = f"=== RECENT CONVERSATION ===\n{short_term_context}"
 
         # 3. Long-Term Memory - Semantically similar past context
         # Retrieves top-1 conversation + top-2 summaries/facts (max 3 total, ≤2 sentences each)
+        similar_context = self._layer_result(long_term_future, "Long-term", "")
+        if similar_context:
+            sections["relevant"] = f"=== RELEVANT PAST CONTEXT ===\n{similar_context}"
+
+        return sections
+
+    def _layer_result(self, future, layer_name: str, default):
+        """Wait for one memory layer's result, falling back to default on error or timeout"""
         try:
-            similar_context = self.long_term.get_formatted_similar_context(
-                current_query, user_id, top_k=3)
-            if similar_context:
-                context_parts.append("\n=== RELEVANT PAST CONTEXT ===")
-                context_parts.append(similar_context)
+            return future.result(timeout=self.layer_timeout)
+        except FutureTimeoutError:
+            logger.warning(f"{layer_name} memory retrieval timed out")
         except Exception as e:
-            # Gracefully handle vector store errors
-            logger.warning(f"Long-term memory retrieval failed: {e}")
+            # Gracefully handle database and vector store errors
+            logger.warning(f"{layer_name} memory retrieval failed: {e}")
+        return default
 
-        return "\n".join(context_parts)
+    def get_full_context(self, user_id: int, current_query: str) -> str:
+        """
+        Get comprehensive context from all memory layers
+        
+        Args:
+            user_id: User ID
+            current_query: Current user query
+        
+        Returns:
+            Complete context string for AI prompt
+        """
+        sections = self.get_context_sections(user_id, current_query)
+        return "\n\n".join(part for part in sections.values() if part)
 
     def recall_information(self, user_id: int, query: str) -> str:
         """
@@ -197,7 +309,8 @@ class MemoryManager:
                    for word in ['today', 'summary', 'what did i']):
                 logs = self.structured.get_daily_logs(user_id,
                                                       exclude_message=query,
-                                                      max_topics=3)
+                                                      max_topics=3,
+                                                      include_activities=False)
                 if logs["meals"]:
                     return f"Today you mentioned: {', '.join(logs['meals'])}"
 
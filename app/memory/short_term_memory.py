@@ -3,7 +3,9 @@ Short-term memory - persistent, DB-based recent conversation context
 Fetches last 8-10 messages directly from the database
 """
 
-from typing import List, Dict
+import threading
+from collections import deque
+from typing import List, Dict, Tuple
 from datetime import datetime
 from app.database.crud import ConversationCRUD
 
@@ -19,6 +21,10 @@ class ShortTermMemory:
             max_size: Maximum number of recent messages to fetch (default: 10)
         """
         self.max_size = max_size
+        # Formatted context per (user_id, num_exchanges):
+        # (last conversation id seen, formatted exchanges, formatted string)
+        self._context_cache: Dict[Tuple[int, int], Tuple[int, Tuple[str, ...], str]] = {}
+        self._context_lock = threading.Lock()
     
     def get_recent_context(self, user_id: int, num_exchanges: int = None) -> List[Dict]:
         """
@@ -40,16 +46,15 @@ class ShortTermMemory:
         if not conversations:
             return []
         
-        # Convert to exchange format
-        exchanges = []
-        for conv in reversed(conversations):  # Reverse to get chronological order
-            exchanges.append({
+        # Convert to exchange format, reversed to chronological order
+        return [
+            {
                 "user_message": conv.message,
                 "assistant_response": conv.response,
                 "timestamp": conv.timestamp
-            })
-        
-        return exchanges
+            }
+            for conv in reversed(conversations)
+        ]
     
     def get_formatted_context(self, user_id: int, num_exchanges: int = None) -> str:
         """
@@ -65,21 +70,30 @@ class ShortTermMemory:
         if num_exchanges is None:
             num_exchanges = min(8, self.max_size)  # Default to 8 for token efficiency
         
-        exchanges = self.get_recent_context(user_id, num_exchanges)
+        key = (user_id, num_exchanges)
+        with self._context_lock:
+            last_id, window, formatted = self._context_cache.get(key, (0, (), None))
         
-        if not exchanges:
-            return "No recent conversation history."
+        # Only rows newer than the last one already formatted are fetched;
+        # an unchanged history costs one indexed query and no formatting
+        new_conversations = ConversationCRUD.get_conversations_after(
+            user_id, last_id, limit=num_exchanges)
+        if formatted is not None and not new_conversations:
+            return formatted
         
         # Compact format to save tokens
-        context_lines = []
-        for exchange in exchanges:
+        exchanges = deque(window, maxlen=num_exchanges)
+        for conv in reversed(new_conversations):  # Chronological order
             # Truncate long messages to keep under ~500 tokens total
-            user_msg = exchange['user_message'][:150]
-            asst_msg = exchange['assistant_response'][:150]
-            context_lines.append(f"User: {user_msg}")
-            context_lines.append(f"Carely: {asst_msg}")
+            exchanges.append(f"User: {conv.message[:150]}\nCarely: {conv.response[:150]}")
+        
+        if new_conversations:
+            last_id = new_conversations[0].id
+        formatted = "\n".join(exchanges) if exchanges else "No recent conversation history."
         
-        return "\n".join(context_lines)
+        with self._context_lock:
+            self._context_cache[key] = (last_id, tuple(exchanges), formatted)
+        return formatted
     
     def clear(self, user_id: int = None):
         """
@@ -102,8 +116,8 @@ class ShortTermMemory:
         Returns:
             Number of recent exchanges
         """
-        exchanges = self.get_recent_context(user_id, self.max_size)
-        return len(exchanges)
+        # Counted in SQL; no rows are loaded
+        return ConversationCRUD.count_user_conversations(user_id, limit=self.max_size)
     
     def add_exchange(self, user_message: str, assistant_response: str, 
                     timestamp: datetime = None):
@@ -5,13 +5,24 @@ Provides easy access to medications, preferences, health data, and daily logs
 """
 
 import json
-from typing import List, Dict, Optional
+import re
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 
 from app.database.crud import (
     MedicationCRUD, UserCRUD, PersonalEventCRUD, 
     MedicationLogCRUD, ConversationCRUD
 )
+from utils.keyword_scanner import KeywordScanner
+
+# Daily-log topics, matched by substring as with the original `in` checks
+_MEALS = ("breakfast", "lunch", "dinner")
+_DAILY_LOG_KEYWORDS = KeywordScanner({
+    "meal": _MEALS,
+    "activity": ["walk", "exercise", "activity"],
+}, whole_words=False)
+# Meal questions in recall_specific_info, matched in one regex search
+_MEAL_QUERY = re.compile("breakfast|lunch|dinner|meal")
 
 
 class StructuredMemory:
@@ -33,24 +44,21 @@ class StructuredMemory:
         if not medications:
             return "You don't have any medications scheduled."
         
-        schedule = "Your medication schedule:\n\n"
+        parts = ["Your medication schedule:\n\n"]
         for med in medications:
-            schedule += f"• {med.name} - {med.dosage}\n"
-            schedule += f"  Frequency: {med.frequency}\n"
+            parts.append(f"• {med.name} - {med.dosage}\n")
+            parts.append(f"  Frequency: {med.frequency}\n")
             
-            if med.schedule_times:
-                try:
-                    times = json.loads(med.schedule_times)
-                    schedule += f"  Times: {', '.join(times)}\n"
-                except:
-                    pass
+            times = med.schedule_times_list
+            if times:
+                parts.append(f"  Times: {', '.join(times)}\n")
             
             if med.instructions:
-                schedule += f"  Instructions: {med.instructions}\n"
+                parts.append(f"  Instructions: {med.instructions}\n")
             
-            schedule += "\n"
+            parts.append("\n")
         
-        return schedule
+        return "".join(parts)
     
     @staticmethod
     def get_user_preferences(user_id: int) -> Dict:
@@ -76,11 +84,7 @@ class StructuredMemory:
         }
         
         if user.preferences:
-            try:
-                user_prefs = json.loads(user.preferences)
-                preferences.update(user_prefs)
-            except:
-                pass
+            preferences.update(user.preferences)
         
         return preferences
     
@@ -100,15 +104,12 @@ class StructuredMemory:
         if not user or not user.preferences:
             return None
         
-        try:
-            prefs = json.loads(user.preferences)
-            meal_times = prefs.get("meal_times", {})
-            return meal_times.get(meal_name.lower())
-        except:
-            return None
+        meal_times = user.preferences.get("meal_times") or {}
+        return meal_times.get(meal_name.lower())
     
     @staticmethod
-    def get_daily_logs(user_id: int, date: datetime = None, exclude_message: str = None, max_topics: int = 3) -> Dict:
+    def get_daily_logs(user_id: int, date: datetime = None, exclude_message: str = None, max_topics: int = 3,
+                       include_activities: bool = True) -> Dict:
         """
         Get daily activity logs (meals, medications, conversations)
         
@@ -117,6 +118,8 @@ class StructuredMemory:
             date: Date to retrieve (defaults to today)
             exclude_message: Message to exclude from aggregation (typically current user message)
             max_topics: Maximum number of topics to return (default 3)
+            include_activities: Collect activity mentions; when False the
+                conversation scan stops as soon as the meal list is complete
         
         Returns:
             Dictionary with daily logs
@@ -128,7 +131,7 @@ class StructuredMemory:
         day_end = day_start + timedelta(days=1)
         
         # Get conversations for the day
-        from app.database.models import get_session, Conversation, MedicationLog
+        from app.database.models import get_session, Conversation, Medication, MedicationLog
         from sqlmodel import select
         
         logs = {
@@ -139,7 +142,7 @@ class StructuredMemory:
             "conversations_count": 0
         }
         
-        exclude_lower = exclude_message.lower() if exclude_message else ""
+        exclude_norm = exclude_message.lower().strip() if exclude_message else ""
         
         with get_session() as session:
             # Get conversations
@@ -151,56 +154,59 @@ class StructuredMemory:
             conversations = session.exec(conv_query).all()
             logs["conversations_count"] = len(conversations)
             
+            # Meals are reported in first-mention order, so once enough distinct
+            # meals are seen the rest of the day cannot change the result
+            meals_needed = min(len(_MEALS), max_topics)
+            meals_seen: Dict[str, None] = {}  # Insertion-ordered set
+            
             # Extract meals and activities from conversations
             for conv in conversations:
+                if not include_activities and len(meals_seen) >= meals_needed:
+                    break
+                
+                # Lowercase the message once for both the echo check and the keyword scan
+                message_lower = conv.message.lower()
+                
                 # Skip if this is the current user message
-                if exclude_message and conv.message.lower().strip() == exclude_lower.strip():
+                if exclude_message and message_lower.strip() == exclude_norm:
                     continue
                 
-                text = (conv.message + " " + conv.response).lower()
+                # One scan for all meal and activity keywords
+                hits = _DAILY_LOG_KEYWORDS.scan(message_lower + " " + conv.response.lower())
                 
                 # Look for meal mentions
-                if "breakfast" in text:
-                    logs["meals"].append("breakfast")
-                if "lunch" in text:
-                    logs["meals"].append("lunch")
-                if "dinner" in text:
-                    logs["meals"].append("dinner")
+                meals = hits.get("meal")
+                if meals:
+                    for meal in _MEALS:
+                        if meal in meals:
+                            meals_seen.setdefault(meal)
                 
                 # Look for activity mentions
-                if any(word in text for word in ["walk", "exercise", "activity"]):
+                if include_activities and "activity" in hits:
                     logs["activities"].append(conv.message)
             
-            # Deduplicate meals while preserving order
-            seen_meals = set()
-            deduped_meals = []
-            for meal in logs["meals"]:
-                if meal not in seen_meals:
-                    seen_meals.add(meal)
-                    deduped_meals.append(meal)
-            logs["meals"] = deduped_meals[:max_topics]
+            # Deduplicate activities while preserving order
+            logs["meals"] = list(meals_seen)[:max_topics]
+            logs["activities"] = list(dict.fromkeys(logs["activities"]))
             
-            # Get medication logs
-            med_query = select(MedicationLog).where(
+            # Get medication logs joined with their medication details
+            med_query = select(
+                MedicationLog.taken_time, Medication.name, Medication.dosage
+            ).join(
+                Medication, Medication.id == MedicationLog.medication_id
+            ).where(
                 MedicationLog.user_id == user_id,
                 MedicationLog.taken_time >= day_start,
                 MedicationLog.taken_time < day_end,
                 MedicationLog.status == "taken"
             )
-            med_logs = session.exec(med_query).all()
-            
-            # Get medication details
-            medications = MedicationCRUD.get_user_medications(user_id, active_only=False)
-            med_dict = {med.id: med for med in medications}
             
-            for log in med_logs:
-                if log.medication_id in med_dict:
-                    med = med_dict[log.medication_id]
-                    logs["medications_taken"].append({
-                        "name": med.name,
-                        "dosage": med.dosage,
-                        "time": log.taken_time.strftime('%I:%M %p')
-                    })
+            for taken_time, name, dosage in session.exec(med_query):
+                logs["medications_taken"].append({
+                    "name": name,
+                    "dosage": dosage,
+                    "time": taken_time.strftime('%I:%M %p')
+                })
         
         return logs
     
@@ -223,8 +229,9 @@ class StructuredMemory:
         if "medication" in query_type_lower or "schedule" in query_type_lower:
             return StructuredMemory.get_medication_schedule(user_id)
         
-        elif any(meal in query_type_lower for meal in ['breakfast', 'lunch', 'dinner', 'meal']):
-            logs = StructuredMemory.get_daily_logs(user_id, date, exclude_message=exclude_message, max_topics=3)
+        elif _MEAL_QUERY.search(query_type_lower):
+            logs = StructuredMemory.get_daily_logs(user_id, date, exclude_message=exclude_message, max_topics=3,
+                                                   include_activities=False)
             if logs["meals"]:
                 meals_str = ", ".join(logs["meals"])
                 return f"Today you mentioned having: {meals_str}"
@@ -258,29 +265,26 @@ class StructuredMemory:
         if not user:
             return "User profile not found."
         
-        profile = f"User Profile:\n"
-        profile += f"Name: {user.name}\n"
+        parts = ["User Profile:\n", f"Name: {user.name}\n"]
         
         if user.preferences:
-            try:
-                prefs = json.loads(user.preferences)
-                profile += f"Preferences: {json.dumps(prefs, indent=2)}\n"
-            except:
-                pass
+            parts.append(f"Preferences: {json.dumps(user.preferences, indent=2, sort_keys=True)}\n")
         
         # Add medication summary
-        medications = MedicationCRUD.get_user_medications(user_id)
+        # Deterministic ordering keeps the profile block byte-identical across turns
+        medications = sorted(MedicationCRUD.get_user_medications(user_id), key=lambda m: m.id)
         if medications:
-            profile += f"\nActive Medications ({len(medications)}):\n"
+            parts.append(f"\nActive Medications ({len(medications)}):\n")
             for med in medications:
-                profile += f"  • {med.name} - {med.dosage}\n"
+                parts.append(f"  • {med.name} - {med.dosage}\n")
         
         # Add upcoming personal events
         upcoming_events = PersonalEventCRUD.get_upcoming_events(user_id, days=30)
         if upcoming_events:
-            profile += f"\nUpcoming Events and Important Dates:\n"
+            parts.append("\nUpcoming Events and Important Dates:\n")
+            today = now_central().date()
             for event in upcoming_events[:10]:  # Show up to 10 upcoming events
-                days_until = (event.event_date.date() - now_central().date()).days
+                days_until = (event.event_date.date() - today).days
                 if days_until == 0:
                     time_desc = "TODAY"
                 elif days_until == 1:
@@ -290,9 +294,71 @@ class StructuredMemory:
                 else:
                     time_desc = event.event_date.strftime('%B %d, %Y')
                 
-                profile += f"  • {event.title} ({event.event_type}) - {time_desc}"
+                parts.append(f"  • {event.title} ({event.event_type}) - {time_desc}")
                 if event.description:
-                    profile += f" - {event.description}"
-                profile += "\n"
+                    parts.append(f" - {event.description}")
+                parts.append("\n")
+        
+        return "".join(parts)
+
+    @staticmethod
+    def get_prompt_profile(user_id: int) -> Tuple[str, str]:
+        """
+        Get the user profile for the AI prompt, split into a stable part and a
+        time-dependent part
+        
+        The stable part is canonical JSON (sorted keys, no timestamps or
+        relative dates) so it stays byte-identical between turns and the
+        provider can reuse it as a cached prompt prefix.
+        
+        Args:
+            user_id: User ID
+        
+        Returns:
+            Tuple of (stable profile JSON, upcoming-event timing text);
+            both are empty strings if the user is not found
+        """
+        user = UserCRUD.get_user(user_id)
+        
+        if not user:
+            return "", ""
+        
+        profile = {"name": user.name}
+        
+        if user.preferences:
+            profile["preferences"] = user.preferences
+        
+        medications = sorted(MedicationCRUD.get_user_medications(user_id), key=lambda m: m.id)
+        profile["medications"] = []
+        for med in medications:
+            entry = {"name": med.name, "dosage": med.dosage}
+            if med.schedule_times_list:
+                entry["schedule_times"] = med.schedule_times_list
+            profile["medications"].append(entry)
+        
+        upcoming_events = sorted(PersonalEventCRUD.get_upcoming_events(user_id, days=30)[:10],
+                                 key=lambda e: (e.event_date, e.id))
+        profile["upcoming_events"] = []
+        timing = ""
+        today = now_central().date()
+        for event in upcoming_events:
+            entry = {
+                "title": event.title,
+                "type": event.event_type,
+                "date": event.event_date.strftime('%Y-%m-%d')
+            }
+            if event.description:
+                entry["description"] = event.description
+            profile["upcoming_events"].append(entry)
+            
+            days_until = (event.event_date.date() - today).days
+            if days_until == 0:
+                time_desc = "TODAY"
+            elif days_until == 1:
+                time_desc = "TOMORROW"
+            else:
+                time_desc = f"in {days_until} days"
+            timing += f"  • {event.title} - {time_desc}\n"
         
-        return profile
+        stable = json.dumps(profile, sort_keys=True, separators=(',', ':'), default=str)
+        return stable, timing
@@ -2,7 +2,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
 from datetime import datetime, timedelta, time
-import json
+from functools import cached_property
 import logging
 from typing import List, Dict, Any
 
@@ -21,10 +21,14 @@ logger = logging.getLogger(__name__)
 class ReminderScheduler:
     def __init__(self):
         self.scheduler = BackgroundScheduler()
-        self.companion_agent = CompanionAgent()
         self.memory_manager = MemoryManager()
         self.is_running = False
     
+    @cached_property
+    def companion_agent(self) -> CompanionAgent:
+        """Companion agent for check-ins, built on first use rather than at startup"""
+        return CompanionAgent()
+    
     def start(self):
         """Start the scheduler with all recurring jobs"""
         if self.is_running:
@@ -97,35 +101,35 @@ class ReminderScheduler:
     def schedule_medication_reminders(self):
         """Schedule medication reminders for all users"""
         try:
-            users = UserCRUD.get_all_users()
+            # One query for all users' active medications instead of one per user
+            medications = MedicationCRUD.get_active_medications()
             
-            for user in users:
-                medications = MedicationCRUD.get_user_medications(user.id)
+            for medication in medications:
+                if not medication.schedule_times:
+                    continue
                 
-                for medication in medications:
-                    if not medication.active or not medication.schedule_times:
-                        continue
+                try:
+                    # Pre-parsed (time_str, hour, minute) entries, memoized per schedule
+                    entries = medication.schedule_time_entries
+                    if len(entries) < len(medication.schedule_times):
+                        logger.error(f"Invalid schedule format for medication {medication.id}: "
+                                     f"{medication.schedule_times}")
                     
-                    try:
-                        schedule_times = json.loads(medication.schedule_times)
+                    for time_str, hour, minute in entries:
+                        job_id = f'med_reminder_{medication.id}_{time_str.replace(":", "")}'
+                        
+                        self.scheduler.add_job(
+                            func=self.medication_reminder,
+                            # Jitter spreads reminders due at the same minute over a few seconds
+                            trigger=CronTrigger(hour=hour, minute=minute, timezone=CENTRAL_TZ, jitter=15),
+                            args=[medication.user_id, medication.id],
+                            id=job_id,
+                            name=f'Medication reminder for {medication.name}',
+                            replace_existing=True
+                        )
                         
-                        for time_str in schedule_times:
-                            # Parse time string (expected format: "HH:MM")
-                            hour, minute = map(int, time_str.split(':'))
-                            
-                            job_id = f'med_reminder_{medication.id}_{time_str.replace(":", "")}'
-                            
-                            self.scheduler.add_job(
-                                func=self.medication_reminder,
-                                trigger=CronTrigger(hour=hour, minute=minute, timezone=CENTRAL_TZ),
-                                args=[user.id, medication.id],
-                                id=job_id,
-                                name=f'Medication reminder for {medication.name}',
-                                replace_existing=True
-                            )
-                            
-                    except (json.JSONDecodeError, ValueError) as e:
-                        logger.error(f"Invalid schedule format for medication {medication.id}: {e}")
+                except (ValueError, AttributeError) as e:
+                    logger.error(f"Invalid schedule format for medication {medication.id}: {e}")
             
             logger.info("Medication reminders scheduled for all users")
             
@@ -135,33 +139,27 @@ class ReminderScheduler:
     def schedule_appointment_reminders(self):
         """Schedule reminders for upcoming appointments (1 hour before)"""
         try:
-            users = UserCRUD.get_all_users()
+            # Appointments in the next 7 days, for all users in one query
+            appointments = PersonalEventCRUD.get_upcoming_appointments(days=7)
+            current_time = now_central()
             
-            for user in users:
-                # Get appointments in the next 7 days
-                upcoming_events = PersonalEventCRUD.get_upcoming_events(user.id, days=7)
-                appointments = [e for e in upcoming_events if e.event_type == "appointment"]
+            for appointment in appointments:
+                # Schedule reminder 1 hour before appointment
+                appt_time = to_central(appointment.event_date)
+                reminder_time = appt_time - timedelta(hours=1)
                 
-                for appointment in appointments:
-                    if not appointment.event_date:
-                        continue
+                # Only schedule if reminder time is in the future
+                if reminder_time > current_time:
+                    job_id = f'appointment_reminder_{appointment.id}'
                     
-                    # Schedule reminder 1 hour before appointment
-                    appt_time = to_central(appointment.event_date)
-                    reminder_time = appt_time - timedelta(hours=1)
-                    
-                    # Only schedule if reminder time is in the future
-                    if reminder_time > now_central():
-                        job_id = f'appointment_reminder_{appointment.id}'
-                        
-                        self.scheduler.add_job(
-                            func=self.appointment_reminder,
-                            trigger=DateTrigger(run_date=reminder_time),
-                            args=[user.id, appointment.id],
-                            id=job_id,
-                            name=f'Appointment reminder for {appointment.title}',
-                            replace_existing=True
-                        )
+                    self.scheduler.add_job(
+                        func=self.appointment_reminder,
+                        trigger=DateTrigger(run_date=reminder_time),
+                        args=[appointment.user_id, appointment.id],
+                        id=job_id,
+                        name=f'Appointment reminder for {appointment.title}',
+                        replace_existing=True
+                    )
             
             logger.info("Appointment reminders scheduled for all users")
             
@@ -172,10 +170,9 @@ class ReminderScheduler:
         """Send appointment reminder to specific user"""
         try:
             user = UserCRUD.get_user(user_id)
-            events = PersonalEventCRUD.get_user_events(user_id)
-            appointment = next((e for e in events if e.id == appointment_id), None)
+            appointment = PersonalEventCRUD.get_event(appointment_id)
             
-            if not appointment:
+            if not appointment or appointment.user_id != user_id:
                 logger.error(f"Appointment {appointment_id} not found for user {user_id}")
                 return
             
@@ -218,32 +215,40 @@ class ReminderScheduler:
         # Check for missed medications every 2 hours
         self.scheduler.add_job(
             func=self.check_missed_medications,
-            trigger=CronTrigger(minute=0, second=0),  # Every hour
+            trigger=CronTrigger(minute=0, second=0, jitter=30),  # Every hour
             id='adherence_monitoring',
             name='Medication Adherence Monitoring',
-            replace_existing=True
+            replace_existing=True,
+            # A late or backed-up run collapses into one instead of piling up
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=300
         )
         
         logger.info("Adherence monitoring scheduled")
     
+    def _create_checkin_reminders(self, checkin_type: str, title: str) -> int:
+        """Create one check-in reminder per user in a single transaction; returns the user count"""
+        users = UserCRUD.get_all_users()
+        scheduled_time = now_central()
+        
+        ReminderCRUD.create_reminders([
+            {
+                "user_id": user.id,
+                "reminder_type": "checkin",
+                "title": title,
+                "message": self.companion_agent.conduct_daily_checkin(user.id, checkin_type)["prompt"],
+                "scheduled_time": scheduled_time
+            }
+            for user in users
+        ])
+        return len(users)
+    
     def morning_checkin(self):
         """Perform morning check-in for all users"""
         try:
-            users = UserCRUD.get_all_users()
-            
-            for user in users:
-                # Create a reminder for morning check-in
-                checkin = self.companion_agent.conduct_daily_checkin(user.id, "morning")
-                
-                ReminderCRUD.create_reminder(
-                    user_id=user.id,
-                    reminder_type="checkin",
-                    title="Morning Check-in",
-                    message=checkin["prompt"],
-                    scheduled_time=now_central()
-                )
-            
-            logger.info(f"Morning check-in completed for {len(users)} users")
+            count = self._create_checkin_reminders("morning", "Morning Check-in")
+            logger.info(f"Morning check-in completed for {count} users")
             
         except Exception as e:
             logger.error(f"Morning check-in failed: {e}")
@@ -251,20 +256,8 @@ class ReminderScheduler:
     def afternoon_checkin(self):
         """Perform afternoon check-in for all users"""
         try:
-            users = UserCRUD.get_all_users()
-            
-            for user in users:
-                checkin = self.companion_agent.conduct_daily_checkin(user.id, "afternoon")
-                
-                ReminderCRUD.create_reminder(
-                    user_id=user.id,
-                    reminder_type="checkin",
-                    title="Afternoon Check-in",
-                    message=checkin["prompt"],
-                    scheduled_time=now_central()
-                )
-            
-            logger.info(f"Afternoon check-in completed for {len(users)} users")
+            count = self._create_checkin_reminders("afternoon", "Afternoon Check-in")
+            logger.info(f"Afternoon check-in completed for {count} users")
             
         except Exception as e:
             logger.error(f"Afternoon check-in failed: {e}")
@@ -272,20 +265,8 @@ class ReminderScheduler:
     def evening_checkin(self):
         """Perform evening check-in for all users"""
         try:
-            users = UserCRUD.get_all_users()
-            
-            for user in users:
-                checkin = self.companion_agent.conduct_daily_checkin(user.id, "evening")
-                
-                ReminderCRUD.create_reminder(
-                    user_id=user.id,
-                    reminder_type="checkin",
-                    title="Evening Check-in",
-                    message=checkin["prompt"],
-                    scheduled_time=now_central()
-                )
-            
-            logger.info(f"Evening check-in completed for {len(users)} users")
+            count = self._create_checkin_reminders("evening", "Evening Check-in")
+            logger.info(f"Evening check-in completed for {count} users")
             
         except Exception as e:
             logger.error(f"Evening check-in failed: {e}")
@@ -293,10 +274,10 @@ class ReminderScheduler:
     def medication_reminder(self, user_id: int, medication_id: int):
         """Send medication reminder to specific user"""
         try:
-            medication = MedicationCRUD.get_user_medications(user_id)
-            medication = next((med for med in medication if med.id == medication_id), None)
+            medication = MedicationCRUD.get_medication(medication_id)
             
-            if not medication:
+            # Inactive medications were excluded by the old per-user active list
+            if not medication or medication.user_id != user_id or not medication.active:
                 logger.error(f"Medication {medication_id} not found for user {user_id}")
                 return
             
@@ -326,16 +307,15 @@ class ReminderScheduler:
             users = UserCRUD.get_all_users()
             current_time = now_central()
             
+            # Last-24-hour adherence and last-2-hour missed doses for every
+            # user in two grouped queries
+            adherence_by_user = MedicationLogCRUD.get_adherence_all_users(days=1, now=current_time)
+            missed_by_user = MedicationLogCRUD.count_recent_missed_all_users(hours=2, now=current_time)
+            no_adherence = {"total": 0, "taken": 0, "missed": 0, "adherence_rate": 0}
+            
             for user in users:
-                # Get medication adherence for last 24 hours
-                adherence = MedicationLogCRUD.get_medication_adherence(user.id, days=1)
-                
-                # Check for missed medications in the last 2 hours
-                recent_missed = 0
-                for log in adherence.get("logs", []):
-                    if (log.status == "missed" and 
-                        current_time - log.scheduled_time < timedelta(hours=2)):
-                        recent_missed += 1
+                adherence = adherence_by_user.get(user.id, no_adherence)
+                recent_missed = missed_by_user.get(user.id, 0)
                 
                 # Alert if adherence is below 80% or recent missed doses
                 if adherence.get("adherence_rate", 100) < 80 or recent_missed > 0:
@@ -360,17 +340,20 @@ class ReminderScheduler:
         """Generate weekly summary reports for caregivers"""
         try:
             users = UserCRUD.get_all_users()
+            report_time = now_central()
+            
+            # Adherence and mood for every user in two grouped queries
+            from app.database.crud import ConversationCRUD
+            adherence_by_user = MedicationLogCRUD.get_adherence_all_users(days=7, now=report_time)
+            mood_by_user = ConversationCRUD.get_sentiment_stats_all_users(days=7, now=report_time)
+            no_adherence = {"total": 0, "taken": 0, "missed": 0, "adherence_rate": 0}
             
             for user in users:
                 # Get adherence data
-                adherence = MedicationLogCRUD.get_medication_adherence(user.id, days=7)
+                adherence = adherence_by_user.get(user.id, no_adherence)
                 
                 # Get mood data
-                from app.database.crud import ConversationCRUD
-                conversations = ConversationCRUD.get_recent_sentiment_data(user.id, days=7)
-                
-                mood_scores = [c.sentiment_score for c in conversations if c.sentiment_score is not None]
-                avg_mood = sum(mood_scores) / len(mood_scores) if mood_scores else 0
+                avg_mood, conversation_count = mood_by_user.get(user.id, (0, 0))
                 
                 report = f"""Weekly Report for {user.name}:
                 
@@ -381,7 +364,7 @@ Medication Adherence:
 
 Mood & Wellbeing:
 - Average mood: {avg_mood:.2f} (scale: -1 to 1)
-- Total conversations: {len(conversations)}
+- Total conversations: {conversation_count}
 - Mood trend: {'Positive' if avg_mood > 0.2 else 'Neutral' if avg_mood > -0.2 else 'Concerning'}
 
 Recommendations:
@@ -271,7 +271,9 @@ def initialize_sample_data():
         
         print(f"Created {len(sample_conversations_user1) + len(sample_conversations_user2)} sample conversations")
         
-        # Create sample medication logs (showing some adherence patterns)
+        # Create sample medication logs (showing some adherence patterns),
+        # written in a single transaction below
+        medication_logs = []
         # Dorothy's medication logs - good adherence with a few missed doses
         for i in range(7):  # Last 7 days
             day = now_central() - timedelta(days=i)
@@ -279,43 +281,43 @@ def initialize_sample_data():
             # Lisinopril (morning)
             morning_time = day.replace(hour=9, minute=0, second=0, microsecond=0)
             status = "taken" if i not in [1, 4] else "missed"  # Missed on day 1 and 4
-            MedicationLogCRUD.log_medication_taken(
+            medication_logs.append(dict(
                 user_id=user1.id,
                 medication_id=med1.id,
                 scheduled_time=morning_time,
                 taken_time=morning_time + timedelta(minutes=15) if status == "taken" else None,
                 status=status
-            )
+            ))
             
             # Metformin (morning and evening)
             morning_metformin = day.replace(hour=8, minute=0, second=0, microsecond=0)
             evening_metformin = day.replace(hour=20, minute=0, second=0, microsecond=0)
             
-            MedicationLogCRUD.log_medication_taken(
+            medication_logs.append(dict(
                 user_id=user1.id,
                 medication_id=med2.id,
                 scheduled_time=morning_metformin,
                 taken_time=morning_metformin + timedelta(minutes=10) if i != 1 else None,
                 status="taken" if i != 1 else "missed"
-            )
+            ))
             
-            MedicationLogCRUD.log_medication_taken(
+            medication_logs.append(dict(
                 user_id=user1.id,
                 medication_id=med2.id,
                 scheduled_time=evening_metformin,
                 taken_time=evening_metformin + timedelta(minutes=5) if i not in [1, 4] else None,
                 status="taken" if i not in [1, 4] else "missed"
-            )
+            ))
             
             # Vitamin D
             vitamin_d_time = day.replace(hour=9, minute=5, second=0, microsecond=0)
-            MedicationLogCRUD.log_medication_taken(
+            medication_logs.append(dict(
                 user_id=user1.id,
                 medication_id=med3.id,
                 scheduled_time=vitamin_d_time,
                 taken_time=vitamin_d_time + timedelta(minutes=5),
                 status="taken"  # Dorothy is consistent with vitamins
-            )
+            ))
         
         # Robert's medication logs - very good adherence
         for i in range(7):
@@ -323,24 +325,26 @@ def initialize_sample_data():
             
             # Atorvastatin (evening)
             evening_time = day.replace(hour=21, minute=0, second=0, microsecond=0)
-            MedicationLogCRUD.log_medication_taken(
+            medication_logs.append(dict(
                 user_id=user2.id,
                 medication_id=med4.id,
                 scheduled_time=evening_time,
                 taken_time=evening_time + timedelta(minutes=10),
                 status="taken"
-            )
+            ))
             
             # Aspirin (morning)
             morning_aspirin = day.replace(hour=9, minute=0, second=0, microsecond=0)
             status = "taken" if i != 2 else "missed"  # Only missed once
-            MedicationLogCRUD.log_medication_taken(
+            medication_logs.append(dict(
                 user_id=user2.id,
                 medication_id=med5.id,
                 scheduled_time=morning_aspirin,
                 taken_time=morning_aspirin + timedelta(minutes=5) if status == "taken" else None,
                 status=status
-            )
+            ))
+        
+        MedicationLogCRUD.log_medications_taken(medication_logs)
         
         print("Created sample medication logs")
         
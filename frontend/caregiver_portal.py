@@ -58,9 +58,9 @@ def show_caregiver_dashboard():
         return
     
     # Patient selector
-    patient_options = {f"{p.name} (ID: {p.id})": p.id for p in patients}
-    selected_patient_key = st.selectbox("Select Patient:", list(patient_options.keys()))
-    selected_patient_id = patient_options[selected_patient_key]
+    selected_patient = st.selectbox("Select Patient:", patients,
+                                    format_func=lambda p: f"{p.name} (ID: {p.id})")
+    selected_patient_id = selected_patient.id
     
     # Tabs for different views
     tab1, tab2, tab3, tab4 = st.tabs([
@@ -96,9 +96,12 @@ def show_patient_overview(patient_id: int):
         st.metric("7-Day Adherence", f"{adherence.get('adherence_rate', 0):.0f}%")
     
     with col2:
-        conversations = ConversationCRUD.get_recent_sentiment_data(patient_id, days=7)
-        if conversations:
-            avg_mood = sum(c.sentiment_score for c in conversations if c.sentiment_score) / len([c for c in conversations if c.sentiment_score])
+        # (date, average, count) per day, aggregated in SQL; also feeds the mood chart
+        daily_mood_rows = ConversationCRUD.get_daily_mood(patient_id, days=7)
+        mood_count = sum(count for _, _, count in daily_mood_rows)
+        if mood_count:
+            # A neutral 0.0 score is a real score, not missing data
+            avg_mood = sum(avg * count for _, avg, count in daily_mood_rows) / mood_count
             mood_emoji = get_sentiment_emoji(avg_mood)
             st.metric("Avg Mood (7d)", f"{mood_emoji} {avg_mood:.2f}")
         else:
@@ -121,17 +124,14 @@ def show_patient_overview(patient_id: int):
     with col1:
         st.subheader("Medication Adherence Trend")
         if adherence.get("logs"):
-            df = pd.DataFrame([
-                {
-                    "date": log.scheduled_time.date(),
-                    "status": "Taken" if log.status == "taken" else "Missed"
-                }
-                for log in adherence["logs"]
-            ])
+            logs = adherence["logs"]
+            df = pd.DataFrame({
+                "date": [log.scheduled_time.date() for log in logs],
+                "status": ["Taken" if log.status == "taken" else "Missed" for log in logs]
+            })
             
-            daily_adherence = df.groupby("date").apply(
-                lambda x: (x["status"] == "Taken").sum() / len(x) * 100
-            ).reset_index(name="adherence_rate")
+            daily_adherence = (df["status"] == "Taken").groupby(
+                df["date"]).mean().mul(100).reset_index(name="adherence_rate")
             daily_adherence["date"] = pd.to_datetime(daily_adherence["date"])
             
             fig = px.line(
@@ -141,33 +141,22 @@ def show_patient_overview(patient_id: int):
                 range_y=[0, 100]
             )
             fig.add_hline(y=80, line_dash="dash", line_color="orange")
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True, key="caregiver_adherence_trend")
         else:
             st.info("No medication data available")
     
     with col2:
         st.subheader("Mood Trend")
-        if conversations:
-            df_mood = pd.DataFrame([
-                {
-                    "date": conv.timestamp.date(),
-                    "sentiment_score": conv.sentiment_score
-                }
-                for conv in conversations
-                if conv.sentiment_score is not None
-            ])
-            
-            daily_mood = df_mood.groupby("date")["sentiment_score"].mean().reset_index()
-            daily_mood["date"] = pd.to_datetime(daily_mood["date"])
-            
+        if daily_mood_rows:
+            # A few points already aggregated; plot the lists without a DataFrame
             fig = px.line(
-                daily_mood, 
-                x="date", 
-                y="sentiment_score",
+                x=[day for day, _, _ in daily_mood_rows],
+                y=[round(avg, 2) for _, avg, _ in daily_mood_rows],
+                labels={"x": "date", "y": "sentiment_score"},
                 range_y=[-1, 1]
             )
             fig.add_hline(y=0, line_dash="dash", line_color="gray")
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True, key="caregiver_mood_trend")
         else:
             st.info("No mood data available")
 
@@ -213,7 +202,6 @@ def show_patient_medications(patient_id: int):
     st.subheader("Medication Schedule & History")
     
     from app.database.crud import MedicationCRUD
-    import json
     
     medications = MedicationCRUD.get_user_medications(patient_id)
     
@@ -221,6 +209,8 @@ def show_patient_medications(patient_id: int):
         st.info("No medications on file")
         return
     
+    recent_logs = MedicationLogCRUD.get_medication_logs(patient_id, days=7)
+    
     for med in medications:
         with st.expander(f"{med.name} - {med.dosage}"):
             col1, col2 = st.columns(2)
@@ -228,14 +218,12 @@ def show_patient_medications(patient_id: int):
             with col1:
                 st.write(f"**Frequency:** {med.frequency}")
                 if med.schedule_times:
-                    times = json.loads(med.schedule_times)
-                    st.write(f"**Schedule:** {', '.join(times)}")
+                    st.write(f"**Schedule:** {', '.join(med.schedule_times_list)}")
                 if med.instructions:
                     st.write(f"**Instructions:** {med.instructions}")
             
             with col2:
-                adherence = MedicationLogCRUD.get_medication_adherence(patient_id, days=7)
-                med_logs = [log for log in adherence.get("logs", []) if log.medication_id == med.id]
+                med_logs = [log for log in recent_logs if log.medication_id == med.id]
                 
                 if med_logs:
                     st.write("**Recent Activity (Last 7 days):**")
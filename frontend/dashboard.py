@@ -3,9 +3,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, time
-import json
+from collections import defaultdict
 import os
+import re
 import requests
+from bisect import bisect_left
 import time as time_module
 from typing import List, Dict, Any
 from streamlit_mic_recorder import speech_to_text
@@ -16,10 +18,15 @@ from app.database.crud import (UserCRUD, MedicationCRUD, ConversationCRUD,
                                CaregiverAlertCRUD, CaregiverPatientCRUD)
 from app.agents.companion_agent import CompanionAgent
 from utils.sentiment_analysis import analyze_sentiment, get_sentiment_emoji, get_sentiment_color
-from utils.telegram_notification import send_emergency_alert
-from utils.tts_helper import generate_speech_audio
+from utils.telegram_notification import send_emergency_alert, send_emergency_alerts
+from utils.tts_helper import generate_speech_audio, prefetch_speech_audio
 from utils.timezone_utils import format_central_time, to_central, now_central
 
+# A whole line holding a YouTube link, with its line break; music replies
+# put the video URL on its own line
+_YOUTUBE_LINE_RE = re.compile(r"^[^\n]*(?:youtube\.com/watch\?v=|youtu\.be/)[^\n]*(?:\n|$)",
+                              re.MULTILINE)
+
 
 def apply_elderly_friendly_styling():
     """Apply elderly-friendly CSS styling with soft pastel colors and smooth transitions"""
@@ -444,6 +451,41 @@ def apply_elderly_friendly_styling():
     """, unsafe_allow_html=True)
 
 
+@st.cache_resource(show_spinner=False)
+def _get_companion_agent() -> CompanionAgent:
+    """Process-wide CompanionAgent shared by every browser session"""
+    # The agent's caches and memory are keyed by user, so sessions can share it
+    return CompanionAgent()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_user_options() -> Dict[int, str]:
+    """Sidebar user choices as {id: name}; shared across reruns for a short while"""
+    # Plain values, not ORM rows, so Streamlit can pickle the cached result
+    return {user.id: user.name for user in UserCRUD.get_all_users()}
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _daily_mood_figure(days: tuple, scores: tuple) -> go.Figure:
+    """Daily average mood line chart; rebuilt only when the data changes"""
+    # At most one point per day, so plot the lists without a DataFrame
+    fig_mood = px.line(x=list(days),
+                       y=list(scores),
+                       labels={"x": "date", "y": "sentiment_score"},
+                       title="Daily Average Mood",
+                       range_y=[-1, 1])
+    fig_mood.add_hline(y=0, line_dash="dash", line_color="gray")
+    fig_mood.add_hline(y=0.3,
+                       line_dash="dot",
+                       line_color="green",
+                       annotation_text="Good mood")
+    fig_mood.add_hline(y=-0.3,
+                       line_dash="dot",
+                       line_color="red",
+                       annotation_text="Concerning")
+    return fig_mood
+
+
 def format_time_central(dt: datetime, format_str: str = "%I:%M %p %Z") -> str:
     """Format datetime in Central Time for display"""
     if dt is None:
@@ -456,10 +498,6 @@ def run_dashboard():
     # Apply elderly-friendly styling
     apply_elderly_friendly_styling()
 
-    # Initialize session state
-    if 'companion_agent' not in st.session_state:
-        st.session_state.companion_agent = CompanionAgent()
-
     # Sidebar for user selection and navigation
     with st.sidebar:
         # Add CSS to fix sidebar width and reduce spacing
@@ -574,21 +612,19 @@ def run_dashboard():
             st.markdown("<div style='margin: 1.5rem 0;'></div>", unsafe_allow_html=True)
         
         st.markdown("<h3 style='margin-bottom: 0.1rem; margin-top: 0; font-size: 1.4rem; display: flex; align-items: center;'>👤 User</h3>", unsafe_allow_html=True)
-        users = UserCRUD.get_all_users()
+        # Re-read at most every 30 seconds instead of on every widget click
+        user_options = _cached_user_options()
 
-        if not users:
+        if not user_options:
             st.error("No users found. Please add users first.")
             show_user_management()
             return
 
-        user_options = {
-            f"{user.name}": user.id
-            for user in users
-        }
-        selected_user_key = st.selectbox("",
-                                         list(user_options.keys()),
-                                         label_visibility="collapsed")
-        selected_user_id = user_options[selected_user_key]
+        # The widget holds the user id itself; names are only for display
+        selected_user_id = st.selectbox("",
+                                        user_options,
+                                        format_func=user_options.__getitem__,
+                                        label_visibility="collapsed")
 
         st.markdown("<div style='margin: 1.2rem 0;'></div>", unsafe_allow_html=True)
 
@@ -942,7 +978,14 @@ def show_overview(user_id: int):
                 continue
             
             try:
-                schedule_times = json.loads(med.schedule_times) if isinstance(med.schedule_times, str) else med.schedule_times
+                schedule_times = med.schedule_times_list
+                
+                # Get TODAY's medication logs for this user and medication
+                today_logs = MedicationLogCRUD.get_today_medication_logs(
+                    user_id=user_id,
+                    medication_id=med.id,
+                    now=current_time
+                )
                 
                 for scheduled_time_str in schedule_times:
                     # Parse the scheduled time
@@ -955,12 +998,6 @@ def show_overview(user_id: int):
                     scheduled_datetime = dt.combine(current_time.date(), scheduled_time)
                     scheduled_datetime_central = to_central(scheduled_datetime)
                     
-                    # Get TODAY's medication logs for this user and medication
-                    today_logs = MedicationLogCRUD.get_today_medication_logs(
-                        user_id=user_id,
-                        medication_id=med.id
-                    )
-                    
                     # Check if any log matches this scheduled dose
                     # For medications taken once daily, any log today counts
                     # For multiple doses per day, match within 4 hours window
@@ -1211,16 +1248,14 @@ def show_emergency_safety_sheet(user_id: int, concerns: list, severity: str,
             alert_sent = False
 
             if caregivers:
-                for caregiver in caregivers:
-                    if caregiver.telegram_chat_id:
-                        result = send_emergency_alert(
-                            chat_id=caregiver.telegram_chat_id,
-                            patient_name=user.name,
-                            concerns=concerns,
-                            severity=severity,
-                            message=message)
-                        if result.get("success"):
-                            alert_sent = True
+                # Notify all caregivers at once rather than one after another
+                results = send_emergency_alerts(
+                    chat_ids=[c.telegram_chat_id for c in caregivers if c.telegram_chat_id],
+                    patient_name=user.name,
+                    concerns=concerns,
+                    severity=severity,
+                    message=message)
+                alert_sent = any(result.get("success") for result in results)
 
             if not alert_sent and os.getenv("TELEGRAM_CHAT_ID"):
                 result = send_emergency_alert(
@@ -1524,8 +1559,8 @@ def show_chat_interface(user_id: int):
 
     # Load recent conversations
     if not st.session_state.chat_history:
-        recent_convs = ConversationCRUD.get_user_conversations(user_id,
-                                                               limit=10)
+        recent_convs = ConversationCRUD.get_recent_exchanges(user_id,
+                                                             limit=10)
         for conv in reversed(recent_convs):
             st.session_state.chat_history.append({
                 "role": "user",
@@ -1552,7 +1587,7 @@ def show_chat_interface(user_id: int):
         
         if should_greet and not st.session_state.proactive_greeting_sent:
             try:
-                proactive_message = st.session_state.companion_agent.generate_proactive_greeting(user_id)
+                proactive_message = _get_companion_agent().generate_proactive_greeting(user_id)
                 if proactive_message:
                     # Add to chat history
                     st.session_state.chat_history.append({
@@ -1575,11 +1610,57 @@ def show_chat_interface(user_id: int):
                 # Silently fail if greeting generation fails
                 pass
 
+    # Reminders, chat history, input and quick actions rerun on their own,
+    # without re-running the page header and mood analysis on every turn
+    _chat_fragment(user_id, user.name)
+
+    # Mood analysis (removed quick action buttons)
+    if st.session_state.get('show_mood_analysis', False):
+        st.subheader("📈 Conversation Mood Analysis")
+
+        conversations = ConversationCRUD.get_recent_sentiment_data(user_id,
+                                                                   days=7)
+        if conversations:
+            # Create sentiment chart
+            scored = [conv for conv in conversations if conv.sentiment_score is not None]
+            df = pd.DataFrame({
+                "timestamp": [conv.timestamp for conv in scored],
+                "sentiment_score": [conv.sentiment_score for conv in scored],
+                "sentiment_label": [conv.sentiment_label for conv in scored]
+            })
+            # Scores are shown to two decimals; rounding keeps the chart's
+            # serialized JSON short (0.73 instead of 0.7312345678901234)
+            df["sentiment_score"] = df["sentiment_score"].round(2)
+
+            # One point per message, so this chart grows with chat volume;
+            # draw it with WebGL rather than one SVG node per point
+            fig = px.line(df,
+                          x="timestamp",
+                          y="sentiment_score",
+                          title="Mood Trends Over Time",
+                          color_discrete_sequence=["#1f77b4"],
+                          render_mode="webgl")
+            fig.add_hline(y=0, line_dash="dash", line_color="gray")
+            fig.update_layout(yaxis_title="Mood Score",
+                              xaxis_title="Time",
+                              yaxis_range=[-1, 1])
+
+            st.plotly_chart(fig, use_container_width=True, key="chat_mood_trend")
+        else:
+            st.info("No mood data available yet. Keep chatting with Carely!")
+
+
+@st.fragment
+def _chat_fragment(user_id: int, user_name: str):
+    """Chat history, input and quick actions; reruns without the rest of the page"""
     # Check for pending reminders and display them proactively
     if 'reminders_displayed' not in st.session_state:
         st.session_state.reminders_displayed = set()
 
-    pending_reminders = ReminderCRUD.get_pending_reminders(user_id)
+    # Only fetch reminders this session hasn't shown yet
+    pending_reminders = ReminderCRUD.get_pending_reminders(
+        user_id, exclude_ids=st.session_state.reminders_displayed)
+    shown_ids = []
     for reminder in pending_reminders:
         if reminder.id not in st.session_state.reminders_displayed:
             # Add reminder to chat as an assistant message
@@ -1606,9 +1687,10 @@ def show_chat_interface(user_id: int):
             })
 
             st.session_state.reminders_displayed.add(reminder.id)
+            shown_ids.append(reminder.id)
 
-            # Mark reminder as displayed (completed)
-            ReminderCRUD.complete_reminder(reminder.id)
+    # Mark the reminders just shown as displayed (completed) in one UPDATE
+    ReminderCRUD.complete_reminders(shown_ids)
 
     # Chat container
     chat_container = st.container()
@@ -1632,23 +1714,13 @@ def show_chat_interface(user_id: int):
                         content = message["content"]
 
                         # Check if message contains YouTube URL and embed it
-                        if "youtube.com/watch?v=" in content or "youtu.be/" in content:
-                            lines = content.split("\n")
-                            text_lines = []
-                            video_url = None
-
-                            for line in lines:
-                                if "youtube.com/watch?v=" in line or "youtu.be/" in line:
-                                    video_url = line.strip()
-                                else:
-                                    text_lines.append(line)
+                        video_lines = _YOUTUBE_LINE_RE.findall(content)
+                        if video_lines:
+                            # Display text first (the URL lines removed)
+                            st.write(_YOUTUBE_LINE_RE.sub("", content))
 
-                            # Display text first
-                            st.write("\n".join(text_lines))
-
-                            # Embed YouTube video
-                            if video_url:
-                                st.video(video_url)
+                            # Embed YouTube video (the last URL line wins)
+                            st.video(video_lines[-1].strip())
                         else:
                             st.write(content)
 
@@ -1657,7 +1729,7 @@ def show_chat_interface(user_id: int):
                                      key=f"listen_{idx}",
                                      help="Listen to this message"):
                             st.session_state.playing_audio = idx
-                            st.rerun()
+                            st.rerun(scope="fragment")
 
                     if st.session_state.playing_audio == idx:
                         audio_bytes = generate_speech_audio(message["content"],
@@ -1702,10 +1774,10 @@ def show_chat_interface(user_id: int):
                     "quick_actions": []
                 })
             
-            st.rerun()
+            st.rerun(scope="fragment")
 
         elif action == "play_music":
-            music_data = st.session_state.companion_agent.handle_play_music()
+            music_data = _get_companion_agent().handle_play_music()
             st.session_state.chat_history.append({
                 "role":
                 "assistant",
@@ -1715,10 +1787,10 @@ def show_chat_interface(user_id: int):
                 now_central(),
                 "quick_actions": ["fun_corner", "memory_cue"]
             })
-            st.rerun()
+            st.rerun(scope="fragment")
 
         elif action == "fun_corner":
-            joke_or_puzzle = st.session_state.companion_agent.handle_fun_corner(
+            joke_or_puzzle = _get_companion_agent().handle_fun_corner(
                 "joke")
             message_text = f"Here's a joke for you! 😊\n\n{joke_or_puzzle}"
             st.session_state.chat_history.append({
@@ -1730,10 +1802,10 @@ def show_chat_interface(user_id: int):
                 now_central(),
                 "quick_actions": ["play_music", "memory_cue"]
             })
-            st.rerun()
+            st.rerun(scope="fragment")
 
         elif action == "memory_cue":
-            memory_question = st.session_state.companion_agent.generate_memory_cue(
+            memory_question = _get_companion_agent().generate_memory_cue(
                 user_id)
             st.session_state.chat_history.append({
                 "role":
@@ -1744,7 +1816,7 @@ def show_chat_interface(user_id: int):
                 now_central(),
                 "quick_actions": ["fun_corner", "play_music"]
             })
-            st.rerun()
+            st.rerun(scope="fragment")
 
     # Integrated input bar with voice and text
     st.markdown("<hr style='margin: 0.5rem 0;'>", unsafe_allow_html=True)
@@ -1795,7 +1867,7 @@ def show_chat_interface(user_id: int):
         # Text input
         text_input = st.text_input(
             "Message",
-            placeholder=f"Type your message here, {user.name}...",
+            placeholder=f"Type your message here, {user_name}...",
             key=f"chat_text_{user_id}",
             label_visibility="collapsed"
         )
@@ -1822,27 +1894,27 @@ def show_chat_interface(user_id: int):
     with action_col1:
         if st.button("🕐 Log\nMedication", key="persistent_log_med", use_container_width=True):
             st.session_state.pending_action = "log_medication"
-            st.rerun()
+            st.rerun(scope="fragment")
     
     with action_col2:
         if st.button("🎵 Play\nMusic", key="persistent_play_music", use_container_width=True):
             st.session_state.pending_action = "play_music"
-            st.rerun()
+            st.rerun(scope="fragment")
     
     with action_col3:
         if st.button("🧩 Fun\nCorner", key="persistent_fun_corner", use_container_width=True):
             st.session_state.pending_action = "fun_corner"
-            st.rerun()
+            st.rerun(scope="fragment")
     
     with action_col4:
         if st.button("🧠 Memory\nCue", key="persistent_memory_cue", use_container_width=True):
             st.session_state.pending_action = "memory_cue"
-            st.rerun()
+            st.rerun(scope="fragment")
     
     with action_col5:
         if st.button("🎮 Memory\nGame", key="persistent_memory_game", use_container_width=True):
             st.session_state.show_memory_game = True
-            st.rerun()
+            st.rerun()  # The game replaces the whole chat page
 
     # Handle Enter key press using session state
     if text_input and text_input != st.session_state.get(f'last_input_{user_id}', ''):
@@ -1887,7 +1959,7 @@ def show_chat_interface(user_id: int):
                 if medication_id:
                     # Log the medication
                     with st.spinner("Logging your medication..."):
-                        log_result = st.session_state.companion_agent.log_medication_tool(
+                        log_result = _get_companion_agent().log_medication_tool(
                             user_id=user_id,
                             medication_id=medication_id
                         )
@@ -1917,13 +1989,11 @@ def show_chat_interface(user_id: int):
             # Normal conversation flow
             # Generate AI response
             with st.chat_message("assistant", avatar="🏥"):
-                with st.spinner("Carely is thinking..."):
-                    response_data = st.session_state.companion_agent.generate_response(
-                        user_id=user_id, user_message=prompt)
-
-                st.write(response_data["response"])
-
-                st.write(response_data["response"])
+                # Show the reply as it streams in
+                response_stream = _get_companion_agent().generate_response_stream(
+                    user_id=user_id, user_message=prompt)
+                st.write_stream(response_stream)
+                response_data = response_stream.result
 
                 # Show sentiment if available
                 if response_data.get("sentiment_score") is not None:
@@ -1949,6 +2019,8 @@ def show_chat_interface(user_id: int):
                 "quick_actions":
                 response_data.get("quick_actions", [])
             })
+            # Have the reply's audio ready if the user presses 🔊
+            prefetch_speech_audio(response_data["response"], slow=True)
 
             # Check for emergency
             if response_data.get("is_emergency") and not st.session_state.get(
@@ -1962,36 +2034,12 @@ def show_chat_interface(user_id: int):
         # Clear the input field after sending
         st.session_state[f'clear_input_{user_id}'] = True
         
-        # Rerun to show the new messages
-        st.rerun()
-
-    # Mood analysis (removed quick action buttons)
-    if st.session_state.get('show_mood_analysis', False):
-        st.subheader("📈 Conversation Mood Analysis")
-
-        conversations = ConversationCRUD.get_recent_sentiment_data(user_id,
-                                                                   days=7)
-        if conversations:
-            # Create sentiment chart
-            df = pd.DataFrame([{
-                "timestamp": conv.timestamp,
-                "sentiment_score": conv.sentiment_score,
-                "sentiment_label": conv.sentiment_label
-            } for conv in conversations if conv.sentiment_score is not None])
-
-            fig = px.line(df,
-                          x="timestamp",
-                          y="sentiment_score",
-                          title="Mood Trends Over Time",
-                          color_discrete_sequence=["#1f77b4"])
-            fig.add_hline(y=0, line_dash="dash", line_color="gray")
-            fig.update_layout(yaxis_title="Mood Score",
-                              xaxis_title="Time",
-                              yaxis_range=[-1, 1])
-
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No mood data available yet. Keep chatting with Carely!")
+        # Rerun to show the new messages; an emergency needs the full page
+        # for the safety sheet
+        if st.session_state.get("emergency_data") and not st.session_state.get(
+                "emergency_handled"):
+            st.rerun()
+        st.rerun(scope="fragment")
 
 
 def show_medication_management(user_id: int):
@@ -2001,6 +2049,16 @@ def show_medication_management(user_id: int):
 
     # Medication overview
     medications = MedicationCRUD.get_user_medications(user_id)
+    # One window of logs serves both the medication cards (last 7 days) and the
+    # adherence chart (the period chosen below; its widget state is read early)
+    days = 30 if st.session_state.get("adherence_period") == "Last 30 days" else 7
+    now = now_central()
+    window_logs = MedicationLogCRUD.get_medication_logs(user_id, days=days, now=now)
+    # Logs come back sorted by scheduled_time, so the last week is a suffix.
+    # SQLite hands scheduled_time back naive, so compare in Central Time
+    week_start = bisect_left(window_logs, now - timedelta(days=7),
+                             key=lambda log: to_central(log.scheduled_time))
+    recent_logs = window_logs[week_start:]
 
     if medications:
         st.subheader("Current Medications")
@@ -2037,6 +2095,11 @@ def show_medication_management(user_id: int):
             </style>
         """, unsafe_allow_html=True)
 
+        # Bucket the logs once instead of re-filtering them for every medication
+        logs_by_med = defaultdict(list)
+        for log in recent_logs:
+            logs_by_med[log.medication_id].append(log)
+
         for med in medications:
             with st.expander(f"{med.name} - {med.dosage}"):
                 col1, col2 = st.columns(2)
@@ -2044,20 +2107,14 @@ def show_medication_management(user_id: int):
                 with col1:
                     st.write(f"**Frequency:** {med.frequency}")
                     if med.schedule_times:
-                        times = json.loads(med.schedule_times)
-                        st.write(f"**Times:** {', '.join(times)}")
+                        st.write(f"**Times:** {', '.join(med.schedule_times_list)}")
                     if med.instructions:
                         st.write(f"**Instructions:** {med.instructions}")
                     st.write(f"**Active:** {'Yes' if med.active else 'No'}")
 
                 with col2:
                     # Recent logs for this medication
-                    adherence = MedicationLogCRUD.get_medication_adherence(
-                        user_id, days=7)
-                    med_logs = [
-                        log for log in adherence.get("logs", [])
-                        if log.medication_id == med.id
-                    ]
+                    med_logs = logs_by_med.get(med.id)
 
                     if med_logs:
                         st.write("**Recent Activity:**")
@@ -2091,7 +2148,8 @@ def show_medication_management(user_id: int):
                           key="adherence_period")
     days = 7 if period == "Last 7 days" else 30
 
-    adherence = MedicationLogCRUD.get_medication_adherence(user_id, days=days)
+    adherence = MedicationLogCRUD.get_medication_adherence(user_id, days=days,
+                                                           logs=window_logs)
 
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -2104,21 +2162,16 @@ def show_medication_management(user_id: int):
 
     # Adherence chart
     if adherence.get("logs"):
-        df = pd.DataFrame([{
-            "date":
-            log.scheduled_time.date(),
-            "status":
-            log.status,
-            "medication":
-            next((med.name
-                  for med in medications if med.id == log.medication_id),
-                 "Unknown")
-        } for log in adherence["logs"]])
-
-        # Group by date and calculate daily adherence
-        daily_adherence = df.groupby("date").apply(lambda x: (x[
-            "status"] == "taken").sum() / len(x) * 100).reset_index(
-                name="adherence_rate")
+        logs = adherence["logs"]
+        df = pd.DataFrame({
+            "date": [log.scheduled_time.date() for log in logs],
+            "status": [log.status for log in logs]
+        })
+
+        # Group by date and calculate daily adherence (vectorized mean of a
+        # taken flag, not a Python callback per group)
+        daily_adherence = (df["status"] == "taken").groupby(
+            df["date"]).mean().mul(100).reset_index(name="adherence_rate")
         daily_adherence["date"] = pd.to_datetime(daily_adherence["date"])
 
         fig = px.line(daily_adherence,
@@ -2132,7 +2185,7 @@ def show_medication_management(user_id: int):
                       annotation_text="Target: 80%")
         fig.update_layout(yaxis_title="Adherence Rate (%)", xaxis_title="Date")
 
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key="medication_adherence_trend")
 
     st.divider()
 
@@ -2206,10 +2259,11 @@ def show_health_insights(user_id: int):
         period = st.selectbox("Time Period:", ["7 days", "30 days", "90 days"])
         days = int(period.split()[0])
 
-    # Get data
-    conversations = ConversationCRUD.get_recent_sentiment_data(user_id,
-                                                               days=days)
-    adherence = MedicationLogCRUD.get_medication_adherence(user_id, days=days)
+    # Get data (mood is aggregated per day in SQL, not loaded row by row)
+    daily_mood_rows = ConversationCRUD.get_daily_mood(user_id, days=days)
+    conversation_count = sum(count for _, _, count in daily_mood_rows)
+    adherence = MedicationLogCRUD.get_medication_adherence(user_id, days=days,
+                                                           include_logs=False)
 
     # Summary metrics
     st.subheader("📈 Summary")
@@ -2217,16 +2271,11 @@ def show_health_insights(user_id: int):
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        if conversations:
-            # Filter conversations with valid sentiment scores (same as Overview page)
-            valid_sentiments = [c.sentiment_score for c in conversations if c.sentiment_score is not None]
-            
-            if valid_sentiments:
-                avg_mood = sum(valid_sentiments) / len(valid_sentiments)
-                mood_emoji = get_sentiment_emoji(avg_mood)
-                st.metric("Average Mood", f"{mood_emoji} {avg_mood:.2f}")
-            else:
-                st.metric("Average Mood", "No data")
+        if conversation_count:
+            # Mean over all scored conversations, weighting each day by its count
+            avg_mood = sum(avg * count for _, avg, count in daily_mood_rows) / conversation_count
+            mood_emoji = get_sentiment_emoji(avg_mood)
+            st.metric("Average Mood", f"{mood_emoji} {avg_mood:.2f}")
         else:
             st.metric("Average Mood", "No data")
 
@@ -2235,7 +2284,7 @@ def show_health_insights(user_id: int):
                   f"{adherence.get('adherence_rate', 0):.1f}%")
 
     with col3:
-        st.metric("Total Conversations", len(conversations))
+        st.metric("Total Conversations", conversation_count)
 
     with col4:
         alerts = CaregiverAlertCRUD.get_unresolved_alerts(user_id)
@@ -2244,50 +2293,26 @@ def show_health_insights(user_id: int):
     st.divider()
 
     # Charts
-    if conversations:
-        # Mood trend chart - convert to Central Time for proper date
+    if daily_mood_rows:
+        # Mood trend chart - dates are Central Time calendar days
         st.subheader("😊 Mood Trends")
 
-        df_mood = pd.DataFrame([{
-            "date": to_central(conv.timestamp).date(),
-            "sentiment_score": conv.sentiment_score,
-            "sentiment_label": conv.sentiment_label
-        } for conv in conversations if conv.sentiment_score is not None])
-
         # Daily average mood
-        daily_mood = df_mood.groupby(
-            "date")["sentiment_score"].mean().reset_index()
-        daily_mood["date"] = pd.to_datetime(daily_mood["date"])
-
-        fig_mood = px.line(daily_mood,
-                           x="date",
-                           y="sentiment_score",
-                           title="Daily Average Mood",
-                           range_y=[-1, 1])
-        fig_mood.add_hline(y=0, line_dash="dash", line_color="gray")
-        fig_mood.add_hline(y=0.3,
-                           line_dash="dot",
-                           line_color="green",
-                           annotation_text="Good mood")
-        fig_mood.add_hline(y=-0.3,
-                           line_dash="dot",
-                           line_color="red",
-                           annotation_text="Concerning")
-
-        st.plotly_chart(fig_mood, use_container_width=True)
+        fig_mood = _daily_mood_figure(
+            tuple(day for day, _, _ in daily_mood_rows),
+            tuple(round(avg, 2) for _, avg, _ in daily_mood_rows))
+
+        st.plotly_chart(fig_mood, use_container_width=True, key="insights_mood_trend")
 
     # Health recommendations
     st.subheader("💡 Health Recommendations")
 
     recommendations = []
 
-    if conversations:
-        recent_mood = [
-            c.sentiment_score for c in conversations[-7:]
-            if c.sentiment_score is not None
-        ]
-        if recent_mood:
-            avg_recent_mood = sum(recent_mood) / len(recent_mood)
+    if conversation_count:
+        # Mood over the last seven scored conversations, averaged in SQL
+        avg_recent_mood = ConversationCRUD.get_recent_mood_average(user_id, days=days, limit=7)
+        if avg_recent_mood is not None:
             if avg_recent_mood < -0.3:
                 recommendations.append(
                     "🟡 Recent mood trends show concern. Consider scheduling a check-in with healthcare provider."
@@ -2296,15 +2321,16 @@ def show_health_insights(user_id: int):
                 recommendations.append(
                     "🟢 Mood trends are positive! Keep up the good routine.")
 
-    if adherence.get("adherence_rate", 100) < 80:
+    adherence_rate = adherence.get("adherence_rate", 100)
+    if adherence_rate < 80:
         recommendations.append(
             "🔴 Medication adherence is below 80%. Consider setting more reminders or reviewing medication schedule."
         )
-    elif adherence.get("adherence_rate", 100) > 90:
+    elif adherence_rate > 90:
         recommendations.append(
             "🟢 Excellent medication adherence! Keep up the great work.")
 
-    if len(conversations) < 7 and days >= 7:
+    if conversation_count < 7 and days >= 7:
         recommendations.append(
             "🟡 Consider chatting with Carely more regularly for better mood tracking."
         )
@@ -2332,32 +2358,30 @@ def show_alerts_and_reminders(user_id: int):
         reminders = ReminderCRUD.get_pending_reminders(user_id)
 
         if reminders:
-            for reminder in reminders:
-                with st.container():
-                    col1, col2 = st.columns([3, 1])
-
-                    with col1:
-                        # Color code by type
-                        if reminder.reminder_type == "medication":
-                            st.markdown(f"💊 **{reminder.title}**")
-                        elif reminder.reminder_type == "checkin":
-                            st.markdown(f"💬 **{reminder.title}**")
-                        else:
-                            st.markdown(f"📅 **{reminder.title}**")
-
-                        st.write(reminder.message)
-                        st.caption(
-                            f"Scheduled: {format_time_central(reminder.scheduled_time, '%m/%d/%Y %I:%M %p')}"
-                        )
-
-                    with col2:
-                        if st.button("✅ Complete",
-                                     key=f"complete_{reminder.id}"):
-                            ReminderCRUD.complete_reminder(reminder.id)
-                            st.success("Reminder completed!")
-                            st.rerun()
+            # Icon by type
+            type_icons = {"medication": "💊", "checkin": "💬"}
+            labels = {
+                reminder.id:
+                f"{reminder.title} ({format_time_central(reminder.scheduled_time, '%m/%d %I:%M %p')})"
+                for reminder in reminders
+            }
 
-                    st.divider()
+            # The whole list as one markdown element rather than ~6 per reminder
+            st.markdown("\n\n---\n\n".join(
+                f"{type_icons.get(reminder.reminder_type, '📅')} **{reminder.title}**  \n"
+                f"{reminder.message}  \n"
+                f"*Scheduled: {format_time_central(reminder.scheduled_time, '%m/%d/%Y %I:%M %p')}*"
+                for reminder in reminders))
+
+            # Complete any number of reminders with one submit and one UPDATE
+            with st.form("complete_reminders_form"):
+                to_complete = st.multiselect("Mark as completed:",
+                                             list(labels),
+                                             format_func=labels.get)
+                if st.form_submit_button("✅ Complete") and to_complete:
+                    ReminderCRUD.complete_reminders(to_complete)
+                    st.success("Reminders completed!")
+                    st.rerun()
         else:
             st.info("No pending reminders")
 
@@ -2418,11 +2442,15 @@ def show_user_management():
 
     # Current users
     users = UserCRUD.get_all_users()
+    # Counts for every user at once, shared by the expanders and the statistics
+    stats_by_user = UserCRUD.get_dashboard_stats() if users else {}
+    no_stats = {"medication_count": 0, "last_conversation": None, "unresolved_alerts": 0}
 
     if users:
         st.subheader("Current Users")
 
         for user in users:
+            user_stats = stats_by_user.get(user.id, no_stats)
             with st.expander(f"{user.name} (ID: {user.id})"):
                 col1, col2 = st.columns(2)
 
@@ -2439,21 +2467,15 @@ def show_user_management():
                         f"**Created:** {format_time_central(user.created_at, '%m/%d/%Y')}"
                     )
                     if user.preferences:
-                        try:
-                            prefs = json.loads(user.preferences)
-                            st.write("**Preferences:**")
-                            for key, value in prefs.items():
-                                st.write(f"- {key}: {value}")
-                        except:
-                            st.write("**Preferences:** Invalid format")
+                        st.write("**Preferences:**")
+                        for key, value in user.preferences.items():
+                            st.write(f"- {key}: {value}")
 
                     # Quick stats
-                    conversations = ConversationCRUD.get_user_conversations(
-                        user.id, limit=1)
-                    medications = MedicationCRUD.get_user_medications(user.id)
-                    st.write(f"**Medications:** {len(medications)}")
+                    last_chat = user_stats["last_conversation"]
+                    st.write(f"**Medications:** {user_stats['medication_count']}")
                     st.write(
-                        f"**Last Chat:** {format_time_central(conversations[0].timestamp, '%m/%d/%Y') if conversations else 'Never'}"
+                        f"**Last Chat:** {format_time_central(last_chat, '%m/%d/%Y') if last_chat else 'Never'}"
                     )
 
     st.divider()
@@ -2498,6 +2520,7 @@ def show_user_management():
                         preferences=preferences,
                         emergency_contact=emergency_contact or None)
 
+                    _cached_user_options.clear()
                     st.success(
                         f"Added user {name} successfully! (ID: {new_user.id})")
                     st.rerun()
@@ -2519,28 +2542,21 @@ def show_user_management():
 
         with col2:
             # Users with medications
-            users_with_meds = 0
-            for user in users:
-                if MedicationCRUD.get_user_medications(user.id):
-                    users_with_meds += 1
+            users_with_meds = sum(
+                1 for stats in stats_by_user.values() if stats["medication_count"])
             st.metric("Users with Medications", users_with_meds)
 
         with col3:
             # Users with recent activity (last 7 days)
-            active_users = 0
-            for user in users:
-                conversations = ConversationCRUD.get_user_conversations(
-                    user.id, limit=1)
-                if conversations and (now_central() -
-                                      conversations[0].timestamp).days <= 7:
-                    active_users += 1
+            now = now_central()
+            active_users = sum(
+                1 for stats in stats_by_user.values()
+                if stats["last_conversation"] is not None
+                and (now - to_central(stats["last_conversation"])).days <= 7)
             st.metric("Active Users (7d)", active_users)
 
         with col4:
             # Users with alerts
-            users_with_alerts = 0
-            for user in users:
-                alerts = CaregiverAlertCRUD.get_unresolved_alerts(user.id)
-                if alerts:
-                    users_with_alerts += 1
+            users_with_alerts = sum(
+                1 for stats in stats_by_user.values() if stats["unresolved_alerts"])
             st.metric("Users with Alerts", users_with_alerts)
@@ -0,0 +1,20 @@
+"""Shared fixtures: every test runs against a throwaway SQLite database"""
+
+import pytest
+from sqlmodel import create_engine
+
+from app.database import crud, models
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the app at an empty database in tmp_path and reset the read caches"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'carely.db'}",
+                           connect_args={"check_same_thread": False})
+    monkeypatch.setattr(models, "engine", engine)
+    models.create_tables()
+    for cache in (crud._user_cache, crud._all_users_cache,
+                  crud._medication_cache, crud._upcoming_event_cache):
+        cache.clear()
+    yield engine
+    engine.dispose()
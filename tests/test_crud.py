@@ -0,0 +1,25 @@
+"""Tests for the CRUD layer's process-wide read caches"""
+
+import pytest
+
+from app.database.crud import MedicationCRUD, UserCRUD
+from app.database.models import session_scope
+
+
+def test_cached_rows_survive_a_rollback_in_the_request_session(db):
+    user = UserCRUD.create_user(name="Dorothy")
+    MedicationCRUD.create_medication(
+        user_id=user.id, name="Lisinopril", dosage="10mg",
+        frequency="daily", schedule_times=["08:00"])
+
+    with session_scope():
+        # Fill the caches from inside a request, then fail a nested scope
+        UserCRUD.get_user(user.id)
+        MedicationCRUD.get_user_medications(user.id)
+        with pytest.raises(RuntimeError):
+            with session_scope():
+                raise RuntimeError("boom")
+
+    # Read back from the caches after the request session is gone
+    assert UserCRUD.get_user(user.id).name == "Dorothy"
+    assert [med.name for med in MedicationCRUD.get_user_medications(user.id)] == ["Lisinopril"]
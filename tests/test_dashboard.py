@@ -0,0 +1,32 @@
+"""Smoke tests that render dashboard pages with streamlit's AppTest"""
+
+from datetime import timedelta
+
+from streamlit.testing.v1 import AppTest
+
+from app.database.crud import MedicationCRUD, MedicationLogCRUD, UserCRUD
+from utils.timezone_utils import now_central
+
+
+def _medication_page(user_id):
+    from frontend.dashboard import show_medication_management
+    show_medication_management(user_id)
+
+
+def test_medication_page_renders_with_logs(db):
+    user = UserCRUD.create_user(name="Dorothy")
+    med = MedicationCRUD.create_medication(
+        user_id=user.id, name="Lisinopril", dosage="10mg",
+        frequency="daily", schedule_times=["08:00"])
+    now = now_central()
+    # One log inside the last week and one older, so the week cut-off is exercised
+    MedicationLogCRUD.log_medication_taken(
+        user_id=user.id, medication_id=med.id, scheduled_time=now - timedelta(days=10))
+    MedicationLogCRUD.log_medication_taken(
+        user_id=user.id, medication_id=med.id, scheduled_time=now - timedelta(hours=1))
+
+    at = AppTest.from_function(_medication_page, args=(user.id,), default_timeout=30)
+    at.run()
+
+    assert not at.exception
+    assert any("Lisinopril" in expander.label for expander in at.expander)
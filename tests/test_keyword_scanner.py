@@ -0,0 +1,43 @@
+"""Tests that every KeywordScanner backend reports the same matches"""
+
+import importlib.util
+
+import pytest
+
+from utils import keyword_scanner
+from utils.keyword_scanner import KeywordScanner
+
+BACKENDS = ["hyperscan", "ahocorasick", "tokens"]
+
+CATEGORIES = {"symptom": ["pain", "dizzy", "chest pain"]}
+
+CASES = [
+    ("i'm in pain…", {"pain"}),
+    ("pain—it won't stop", {"pain"}),
+    ("she said “dizzy” twice", {"dizzy"}),
+    ("‘chest pain’ again", {"chest pain", "pain"}),
+    ("painful", set()),
+    ("pain’s gone", {"pain"}),  # unlike "'", a curly apostrophe is not a word character
+    ("pain's gone", set()),
+    ("naïvepain", set()),
+    ("épain", set()),  # a non-ASCII letter still joins words
+    ("café pain", {"pain"}),
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def scanner_factory(request, monkeypatch):
+    """Build scanners that use only the requested backend"""
+    backend = request.param
+    if backend != "tokens" and importlib.util.find_spec(backend) is None:
+        pytest.skip(f"{backend} is not installed")
+    if backend != "hyperscan":
+        monkeypatch.setattr(keyword_scanner, "hyperscan", None)
+    if backend != "ahocorasick":
+        monkeypatch.setattr(keyword_scanner, "ahocorasick", None)
+    return KeywordScanner
+
+
+@pytest.mark.parametrize("text, expected", CASES)
+def test_whole_word_matches_agree_across_backends(scanner_factory, text, expected):
+    assert scanner_factory(CATEGORIES).matched_keywords(text) == expected
@@ -0,0 +1,37 @@
+"""Regression tests for the companion agent's keyword-based (no API call) analyzers"""
+
+import pytest
+
+from app.agents.companion_agent import CompanionAgent
+
+
+@pytest.fixture
+def agent():
+    # The local analyzers don't touch any client, so skip __init__
+    return CompanionAgent.__new__(CompanionAgent)
+
+
+@pytest.mark.parametrize("message, severity", [
+    ("I have chest pains", "critical"),
+    ("My nose bleeds a lot", "critical"),
+    ("I keep getting dizzy spells", "critical"),
+    ("I have severe pains in my back", "high"),
+    ("There was blood in the sink", "high"),
+    ("My arm is bloody", "high"),
+    ("My knee hurts", "high"),
+    ("I've had headaches all week", "medium"),
+    ("I feel weaker today", "medium"),
+    ("We had a lovely lunch", "none"),
+])
+def test_emergency_detection_matches_inflections(agent, message, severity):
+    assert agent._local_emergency_detection(message, user_id=1)["severity"] == severity
+
+
+@pytest.mark.parametrize("message", [
+    "I have chest pains",
+    "I'm in pain",
+    "I had a fall yesterday",
+    "I'm feeling a bit confused",
+])
+def test_alert_keywords_notify_caregiver(agent, message):
+    assert agent.should_alert_caregiver(1, sentiment_score=0.0, message=message)
@@ -0,0 +1,47 @@
+"""Tests for the companion agent's two-tier response cache"""
+
+from app.agents.response_cache import ResponseCache
+from app.database.crud import MedicationCRUD, MedicationLogCRUD, UserCRUD
+from utils.timezone_utils import now_central
+
+
+def _fixed_embedding(texts):
+    # Every message looks identical to the semantic tier
+    return [[1.0, 0.0, 0.0] for _ in texts]
+
+
+def test_semantic_tier_only_serves_entries_stored_as_semantic():
+    cache = ResponseCache(embed_fn=_fixed_embedding)
+    cache.insert(1, "did I take my pills?", "ctx", "Yes, at 8am.", semantic=False)
+
+    assert cache.lookup(1, "did I take my pills?", "ctx") == "Yes, at 8am."
+    assert cache.lookup(1, "did I take my vitamins?", "ctx") is None
+
+
+def test_semantic_lookup_can_be_disabled():
+    cache = ResponseCache(embed_fn=_fixed_embedding)
+    cache.insert(1, "how are you?", "ctx", "I'm well, thank you!")
+
+    assert cache.lookup(1, "how are you doing?", "ctx") == "I'm well, thank you!"
+    assert cache.lookup(1, "how are you doing?", "ctx", semantic=False) is None
+
+
+def test_context_change_misses():
+    cache = ResponseCache()
+    cache.insert(1, "hello", "recent: a", "Hi!")
+
+    assert cache.lookup(1, "hello", "recent: a") == "Hi!"
+    assert cache.lookup(1, "hello", "recent: a\nrecent: b") is None
+
+
+def test_logging_a_dose_moves_the_log_version(db):
+    user = UserCRUD.create_user(name="Dorothy")
+    med = MedicationCRUD.create_medication(
+        user_id=user.id, name="Lisinopril", dosage="10mg",
+        frequency="daily", schedule_times=["08:00"])
+    before = MedicationLogCRUD.get_log_version(user.id)
+
+    MedicationLogCRUD.log_medication_taken(
+        user_id=user.id, medication_id=med.id, scheduled_time=now_central())
+
+    assert MedicationLogCRUD.get_log_version(user.id) != before
@@ -1,8 +1,6 @@
 from utils.timezone_utils import now_central
-import os
-from groq import Groq
+from utils.groq_client import get_groq_client
 from typing import Dict, Any
-import json
 import re
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
@@ -24,7 +22,7 @@ class EmergencyDetector:
     DEBOUNCE_MINUTES = 5
     
     def __init__(self):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.client = get_groq_client()
         self.model = "llama-3.3-70b-versatile"
     
     def _check_keywords(self, text: str) -> Dict[str, Any]:
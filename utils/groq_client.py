@@ -0,0 +1,48 @@
+"""
+Shared Groq client with a pooled, keep-alive HTTP connection
+All agents and analyzers use the same client so concurrent chats reuse
+warm TLS connections instead of each opening their own
+"""
+
+import os
+import threading
+
+import httpx
+from groq import Groq
+from dotenv import load_dotenv
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Load environment variables
+load_dotenv()
+
+# Size the pool above the expected number of concurrent chats; once it
+# saturates, requests queue for a connection and throughput stops scaling
+MAX_KEEPALIVE_CONNECTIONS = 50
+MAX_CONNECTIONS = 100
+KEEPALIVE_EXPIRY = 60.0  # seconds
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_groq_client() -> Groq:
+    """Get singleton Groq client backed by a shared connection pool (thread-safe)"""
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:  # Double-check after acquiring lock
+                http_client = httpx.Client(
+                    limits=httpx.Limits(max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                                        max_connections=MAX_CONNECTIONS,
+                                        keepalive_expiry=KEEPALIVE_EXPIRY),
+                    timeout=httpx.Timeout(30.0, connect=5.0),
+                    http2=_HTTP2_AVAILABLE)
+                _client = Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client)
+
+    return _client
@@ -0,0 +1,180 @@
+"""
+Single-pass keyword scanning across several keyword categories.
+
+Backends, in order of preference:
+- Hyperscan (python-hyperscan): all keywords compiled into one multi-pattern
+  DFA that scans the UTF-8 bytes of the text
+- Aho-Corasick automaton (pyahocorasick): one walk over the text
+- Token-set intersection plus a check of multi-word phrases (no extra deps)
+
+All paths match whole words only, unless the scanner is built with
+``whole_words=False``, in which case keywords match anywhere in the text
+(like ``keyword in text``).
+"""
+
+import re
+import logging
+import threading
+from typing import Dict, FrozenSet, Iterable, Set
+
+try:
+    import hyperscan
+except ImportError:  # Optional accelerator
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:  # Optional accelerator
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r"[\w']+")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch in "_'"
+
+
+def _is_continuation_byte(byte: int) -> bool:
+    return 0x80 <= byte < 0xC0
+
+
+def _char_before(data: bytes, pos: int) -> str:
+    """Decode the UTF-8 character that ends just before byte offset pos"""
+    start = pos - 1
+    while start > 0 and _is_continuation_byte(data[start]):
+        start -= 1
+    return data[start:pos].decode("utf-8", "replace")
+
+
+def _char_at(data: bytes, pos: int) -> str:
+    """Decode the UTF-8 character that starts at byte offset pos"""
+    end = pos + 1
+    while end < len(data) and _is_continuation_byte(data[end]):
+        end += 1
+    return data[pos:end].decode("utf-8", "replace")
+
+
+class KeywordScanner:
+    """Finds which keywords of which categories occur in a piece of text"""
+
+    def __init__(self, categories: Dict[str, Iterable[str]], whole_words: bool = True):
+        """
+        Build the scanner
+
+        Args:
+            categories: Mapping of category name to its keywords/phrases (lowercase)
+            whole_words: Only match keywords bounded by non-word characters;
+                when False, plain substring matches count
+        """
+        self.whole_words = whole_words
+        self._categories: Dict[str, FrozenSet[str]] = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                self._categories[keyword] = self._categories.get(keyword, frozenset()) | {category}
+
+        self._words = frozenset(k for k in self._categories if " " not in k)
+        # Phrases indexed by their first word so they are only checked when it is present
+        self._phrases: Dict[str, list] = {}
+        for keyword in self._categories:
+            if " " in keyword:
+                self._phrases.setdefault(keyword.split(" ", 1)[0], []).append(keyword)
+
+        # Hyperscan reports matches by pattern id; ids index this list
+        self._keyword_list = list(self._categories)
+        self._hs_db = None
+        self._hs_lock = threading.Lock()  # The database's scratch space is not shareable
+        if hyperscan is not None and self._keyword_list:
+            try:
+                db = hyperscan.Database()
+                db.compile(
+                    expressions=[re.escape(k).encode("utf-8") for k in self._keyword_list],
+                    ids=list(range(len(self._keyword_list))),
+                    elements=len(self._keyword_list),
+                    flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(self._keyword_list))
+                self._hs_db = db
+            except Exception as e:
+                logger.warning(f"Hyperscan database unavailable, trying other backends: {e}")
+
+        self._automaton = None
+        if self._hs_db is None and ahocorasick is not None:
+            try:
+                automaton = ahocorasick.Automaton()
+                for keyword in self._categories:
+                    automaton.add_word(keyword, keyword)
+                automaton.make_automaton()
+                self._automaton = automaton
+            except Exception as e:
+                logger.warning(f"Aho-Corasick automaton unavailable, using token sets: {e}")
+
+    def matched_keywords(self, text_lower: str) -> Set[str]:
+        """Return the set of keywords occurring in the text"""
+        if self._hs_db is not None:
+            return self._hyperscan_matches(text_lower)
+
+        if self._automaton is not None:
+            if not self.whole_words:
+                return {keyword for _, keyword in self._automaton.iter(text_lower)}
+            found = set()
+            text_len = len(text_lower)
+            for end, keyword in self._automaton.iter(text_lower):
+                start = end - len(keyword) + 1
+                if start > 0 and _is_word_char(text_lower[start - 1]):
+                    continue
+                if end + 1 < text_len and _is_word_char(text_lower[end + 1]):
+                    continue
+                found.add(keyword)
+            return found
+
+        if not self.whole_words:
+            return {keyword for keyword in self._categories if keyword in text_lower}
+
+        words = WORD_RE.findall(text_lower)
+        tokens = set(words)
+        found = tokens & self._words
+        candidate_starts = tokens & self._phrases.keys()
+        if candidate_starts:
+            padded = f" {' '.join(words)} "
+            for first_word in candidate_starts:
+                found.update(p for p in self._phrases[first_word] if f" {p} " in padded)
+        return found
+
+    def _hyperscan_matches(self, text_lower: str) -> Set[str]:
+        """Match all keywords in one Hyperscan pass over the UTF-8 bytes"""
+        data = text_lower.encode("utf-8")
+        data_len = len(data)
+        found = set()
+
+        def on_match(pattern_id, start, end, flags, context):
+            # Keywords are whole characters, so start and end fall on
+            # character boundaries; decode the neighbours so the word check
+            # agrees with the other backends on non-ASCII text
+            if self.whole_words:
+                if start > 0 and _is_word_char(_char_before(data, start)):
+                    return None
+                if end < data_len and _is_word_char(_char_at(data, end)):
+                    return None
+            found.add(self._keyword_list[pattern_id])
+            return None
+
+        with self._hs_lock:
+            self._hs_db.scan(data, match_event_handler=on_match)
+        return found
+
+    def scan(self, text_lower: str) -> Dict[str, Set[str]]:
+        """
+        Scan text once for every category
+
+        Args:
+            text_lower: Lowercased text to scan
+
+        Returns:
+            Mapping of category name to the keywords of it that matched
+            (categories without matches are omitted)
+        """
+        hits: Dict[str, Set[str]] = {}
+        for keyword in self.matched_keywords(text_lower):
+            for category in self._categories[keyword]:
+                hits.setdefault(category, set()).add(keyword)
+        return hits
@@ -1,16 +1,56 @@
-import os
 import json
-from groq import Groq
-from typing import Dict, Any
+import hashlib
+from bisect import bisect_left
+from utils.groq_client import get_groq_client
+from utils.keyword_scanner import KeywordScanner
+from utils.ttl_cache import TTLCache
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # Optional accelerator
+    _json_loads = json.loads
+
 # Load environment variables
 load_dotenv()
 
+# Word sets of the rule-based fallback (score and emotion cues), matched as
+# whole words in one scan (so "good" no longer fires on "goodbye")
+_FALLBACK_KEYWORDS = KeywordScanner({
+    "positive": [
+        "good", "great", "happy", "wonderful", "excellent", "love", "enjoy",
+        "better", "fine", "well", "nice", "pleasant", "comfortable", "peaceful"
+    ],
+    "negative": [
+        "bad", "terrible", "awful", "hate", "horrible", "pain", "hurt", "sad",
+        "worried", "anxious", "confused", "lost", "dizzy", "sick", "tired",
+        "lonely", "scared", "frightened", "depressed", "upset"
+    ],
+    "concern": [
+        "pain", "hurt", "dizzy", "fall", "emergency", "help", "confused",
+        "memory", "forgot", "lost", "scared", "can't", "unable", "difficult"
+    ],
+    "discomfort": ["pain", "hurt", "sick"],
+    "loneliness": ["lonely", "alone", "miss"],
+    "contentment": ["happy", "good", "great"],
+    "anxiety": ["worried", "anxious", "scared"],
+})
+
 class SentimentAnalyzer:
     def __init__(self):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.client = get_groq_client()
         self.model = "llama-3.3-70b-versatile"  # Using Groq model
+        # LLM results by normalized-text hash; short check-in replies
+        # ("I'm fine", "good morning") repeat often
+        self._result_cache = TTLCache(maxsize=4096, ttl=3600)
+    
+    @staticmethod
+    def _cache_key(text: str) -> str:
+        """Hash of the text with case and whitespace normalized"""
+        normalized = " ".join(text.lower().split())
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
     
     def analyze(self, text: str) -> Dict[str, Any]:
         """
@@ -22,6 +62,12 @@ class SentimentAnalyzer:
             "emotions": list of detected emotions
         }
         """
+        cache_key = self._cache_key(text)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            # Copy so callers can't mutate the cached result
+            return dict(cached, emotions=list(cached["emotions"]))
+        
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
@@ -59,47 +105,127 @@ class SentimentAnalyzer:
                 max_tokens=200
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = _json_loads(response.choices[0].message.content)
             
             # Validate and clean the response
-            return {
-                "score": max(-1, min(1, float(result.get("score", 0)))),
-                "label": result.get("label", "neutral"),
-                "confidence": max(0, min(1, float(result.get("confidence", 0.5)))),
-                "emotions": result.get("emotions", [])
-            }
+            analysis = self._clean_result(result)
+            # Only LLM results are cached; the fallback is cheap and a retry may succeed
+            self._result_cache.set(cache_key, analysis)
+            return dict(analysis, emotions=list(analysis["emotions"]))
             
         except Exception as e:
             # Fallback to simple rule-based analysis
             return self._fallback_analysis(text)
     
-    def _fallback_analysis(self, text: str) -> Dict[str, Any]:
+    def analyze_batch(self, texts: List[str], batch_size: int = 20) -> List[Dict[str, Any]]:
         """
-        Simple rule-based sentiment analysis as fallback
+        Analyze several texts with one Groq request per batch_size texts
+        
+        Cached texts are answered without a request and repeated texts are
+        sent once. If a request fails or returns the wrong number of
+        results, the texts in it fall back to rule-based analysis.
+        
+        Args:
+            texts: Texts to analyze
+            batch_size: Maximum texts sent in one request
+        
+        Returns:
+            One analyze()-style result per text, in input order
         """
-        text_lower = text.lower()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}  # cache key -> positions of that text
+        for i, text in enumerate(texts):
+            cache_key = self._cache_key(text)
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                results[i] = dict(cached, emotions=list(cached["emotions"]))
+            else:
+                pending.setdefault(cache_key, []).append(i)
         
-        # Define word lists
-        positive_words = [
-            "good", "great", "happy", "wonderful", "excellent", "love", "enjoy",
-            "better", "fine", "well", "nice", "pleasant", "comfortable", "peaceful"
-        ]
+        keys = list(pending)
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            chunk_texts = [texts[pending[key][0]] for key in chunk]
+            try:
+                analyses = self._request_batch(chunk_texts)
+            except Exception:
+                analyses = None
+            for n, key in enumerate(chunk):
+                if analyses is not None:
+                    analysis = analyses[n]
+                    self._result_cache.set(key, analysis)
+                else:
+                    analysis = self._fallback_analysis(chunk_texts[n])
+                for i in pending[key]:
+                    results[i] = dict(analysis, emotions=list(analysis["emotions"]))
         
-        negative_words = [
-            "bad", "terrible", "awful", "hate", "horrible", "pain", "hurt", "sad",
-            "worried", "anxious", "confused", "lost", "dizzy", "sick", "tired",
-            "lonely", "scared", "frightened", "depressed", "upset"
-        ]
+        return results
+    
+    def _request_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Score texts in one JSON-mode request; raises if the reply is unusable"""
+        numbered = "\n".join(f"{n}. \"{text}\"" for n, text in enumerate(texts, 1))
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": """You are an expert sentiment analyzer specializing in elderly care conversations. 
+                    You will get a numbered list of texts. For each text, in order, provide:
+                    1. A sentiment score from -1 (very negative) to 1 (very positive)
+                    2. A label: "positive", "negative", or "neutral"
+                    3. A confidence score from 0 to 1
+                    4. A list of detected emotions (e.g., joy, sadness, anxiety, contentment, worry, etc.)
+                    
+                    Be especially sensitive to:
+                    - Signs of pain, discomfort, or distress
+                    - Loneliness or isolation
+                    - Confusion or memory concerns
+                    - Medication-related anxiety
+                    - Family or social connections
+                    
+                    Respond with JSON only in this format, one result per text:
+                    {
+                        "results": [
+                            {"score": -0.5, "label": "negative", "confidence": 0.8, "emotions": ["worry", "sadness"]}
+                        ]
+                    }"""
+                },
+                {
+                    "role": "user",
+                    "content": f"Analyze the sentiment of each of these texts:\n{numbered}"
+                }
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=200 * len(texts)
+        )
         
-        concern_words = [
-            "pain", "hurt", "dizzy", "fall", "emergency", "help", "confused",
-            "memory", "forgot", "lost", "scared", "can't", "unable", "difficult"
-        ]
+        batch = _json_loads(response.choices[0].message.content).get("results", [])
+        if len(batch) != len(texts):
+            raise ValueError(f"Expected {len(texts)} sentiment results, got {len(batch)}")
+        return [self._clean_result(result) for result in batch]
+    
+    @staticmethod
+    def _clean_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Clamp and default the fields of one LLM sentiment result"""
+        return {
+            "score": max(-1, min(1, float(result.get("score", 0)))),
+            "label": result.get("label", "neutral"),
+            "confidence": max(0, min(1, float(result.get("confidence", 0.5)))),
+            "emotions": list(result.get("emotions", []))
+        }
+    
+    def _fallback_analysis(self, text: str) -> Dict[str, Any]:
+        """
+        Simple rule-based sentiment analysis as fallback
+        """
+        text_lower = text.lower()
         
-        # Count words
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        concern_count = sum(1 for word in concern_words if word in text_lower)
+        # Count the distinct words of each list found in the text; the
+        # emotion cues below come from the same scan
+        hits = _FALLBACK_KEYWORDS.scan(text_lower)
+        positive_count = len(hits.get("positive", ()))
+        negative_count = len(hits.get("negative", ()))
+        concern_count = len(hits.get("concern", ()))
         
         # Calculate score
         total_words = len(text_lower.split())
@@ -122,13 +248,13 @@ class SentimentAnalyzer:
         emotions = []
         if concern_count > 0:
             emotions.append("concern")
-        if any(word in text_lower for word in ["pain", "hurt", "sick"]):
+        if "discomfort" in hits:
             emotions.append("discomfort")
-        if any(word in text_lower for word in ["lonely", "alone", "miss"]):
+        if "loneliness" in hits:
             emotions.append("loneliness")
-        if any(word in text_lower for word in ["happy", "good", "great"]):
+        if "contentment" in hits:
             emotions.append("contentment")
-        if any(word in text_lower for word in ["worried", "anxious", "scared"]):
+        if "anxiety" in hits:
             emotions.append("anxiety")
         
         return {
@@ -166,28 +292,29 @@ def analyze_sentiment(text: str) -> Dict[str, Any]:
     analyzer = get_analyzer()
     return analyzer.analyze(text)
 
+def analyze_sentiment_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Convenience function to analyze several texts with batched requests
+    """
+    analyzer = get_analyzer()
+    return analyzer.analyze_batch(texts)
+
 # Additional utility functions
+
+# Score breakpoints and the value for each band; a score equal to a
+# breakpoint belongs to the band below it (thresholds are strict "score >")
+_EMOJI_BREAKS = (-0.5, -0.2, 0.2, 0.5)
+_EMOJIS = ("😢", "😟", "😐", "🙂", "😊")
+_COLOR_BREAKS = (-0.3, 0.3)
+_COLORS = ("red", "yellow", "green")
+
 def get_sentiment_emoji(score: float) -> str:
     """Convert sentiment score to emoji"""
-    if score > 0.5:
-        return "😊"
-    elif score > 0.2:
-        return "🙂"
-    elif score > -0.2:
-        return "😐"
-    elif score > -0.5:
-        return "😟"
-    else:
-        return "😢"
+    return _EMOJIS[bisect_left(_EMOJI_BREAKS, score)]
 
 def get_sentiment_color(score: float) -> str:
     """Convert sentiment score to color (for UI)"""
-    if score > 0.3:
-        return "green"
-    elif score > -0.3:
-        return "yellow"
-    else:
-        return "red"
+    return _COLORS[bisect_left(_COLOR_BREAKS, score)]
 
 def classify_concern_level(emotions: list, score: float) -> str:
     """Classify the level of concern based on emotions and score"""
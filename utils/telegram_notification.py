@@ -1,7 +1,8 @@
 from utils.timezone_utils import now_central
 import os
 import requests
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -101,6 +102,25 @@ def send_emergency_alert(
     notifier = TelegramNotifier()
     return notifier.send_emergency_alert(chat_id, patient_name, concerns, severity, message)
 
+def send_emergency_alerts(
+    chat_ids: List[str],
+    patient_name: str,
+    concerns: list,
+    severity: str,
+    message: str
+) -> List[Dict[str, Any]]:
+    """Send the same emergency alert to several chats concurrently (results in chat_ids order)"""
+    if not chat_ids:
+        return []
+    notifier = TelegramNotifier()
+    # Each send is a blocking HTTPS round trip; overlapping them makes the
+    # total wait the slowest send rather than the sum
+    with ThreadPoolExecutor(max_workers=min(8, len(chat_ids))) as pool:
+        return list(pool.map(
+            lambda chat_id: notifier.send_emergency_alert(chat_id, patient_name, concerns,
+                                                          severity, message),
+            chat_ids))
+
 def send_telegram_message(chat_id: str, message: str) -> Dict[str, Any]:
     """Helper function to send a simple Telegram message"""
     notifier = TelegramNotifier()
@@ -1,9 +1,23 @@
 import re
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Tuple
 from gtts import gTTS
 from io import BytesIO
 import base64
 
+from utils.ttl_cache import TTLCache
+
+# Synthesized audio keyed by (cleaned text, slow); replaying a message or
+# speaking the same text again skips the gTTS round trip
+_audio_cache = TTLCache(maxsize=64, ttl=3600)
+# Background synthesis of replies the user may want to hear, so the audio
+# is usually ready before the listen button is pressed
+_prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="carely-tts")
+_pending: Dict[Tuple[str, bool], Future] = {}
+_pending_lock = threading.Lock()
+
 def clean_text_for_speech(text: str) -> str:
     """
     Clean text for TTS by removing emojis and special symbols
@@ -52,6 +66,56 @@ def generate_speech_audio(text: str, slow: bool = True) -> bytes:
     if not cleaned_text:
         return None
     
+    key = (cleaned_text, slow)
+    audio = _audio_cache.get(key)
+    if audio is not None:
+        return audio
+    
+    # Reuse a prefetch that is already running for this text
+    with _pending_lock:
+        future = _pending.get(key)
+    if future is not None:
+        try:
+            return future.result()
+        except Exception:
+            pass  # Prefetch failed; synthesize directly below
+    
+    audio = _synthesize(cleaned_text, slow)
+    _audio_cache.set(key, audio)
+    return audio
+
+def prefetch_speech_audio(text: str, slow: bool = True) -> None:
+    """
+    Start synthesizing speech for text in the background (no-op if cached or in progress)
+    
+    Args:
+        text: The text that may be spoken later
+        slow: Speech rate the audio will be requested with
+    """
+    cleaned_text = clean_text_for_speech(text)
+    
+    if not cleaned_text:
+        return
+    
+    key = (cleaned_text, slow)
+    if _audio_cache.get(key) is not None:
+        return
+    with _pending_lock:
+        if key not in _pending:
+            _pending[key] = _prefetch_executor.submit(_prefetch, key)
+
+def _prefetch(key: Tuple[str, bool]) -> bytes:
+    """Synthesize and cache audio for a prefetch request"""
+    try:
+        audio = _synthesize(*key)
+        _audio_cache.set(key, audio)
+        return audio
+    finally:
+        with _pending_lock:
+            _pending.pop(key, None)
+
+def _synthesize(cleaned_text: str, slow: bool) -> bytes:
+    """Run gTTS on already-cleaned text and return MP3 bytes"""
     tts = gTTS(text=cleaned_text, lang='en', slow=slow)
     
     audio_buffer = BytesIO()